@@ -9,56 +9,391 @@ Author: Satej
 """
 
 import os
-from data_collection import stream_tweets
-from data_preprocessing import preprocess_data
-from sentiment_analysis import perform_sentiment_analysis
-from trending_topics import identify_and_visualize_trends
-from data_storage import create_database, store_data_to_db
+import time
+import instrumentation
+from batch_manifest import MANIFEST_PATH, BatchManifest, batch_id_for
+from pipeline_dag import PipelineDAG, Stage
+from stage_io import read_frame, with_format
 
 # Configuration paths
 RAW_TWEETS_DIR = "./raw_tweets/"
 PROCESSED_TWEETS_DIR = "./processed_tweets/"
 VISUALIZATION_DIR = "./visualizations/"
-os.makedirs(RAW_TWEETS_DIR, exist_ok=True)
-os.makedirs(PROCESSED_TWEETS_DIR, exist_ok=True)
-os.makedirs(VISUALIZATION_DIR, exist_ok=True)
+METRICS_DIR = "./metrics/"
+DEDUP_STATE_FILE = os.path.join(PROCESSED_TWEETS_DIR, ".dedup_state.npz")
 
-def run_pipeline(keywords):
+# Steps a raw batch goes through, in order; recorded per batch in the manifest
+BATCH_STAGES = ["preprocess", "sentiment", "trending", "storage"]
+
+# The stage modules are imported by the functions that run them, so that importing
+# this module (or running only some stages) does not load tweepy, NLTK, scikit-learn
+# and matplotlib up front.
+
+def ensure_directories():
+    """
+    Creates the pipeline's data directories if they do not exist yet.
+    """
+    for directory in (RAW_TWEETS_DIR, PROCESSED_TWEETS_DIR, VISUALIZATION_DIR):
+        os.makedirs(directory, exist_ok=True)
+
+def batch_output_paths(raw_file_path, file_format="csv", per_batch=True):
+    """
+    Returns the stage output paths for a raw batch.
+
+    Args:
+        raw_file_path (str): Path to the raw tweet batch file.
+        file_format (str): Format of the stage files.
+        per_batch (bool): If True, outputs go to a directory named after the batch
+            under PROCESSED_TWEETS_DIR and VISUALIZATION_DIR, so batches do not
+            overwrite each other. Otherwise the fixed shared names are used.
+
+    Returns:
+        dict: Paths of the 'cleaned', 'deduplicated' and 'sentiment' stage files,
+            the 'trending' image, the 'dag_state' file and the 'dedup_record' file
+            (what the batch added to the deduplication state).
+    """
+    processed_dir, visualization_dir = PROCESSED_TWEETS_DIR, VISUALIZATION_DIR
+    if per_batch:
+        batch_id = batch_id_for(raw_file_path)
+        processed_dir = os.path.join(PROCESSED_TWEETS_DIR, batch_id)
+        visualization_dir = os.path.join(VISUALIZATION_DIR, batch_id)
+        os.makedirs(processed_dir, exist_ok=True)
+        os.makedirs(visualization_dir, exist_ok=True)
+    return {
+        "cleaned": with_format(os.path.join(processed_dir, "cleaned_tweets.csv"), file_format),
+        "deduplicated": with_format(os.path.join(processed_dir, "deduplicated_tweets.csv"), file_format),
+        "sentiment": with_format(os.path.join(processed_dir, "sentiment_results.csv"), file_format),
+        "trending": os.path.join(visualization_dir, "trending_topics.png"),
+        "dag_state": os.path.join(processed_dir, ".pipeline_state.json"),
+        "dedup_record": os.path.join(processed_dir, ".dedup_record.npz"),
+    }
+
+def process_raw_batch(raw_file_path, file_format="csv", in_memory=False, checkpoint=True, store=True,
+                      deduplicator=None, manifest=None, dedup_state_file=DEDUP_STATE_FILE):
+    """
+    Runs the preprocessing, sentiment, trending and storage steps on one raw batch.
+
+    In file-chained mode every stage writes its output and the next stage reads it
+    back. In in-memory mode the stages pass one DataFrame along and files are only
+    written if checkpointing is enabled.
+
+    With a manifest, the outputs go to a per-batch directory, each step is recorded
+    as it completes, and a batch that was interrupted resumes after its last
+    completed step whose output files still exist. Every step after that is run
+    again, since it may depend on outputs rewritten by the earlier ones.
+
+    Args:
+        raw_file_path (str): Path to the raw tweet batch file.
+        file_format (str): Format of the stage files: 'csv', 'parquet' or 'feather'.
+        in_memory (bool): If True, pass DataFrames between stages instead of files.
+        checkpoint (bool): In in-memory mode, still persist the cleaned and
+            sentiment outputs as stage files.
+        store (bool): If True, store the results in the database.
+        deduplicator (Deduplicator, optional): If given, duplicate tweets are
+            dropped during preprocessing, so the later steps skip them.
+        manifest (BatchManifest, optional): Manifest recording the batch's progress.
+            With a deduplicator and persisted stage outputs, the filter state is
+            saved as soon as preprocessing is recorded, since a resumed batch does
+            not pass through the deduplicator again. Otherwise the caller saves it
+            once the batch is done. With a deduplicator, what the batch added to
+            the filter is also kept in its 'dedup_record' file, so that if the raw
+            file changes later, its new version is not dropped as a duplicate of
+            the old one.
+        dedup_state_file (str): Where the deduplicator's state is saved.
+
+    Returns:
+        dict: Seconds spent in each step that ran.
+    """
+    from data_preprocessing import preprocess_data
+    from sentiment_analysis import perform_sentiment_analysis
+    from trending_topics import identify_and_visualize_trends
+    from data_storage import create_database, store_data_to_db
+    from deduplication import load_batch_record, save_batch_record
+
+    ensure_directories()
+    timings = {}
+    paths = batch_output_paths(raw_file_path, file_format, per_batch=manifest is not None)
+    preprocessed_file, sentiment_file, trending_image_path = paths["cleaned"], paths["sentiment"], paths["trending"]
+    persist = not in_memory or checkpoint
+    record_batch = deduplicator is not None and manifest is not None
+    outputs = {
+        "preprocess": [preprocessed_file] if persist else [],
+        "sentiment": [sentiment_file] if persist else [],
+        "trending": [trending_image_path],
+        "storage": [],
+    }
+
+    # Resume after the completed steps whose outputs are still on disk; a step
+    # without persisted outputs cannot be skipped, as later steps need its data
+    resume_from = 0
+    if manifest is not None:
+        completed = manifest.completed_stages(raw_file_path)
+        for stage in BATCH_STAGES:
+            if stage not in completed or not persist and stage in ("preprocess", "sentiment"):
+                break
+            if not all(os.path.exists(path) for path in outputs[stage]):
+                break
+            resume_from += 1
+        if resume_from:
+            print(f"Resuming {raw_file_path} after step '{BATCH_STAGES[resume_from - 1]}'")
+
+    started = []
+
+    def should_run(stage):
+        if BATCH_STAGES.index(stage) < resume_from:
+            return False
+        started.append(stage)
+        if manifest is not None:
+            manifest.start_stage(raw_file_path, stage)
+        return True
+
+    def finish(stage, start):
+        timings[stage] = time.perf_counter() - start
+        if manifest is not None:
+            manifest.finish_stage(raw_file_path, stage, outputs[stage], timings[stage])
+
+    try:
+        # Step 2: Data Preprocessing
+        if should_run("preprocess"):
+            print("Step 2: Preprocessing data...")
+            start = time.perf_counter()
+            if record_batch:
+                deduplicator.begin_batch(load_batch_record(paths["dedup_record"]))
+            cleaned_data = preprocess_data(raw_file_path, preprocessed_file if persist else None,
+                                           deduplicator=deduplicator)
+            finish("preprocess", start)
+            if record_batch:
+                # Saved before the filter state: a crash in between only excuses
+                # entries the saved state does not hold
+                save_batch_record(deduplicator.end_batch(), paths["dedup_record"])
+            if deduplicator is not None and manifest is not None and persist:
+                # Saved after the step is recorded: a crash in between only loses
+                # the batch's filter entries, while the reverse order would make a
+                # re-run of preprocessing drop the whole batch as duplicates
+                deduplicator.save(dedup_state_file)
+        else:
+            cleaned_data = read_frame(preprocessed_file) if in_memory else None
+
+        # Step 3: Sentiment Analysis
+        if should_run("sentiment"):
+            print("Step 3: Performing sentiment analysis...")
+            start = time.perf_counter()
+            sentiment_input = cleaned_data if in_memory else preprocessed_file
+            sentiment_data = perform_sentiment_analysis(sentiment_input, sentiment_file if persist else None)
+            finish("sentiment", start)
+        else:
+            sentiment_data = read_frame(sentiment_file) if in_memory else None
+
+        # Step 4: Trending Topics Identification
+        if should_run("trending"):
+            print("Step 4: Identifying trending topics...")
+            start = time.perf_counter()
+            identify_and_visualize_trends(cleaned_data if in_memory else preprocessed_file, trending_image_path,
+                                          show=False)
+            finish("trending", start)
+
+        # Step 5: Data Storage
+        if store and should_run("storage"):
+            print("Step 5: Storing data into the database...")
+            start = time.perf_counter()
+            create_database()
+            processed_data = sentiment_data if in_memory else read_frame(sentiment_file)
+            store_data_to_db(processed_data)
+            finish("storage", start)
+    except Exception as e:
+        if manifest is not None and started:
+            manifest.fail_stage(raw_file_path, started[-1], e)
+        raise
+
+    timings["total"] = sum(timings.values())
+    return timings
+
+def build_pipeline_dag(raw_file_path, file_format="csv", dedup=False, per_batch=False):
+    """
+    Declares steps 2-5 as DAG stages with their input and output files.
+
+    Sentiment analysis and trending topics both depend only on the cleaned tweets,
+    so they run concurrently.
+
+    Args:
+        raw_file_path (str): Path to the raw tweet batch file.
+        file_format (str): Format of the stage files.
+        dedup (bool): If True, add a deduplication stage between preprocessing and
+            the analysis stages, keeping its state in DEDUP_STATE_FILE. With
+            per-batch outputs, a batch whose raw file changed is not dropped as a
+            duplicate of its earlier version (see deduplicate_file).
+        per_batch (bool): If True, write the outputs and the DAG state to the
+            batch's own directories (see batch_output_paths).
+
+    Returns:
+        PipelineDAG: Pipeline ready to run.
+    """
+    from data_preprocessing import preprocess_data
+    from sentiment_analysis import perform_sentiment_analysis
+    from trending_topics import identify_and_visualize_trends
+    from data_storage import store_file_to_db
+    from deduplication import deduplicate_file
+
+    ensure_directories()
+    paths = batch_output_paths(raw_file_path, file_format, per_batch)
+    preprocessed_file, sentiment_file, trending_image_path = paths["cleaned"], paths["sentiment"], paths["trending"]
+
+    dag = PipelineDAG(paths["dag_state"])
+    dag.add_stage(Stage("preprocess", preprocess_data, [raw_file_path], [preprocessed_file],
+                        {"input_file": raw_file_path, "output_file": preprocessed_file}))
+    analysis_input = preprocessed_file
+    if dedup:
+        # Skipped like any other stage when the cleaned tweets are unchanged, so a
+        # re-run does not mark the same batch as duplicates of itself
+        analysis_input = paths["deduplicated"]
+        dedup_kwargs = {"input_file": preprocessed_file, "output_file": analysis_input,
+                        "state_file": DEDUP_STATE_FILE}
+        if per_batch:
+            dedup_kwargs["record_file"] = paths["dedup_record"]
+        dag.add_stage(Stage("dedup", deduplicate_file, [preprocessed_file], [analysis_input], dedup_kwargs))
+    dag.add_stage(Stage("sentiment", perform_sentiment_analysis, [analysis_input], [sentiment_file],
+                        {"input_file": analysis_input, "output_file": sentiment_file}))
+    dag.add_stage(Stage("trending", identify_and_visualize_trends, [analysis_input], [trending_image_path],
+                        {"input_file": analysis_input, "output_image": trending_image_path, "show": False}))
+    dag.add_stage(Stage("storage", store_file_to_db, [sentiment_file], [],
+                        {"input_file": sentiment_file}))
+    return dag
+
+def process_new_batches(file_format="csv", in_memory=False, checkpoint=True, concurrent=False, dedup=False,
+                        manifest_path=MANIFEST_PATH):
+    """
+    Runs steps 2-5 on every raw batch that is new, changed or not fully processed.
+
+    The raw directory is scanned into the manifest first, then the pending batches
+    are processed oldest first, each into its own output directory. A batch that
+    fails is recorded as failed and retried on the next run; the other batches
+    still run.
+
+    Args:
+        file_format (str): Format of the stage files.
+        in_memory (bool): If True, pass DataFrames between stages.
+        checkpoint (bool): In in-memory mode, still persist the stage outputs, so
+            an interrupted batch can resume after its last completed step.
+        concurrent (bool): If True, run each batch through the DAG executor, whose
+            per-batch state file skips the stages that already ran.
+        dedup (bool): If True, drop duplicate tweets, keeping the filter state in
+            DEDUP_STATE_FILE.
+        manifest_path (str): Path to the manifest database.
+
+    Returns:
+        dict: Per-batch results: step timings, or the DAG report in concurrent mode.
+    """
+    manifest = BatchManifest(manifest_path)
+    manifest.scan(RAW_TWEETS_DIR)
+    stages = BATCH_STAGES[:1] + ["dedup"] + BATCH_STAGES[1:] if concurrent and dedup else BATCH_STAGES
+    pending = manifest.pending_batches(stages)
+    print(f"{len(pending)} raw batches to process")
+
+    deduplicator = None
+    if dedup and not concurrent:
+        from deduplication import Deduplicator
+        deduplicator = Deduplicator.load_or_create(DEDUP_STATE_FILE)
+
+    results = {}
+    try:
+        for raw_file_path in pending:
+            print(f"Processing batch {raw_file_path}...")
+            if concurrent:
+                dag = build_pipeline_dag(raw_file_path, file_format, dedup, per_batch=True)
+                report = dag.run()
+                for entry in report:
+                    # 'ran' means the stage rewrote all its outputs and 'skipped' that
+                    # its inputs match such a run; anything else is not done
+                    if entry["status"] in ("ran", "skipped"):
+                        manifest.finish_stage(raw_file_path, entry["stage"], dag.stages[entry["stage"]].outputs,
+                                              entry["seconds"])
+                    else:
+                        manifest.fail_stage(raw_file_path, entry["stage"], entry["status"])
+                results[raw_file_path] = report
+                continue
+            try:
+                timings = process_raw_batch(raw_file_path, file_format, in_memory, checkpoint,
+                                            deduplicator=deduplicator, manifest=manifest)
+            except Exception as e:
+                print(f"Batch {raw_file_path} failed: {e}")
+                if deduplicator is not None:
+                    # Go back to the saved state: it holds the batch's entries only if
+                    # its preprocessing completed, which is exactly when the retry
+                    # resumes after preprocessing instead of running it again
+                    deduplicator = Deduplicator.load_or_create(DEDUP_STATE_FILE)
+                continue
+            print(f"Step timings (seconds): {timings}")
+            results[raw_file_path] = timings
+            if deduplicator is not None:
+                deduplicator.save(DEDUP_STATE_FILE)
+    finally:
+        manifest.close()
+    return results
+
+def compare_pipeline_modes(raw_file_path, file_format="csv"):
+    """
+    Times the file-chained and in-memory modes on the same raw batch.
+
+    Storage is skipped so both runs can process the same tweets.
+
+    Args:
+        raw_file_path (str): Path to the raw tweet batch file.
+        file_format (str): Format of the stage files.
+
+    Returns:
+        dict: Step timings for each mode.
+    """
+    file_timings = process_raw_batch(raw_file_path, file_format, in_memory=False, store=False)
+    memory_timings = process_raw_batch(raw_file_path, file_format, in_memory=True, checkpoint=False, store=False)
+    for step in file_timings:
+        print(f"{step:>10}: file-chained {file_timings[step]:.3f}s, in-memory {memory_timings[step]:.3f}s")
+    return {"file_chained": file_timings, "in_memory": memory_timings}
+
+def run_pipeline(keywords, file_format="csv", in_memory=False, checkpoint=True, concurrent=False, metrics=False,
+                 dedup=False):
     """
     Executes the entire social media analytics pipeline.
 
     Args:
         keywords (list): List of keywords or hashtags to filter tweets.
+        file_format (str): Format of the files passed between stages: 'csv',
+            'parquet' or 'feather'.
+        in_memory (bool): If True, pass DataFrames between stages instead of
+            re-reading each stage's output file.
+        checkpoint (bool): In in-memory mode, still persist the stage outputs.
+        concurrent (bool): If True, run steps 2-5 through the DAG executor, which
+            overlaps independent stages and skips stages whose inputs are unchanged.
+        metrics (bool): If True, record per-stage spans, counters and peak memory
+            (with tracemalloc, which slows the run down) and export them to
+            METRICS_DIR as 'pipeline.prom' (Prometheus text) and 'trace.json'.
+        dedup (bool): If True, drop tweets already seen (same id) or nearly
+            identical to recent ones before analysis. The filter state is kept in
+            DEDUP_STATE_FILE between runs.
+
+    Every raw batch not yet fully processed is handled (see process_new_batches),
+    including batches left over from earlier or interrupted runs.
     """
+    from data_collection import stream_tweets
+
     print("Starting the automation pipeline...")
-    
-    # Step 1: Data Collection
-    print("Step 1: Collecting tweets...")
-    stream_tweets(keywords)
-    latest_file = sorted(os.listdir(RAW_TWEETS_DIR), reverse=True)[0]
-    raw_file_path = os.path.join(RAW_TWEETS_DIR, latest_file)
-
-    # Step 2: Data Preprocessing
-    print("Step 2: Preprocessing data...")
-    preprocessed_file = os.path.join(PROCESSED_TWEETS_DIR, "cleaned_tweets.csv")
-    preprocess_data(raw_file_path, preprocessed_file)
-
-    # Step 3: Sentiment Analysis
-    print("Step 3: Performing sentiment analysis...")
-    sentiment_file = os.path.join(PROCESSED_TWEETS_DIR, "sentiment_results.csv")
-    perform_sentiment_analysis(preprocessed_file, sentiment_file)
-
-    # Step 4: Trending Topics Identification
-    print("Step 4: Identifying trending topics...")
-    trending_image_path = os.path.join(VISUALIZATION_DIR, "trending_topics.png")
-    identify_and_visualize_trends(preprocessed_file, trending_image_path)
-
-    # Step 5: Data Storage
-    print("Step 5: Storing data into the database...")
-    create_database()
-    processed_data = pd.read_csv(sentiment_file)
-    store_data_to_db(processed_data)
+    ensure_directories()
+    if metrics:
+        instrumentation.enable(trace_memory=True)
+
+    try:
+        with instrumentation.span("pipeline"):
+            # Step 1: Data Collection
+            print("Step 1: Collecting tweets...")
+            with instrumentation.span("collection"):
+                stream_tweets(keywords, file_format)
+            process_new_batches(file_format, in_memory, checkpoint, concurrent, dedup)
 
+        if metrics:
+            instrumentation.write_prometheus(os.path.join(METRICS_DIR, "pipeline.prom"))
+            instrumentation.write_trace(os.path.join(METRICS_DIR, "trace.json"))
+    finally:
+        if metrics:
+            instrumentation.disable()
     print("Automation pipeline executed successfully!")
 
 if __name__ == "__main__":
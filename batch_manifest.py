@@ -0,0 +1,248 @@
+"""
+batch_manifest.py
+
+This script keeps a manifest of the raw tweet batches in an SQLite file. For each
+raw file it records the size, modification time and content hash, and for each
+pipeline stage whether it is running, done or failed on that file. The pipeline
+uses it to process every new or changed batch (not only the newest one) and to
+resume a batch from its last completed stage after a crash. A file is re-hashed
+only when its size or modification time changes, and its stage records are reset
+only when its content actually changed.
+
+Author: Satej
+"""
+
+import os
+import sqlite3
+import time
+
+from pipeline_dag import hash_file
+from stage_io import FORMAT_EXTENSIONS
+from utils import list_files
+
+# Default location of the manifest database
+MANIFEST_PATH = "./processed_tweets/.manifest.db"
+
+# Raw batch files are named 'tweets_<timestamp>_<sequence>.<ext>' by data_collection.py
+RAW_FILE_PREFIX = "tweets_"
+
+MANIFEST_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS raw_files (
+        path TEXT PRIMARY KEY,
+        batch_id TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime REAL NOT NULL,
+        sha256 TEXT NOT NULL,
+        discovered_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS stage_runs (
+        path TEXT NOT NULL REFERENCES raw_files (path),
+        stage TEXT NOT NULL,
+        status TEXT NOT NULL CHECK (status IN ('running', 'done', 'failed')),
+        sha256 TEXT,
+        output_files TEXT,
+        started_at REAL,
+        finished_at REAL,
+        seconds REAL,
+        error TEXT,
+        PRIMARY KEY (path, stage)
+    );
+"""
+
+def batch_id_for(file_path):
+    """
+    Derives a batch's id (used to name its output files) from its raw file path.
+
+    Args:
+        file_path (str): Path to a raw batch file.
+
+    Returns:
+        str: File name without its extension.
+    """
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+class BatchManifest:
+    """
+    SQLite record of raw batch files and the pipeline stages completed on each.
+    """
+    def __init__(self, db_path=MANIFEST_PATH):
+        """
+        Args:
+            db_path (str): Path to the manifest database, created if missing.
+        """
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        with self.conn:
+            self.conn.executescript(MANIFEST_SCHEMA)
+
+    def scan(self, directory, prefix=RAW_FILE_PREFIX, extensions=tuple(FORMAT_EXTENSIONS.values())):
+        """
+        Registers new raw files and detects changed ones.
+
+        Hidden files, such as batches still being written to a '.tmp' file, are
+        ignored.
+
+        Args:
+            directory (str): Directory holding the raw batch files.
+            prefix (str): Only consider file names starting with this prefix.
+            extensions (tuple): File extensions of raw batch files.
+
+        Returns:
+            dict: Lists of 'new', 'changed' and 'unchanged' file paths.
+        """
+        known = {
+            path: (size, mtime, sha256)
+            for path, size, mtime, sha256 in self.conn.execute("SELECT path, size, mtime, sha256 FROM raw_files")
+        }
+        result = {"new": [], "changed": [], "unchanged": []}
+        now = time.time()
+        with self.conn:
+            for path in list_files(directory, extensions, prefix=prefix):
+                path = os.path.normpath(path)
+                stat = os.stat(path)
+                if path in known and known[path][:2] == (stat.st_size, stat.st_mtime):
+                    result["unchanged"].append(path)
+                    continue
+                sha256 = hash_file(path)
+                if path not in known:
+                    self.conn.execute(
+                        "INSERT INTO raw_files (path, batch_id, size, mtime, sha256, discovered_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (path, batch_id_for(path), stat.st_size, stat.st_mtime, sha256, now, now),
+                    )
+                    result["new"].append(path)
+                    continue
+                self.conn.execute(
+                    "UPDATE raw_files SET size = ?, mtime = ?, sha256 = ?, updated_at = ? WHERE path = ?",
+                    (stat.st_size, stat.st_mtime, sha256, now, path),
+                )
+                if sha256 == known[path][2]:
+                    # Touched but not modified: the completed stages are still valid
+                    result["unchanged"].append(path)
+                else:
+                    self.conn.execute("DELETE FROM stage_runs WHERE path = ?", (path,))
+                    result["changed"].append(path)
+        print(f"Manifest scan of {directory}: {len(result['new'])} new, {len(result['changed'])} changed, "
+              f"{len(result['unchanged'])} unchanged")
+        return result
+
+    def pending_batches(self, stages):
+        """
+        Lists the registered raw files that still need any of the given stages.
+
+        Files that no longer exist on disk are left out.
+
+        Args:
+            stages (list): Stage names a batch must have completed.
+
+        Returns:
+            list: Paths of the pending files, oldest batch first.
+        """
+        pending = []
+        for (path,) in self.conn.execute("SELECT path FROM raw_files ORDER BY batch_id"):
+            if os.path.exists(path) and not set(stages) <= self.completed_stages(path):
+                pending.append(path)
+        return pending
+
+    def completed_stages(self, path):
+        """
+        Returns the stages completed on a raw file since its content last changed.
+
+        Args:
+            path (str): Raw file path.
+
+        Returns:
+            set: Names of the stages with status 'done'.
+        """
+        rows = self.conn.execute(
+            "SELECT stage FROM stage_runs WHERE path = ? AND status = 'done'",
+            (os.path.normpath(path),),
+        )
+        return {stage for (stage,) in rows}
+
+    def start_stage(self, path, stage):
+        """
+        Records that a stage started on a raw file.
+
+        Args:
+            path (str): Raw file path.
+            stage (str): Stage name.
+        """
+        path = os.path.normpath(path)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO stage_runs (path, stage, status, sha256, started_at) "
+                "SELECT path, ?, 'running', sha256, ? FROM raw_files WHERE path = ?",
+                (stage, time.time(), path),
+            )
+
+    def finish_stage(self, path, stage, output_files=(), seconds=None):
+        """
+        Records that a stage completed on a raw file.
+
+        Args:
+            path (str): Raw file path.
+            stage (str): Stage name.
+            output_files (iterable): Files the stage wrote.
+            seconds (float, optional): Time the stage took.
+        """
+        path = os.path.normpath(path)
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO stage_runs (path, stage, status, sha256, output_files, started_at, finished_at, seconds) "
+                "SELECT path, ?, 'done', sha256, ?, ?, ?, ? FROM raw_files WHERE path = ? "
+                "ON CONFLICT (path, stage) DO UPDATE SET status = 'done', output_files = excluded.output_files, "
+                "finished_at = excluded.finished_at, seconds = excluded.seconds, error = NULL",
+                (stage, ";".join(output_files), now, now, seconds, path),
+            )
+
+    def fail_stage(self, path, stage, error):
+        """
+        Records that a stage failed on a raw file.
+
+        Args:
+            path (str): Raw file path.
+            stage (str): Stage name.
+            error (Exception or str): The error raised by the stage.
+        """
+        path = os.path.normpath(path)
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO stage_runs (path, stage, status, sha256, started_at, finished_at, error) "
+                "SELECT path, ?, 'failed', sha256, ?, ?, ? FROM raw_files WHERE path = ? "
+                "ON CONFLICT (path, stage) DO UPDATE SET status = 'failed', finished_at = excluded.finished_at, "
+                "error = excluded.error",
+                (stage, now, now, str(error), path),
+            )
+
+    def summary(self):
+        """
+        Counts the stage records by stage and status.
+
+        Returns:
+            dict: Number of registered files and a {stage: {status: count}} mapping.
+        """
+        report = {"files": self.conn.execute("SELECT COUNT(*) FROM raw_files").fetchone()[0], "stages": {}}
+        rows = self.conn.execute("SELECT stage, status, COUNT(*) FROM stage_runs GROUP BY stage, status")
+        for stage, status, count in rows:
+            report["stages"].setdefault(stage, {})[status] = count
+        return report
+
+    def close(self):
+        """
+        Closes the manifest database.
+        """
+        self.conn.close()
+
+if __name__ == "__main__":
+    # Example usage: register the raw batches and show what has been processed
+    manifest = BatchManifest()
+    manifest.scan("./raw_tweets/")
+    print(manifest.summary())
+    manifest.close()
@@ -0,0 +1,347 @@
+"""
+benchmark_suite.py
+
+This script benchmarks the pipeline stages on a seeded synthetic corpus and checks
+the results against a stored baseline. For each stage (text cleaning, sentiment
+analysis, trending topics, database storage) and for the whole batch pipeline it
+measures throughput, p50/p99 per-row latency and peak memory (RSS). Every stage runs
+in a fresh process so its peak memory is its own. A run fails when a metric is worse
+than the baseline by more than the allowed tolerance.
+
+Usage:
+    python benchmark_suite.py --size 10k
+    python benchmark_suite.py --size 1m --stages clean_text analyze_sentiment
+    python benchmark_suite.py --size 10k --update-baseline
+
+Author: Satej
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from synthetic_corpus import CORPUS_SIZES, write_corpus
+
+BENCHMARK_DIR = "./benchmarks/"
+BASELINE_FILE = "./benchmarks/baseline.json"
+
+# Stages benchmarked, in pipeline order
+STAGES = ["clean_text", "analyze_sentiment", "extract_trending_topics", "store_data_to_db", "pipeline"]
+
+# Rows per timed call; per-row latency is each call's time divided by its rows
+LATENCY_CHUNK = 1000
+
+# Number of raw batch files the pipeline benchmark splits the corpus into
+PIPELINE_BATCHES = 5
+
+# Allowed relative regression per metric before a run fails
+DEFAULT_TOLERANCES = {
+    "throughput": 0.20,
+    "p50_latency_us": 0.30,
+    "p99_latency_us": 0.50,
+    "peak_rss_mb": 0.20,
+}
+
+# Metrics where a higher value is better
+HIGHER_IS_BETTER = {"throughput"}
+
+def _peak_rss_mb():
+    """
+    Returns the peak resident set size of the current process in MB, if available.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _prepare_input(stage, data):
+    """
+    Builds a stage's input from the raw corpus, outside the timed section.
+    """
+    from data_preprocessing import clean_text_batch
+
+    if stage in ("analyze_sentiment", "extract_trending_topics", "store_data_to_db"):
+        data = data.assign(cleaned_text=clean_text_batch(data["text"]))
+    if stage == "store_data_to_db":
+        rng = np.random.default_rng(0)
+        data = data.assign(sentiment=rng.choice(["positive", "neutral", "negative"], size=len(data)))
+    return data
+
+def _stage_chunks(stage, data, work_dir):
+    """
+    Yields (rows, callable) pairs, one per timed call of the stage.
+    """
+    if stage == "pipeline":
+        import automation_pipeline
+        from stage_io import write_frame
+
+        os.makedirs(automation_pipeline.RAW_TWEETS_DIR, exist_ok=True)
+        # Stage modules, scikit-learn, matplotlib and the VADER lexicon are loaded on
+        # first use; pay for that in an untimed warm-up batch
+        warmup_file = os.path.join(automation_pipeline.RAW_TWEETS_DIR, "tweets_warmup.csv")
+        write_frame(data.iloc[:LATENCY_CHUNK // 10], warmup_file)
+        automation_pipeline.process_raw_batch(warmup_file, store=False)
+        for i, batch in enumerate(np.array_split(np.arange(len(data)), PIPELINE_BATCHES)):
+            raw_file = os.path.join(automation_pipeline.RAW_TWEETS_DIR, f"tweets_benchmark_{i:03d}.csv")
+            write_frame(data.iloc[batch], raw_file)
+            yield len(batch), lambda raw_file=raw_file: automation_pipeline.process_raw_batch(raw_file)
+        return
+
+    if stage == "store_data_to_db":
+        from data_storage import TweetStore, create_database, store_data_to_db
+
+        db_path = os.path.join(work_dir, "benchmark.db")
+        create_database(db_path)
+        store = TweetStore(db_path)
+    for start in range(0, len(data), LATENCY_CHUNK):
+        chunk = data.iloc[start:start + LATENCY_CHUNK]
+        if stage == "clean_text":
+            from data_preprocessing import preprocess_data
+            yield len(chunk), lambda chunk=chunk: preprocess_data(chunk)
+        elif stage == "analyze_sentiment":
+            from sentiment_analysis import perform_sentiment_analysis
+            yield len(chunk), lambda chunk=chunk: perform_sentiment_analysis(chunk)
+        elif stage == "extract_trending_topics":
+            from trending_topics import extract_trending_topics
+            yield len(chunk), lambda chunk=chunk: extract_trending_topics(chunk["cleaned_text"].fillna(""))
+        elif stage == "store_data_to_db":
+            yield len(chunk), lambda chunk=chunk: store_data_to_db(chunk, store=store)
+        else:
+            raise ValueError(f"Unknown benchmark stage: {stage}")
+    if stage == "store_data_to_db":
+        store.close()
+
+def _run_stage_benchmark(stage, corpus_file, work_dir):
+    """
+    Benchmarks one stage. Runs in a fresh worker process.
+
+    Args:
+        stage (str): Stage name from STAGES.
+        corpus_file (str): Synthetic corpus file.
+        work_dir (str): Directory for the stage's output files and database.
+
+    Returns:
+        dict: Rows, seconds, throughput, p50/p99 per-row latency and peak RSS.
+    """
+    # The stage modules are imported after the chdir below
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from stage_io import read_frame
+
+    corpus_file = os.path.abspath(corpus_file)
+    # Start from an empty work directory, so storage inserts rather than updates
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+    os.chdir(work_dir)
+    data = _prepare_input(stage, read_frame(corpus_file))
+    # NLTK data is loaded on first use; load it here so the one-off cost (measured
+    # by --startup) does not land in the first timed chunk
+    from nltk_resources import get_stopwords, get_word_tokenize
+    get_stopwords()
+    get_word_tokenize()
+
+    per_row = []
+    rows = 0
+    seconds = 0.0
+    # The stages print progress messages; keep them out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        for chunk_rows, call in _stage_chunks(stage, data, os.getcwd()):
+            start = time.perf_counter()
+            call()
+            elapsed = time.perf_counter() - start
+            rows += chunk_rows
+            seconds += elapsed
+            per_row.append(elapsed / chunk_rows)
+
+    per_row_us = np.array(per_row) * 1e6
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "throughput": rows / seconds if seconds else float("inf"),
+        "p50_latency_us": float(np.percentile(per_row_us, 50)),
+        "p99_latency_us": float(np.percentile(per_row_us, 99)),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+def run_benchmarks(size="10k", seed=0, stages=None, benchmark_dir=BENCHMARK_DIR):
+    """
+    Runs the benchmark suite.
+
+    Args:
+        size (str): Corpus size name from CORPUS_SIZES, e.g. '10k', '1m' or '10m'.
+        seed (int): Corpus random seed.
+        stages (list, optional): Stages to run. Defaults to all of STAGES.
+        benchmark_dir (str): Directory for the corpus and the stages' work files.
+
+    Returns:
+        dict: Stage name to metrics.
+    """
+    corpus_file = os.path.join(benchmark_dir, f"corpus_{size}_seed{seed}.csv")
+    if not os.path.exists(corpus_file):
+        write_corpus(corpus_file, CORPUS_SIZES[size], seed)
+
+    results = {}
+    for stage in stages or STAGES:
+        work_dir = os.path.abspath(os.path.join(benchmark_dir, f"work_{size}", stage))
+        # A fresh spawned process per stage keeps peak RSS and imports independent
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            results[stage] = executor.submit(_run_stage_benchmark, stage, corpus_file, work_dir).result()
+        metrics = results[stage]
+        print(f"{stage:<25}{metrics['throughput']:>12.0f} rows/s  p50 {metrics['p50_latency_us']:>9.1f}us  "
+              f"p99 {metrics['p99_latency_us']:>9.1f}us  peak RSS {metrics['peak_rss_mb'] or 0:>8.1f}MB")
+    return results
+
+def benchmark_startup(module="automation_pipeline", runs=5):
+    """
+    Measures how long importing a module takes in a fresh interpreter.
+
+    Each run starts 'python -X importtime -c "import <module>"' and reads the
+    module's cumulative import time from the report, so only the import itself is
+    measured, not interpreter start-up.
+
+    Args:
+        module (str): Module to import.
+        runs (int): Number of fresh interpreters; the median is reported.
+
+    Returns:
+        dict: Median import seconds and the slowest top-level imports of the last run.
+    """
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    for _ in range(runs):
+        report = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                cwd=repo_dir, capture_output=True, text=True, check=True).stderr
+        entries = []
+        for line in report.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            # Nested imports are indented by two spaces per level
+            name = name[1:].rstrip()
+            entries.append((name, len(name) - len(name.lstrip()), int(cumulative)))
+        timings.append(next(cumulative for name, depth, cumulative in entries if name == module) / 1e6)
+    direct = sorted((entry for entry in entries if entry[1] == 2), key=lambda entry: -entry[2])[:5]
+    result = {
+        "module": module,
+        "import_seconds": float(np.median(timings)),
+        "slowest_imports": {name.strip(): cumulative / 1e6 for name, _, cumulative in direct},
+    }
+    print(f"import {module}: {result['import_seconds']:.3f}s (median of {runs}); "
+          f"slowest: {result['slowest_imports']}")
+    return result
+
+def load_baseline(baseline_file=BASELINE_FILE):
+    """
+    Loads the stored baseline metrics.
+
+    Args:
+        baseline_file (str): Path to the baseline JSON file.
+
+    Returns:
+        dict: Corpus size name to stage metrics; empty if there is no baseline.
+    """
+    if not os.path.exists(baseline_file):
+        return {}
+    with open(baseline_file) as f:
+        return json.load(f)
+
+def save_baseline(results, size, baseline_file=BASELINE_FILE):
+    """
+    Stores results as the baseline for a corpus size, keeping the other sizes.
+
+    Args:
+        results (dict): Stage metrics from run_benchmarks.
+        size (str): Corpus size name.
+        baseline_file (str): Path to the baseline JSON file.
+    """
+    baseline = load_baseline(baseline_file)
+    baseline.setdefault(size, {}).update(results)
+    directory = os.path.dirname(baseline_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(baseline_file, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    print(f"Baseline for {size} saved to {baseline_file}")
+
+def compare_to_baseline(results, baseline, tolerances=None):
+    """
+    Finds metrics that regressed beyond their tolerance.
+
+    Args:
+        results (dict): Stage metrics from run_benchmarks.
+        baseline (dict): Baseline stage metrics for the same corpus size.
+        tolerances (dict, optional): Allowed relative regression per metric.
+            Defaults to DEFAULT_TOLERANCES.
+
+    Returns:
+        list: Description of each regression; empty if none.
+    """
+    tolerances = {**DEFAULT_TOLERANCES, **(tolerances or {})}
+    regressions = []
+    for stage, metrics in results.items():
+        for metric, tolerance in tolerances.items():
+            expected = baseline.get(stage, {}).get(metric)
+            actual = metrics.get(metric)
+            if expected is None or actual is None:
+                continue
+            if metric in HIGHER_IS_BETTER:
+                regressed = actual < expected * (1 - tolerance)
+            else:
+                regressed = actual > expected * (1 + tolerance)
+            if regressed:
+                regressions.append(f"{stage}.{metric}: {actual:.2f} vs baseline {expected:.2f} "
+                                   f"(tolerance {tolerance:.0%})")
+    return regressions
+
+def main():
+    """
+    Command-line entry point. Exits with status 1 if any metric regressed.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on a synthetic corpus.")
+    parser.add_argument("--size", choices=sorted(CORPUS_SIZES), default="10k")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=None)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="Override the allowed relative regression for every metric.")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store this run as the new baseline instead of checking it.")
+    parser.add_argument("--startup", action="store_true",
+                        help="Only measure the import time of automation_pipeline.")
+    args = parser.parse_args()
+
+    if args.startup:
+        benchmark_startup()
+        return
+
+    results = run_benchmarks(args.size, args.seed, args.stages)
+    if args.update_baseline:
+        save_baseline(results, args.size, args.baseline)
+        return
+
+    baseline = load_baseline(args.baseline).get(args.size)
+    if not baseline:
+        print(f"No baseline for {args.size} in {args.baseline}; run with --update-baseline to create one.")
+        return
+    tolerances = {metric: args.tolerance for metric in DEFAULT_TOLERANCES} if args.tolerance is not None else None
+    regressions = compare_to_baseline(results, baseline, tolerances)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("All metrics within tolerance of the baseline.")
+
+if __name__ == "__main__":
+    main()
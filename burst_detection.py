@@ -0,0 +1,326 @@
+"""
+burst_detection.py
+
+This script detects emerging (bursting) terms and hashtags in the tweet stream.
+Term frequencies for the current time bucket are tracked with a Count-Min sketch,
+the bucket's heaviest hitters are tracked with Space-Saving top-k, and each term is
+compared against its own historical baseline, an exponentially weighted moving
+average (EWMA) kept in a sketch of the same shape. A term that is always popular has
+a high baseline and does not burst; a term that suddenly spikes does. All state has
+a fixed size, independent of vocabulary size.
+
+Author: Satej
+"""
+
+import hashlib
+import heapq
+import re
+
+import numpy as np
+import pandas as pd
+
+# Width of a time bucket, in seconds
+DEFAULT_BUCKET_SECONDS = 5 * 60
+
+# Count-Min sketch dimensions (error ~ e/width, failure probability ~ e^-depth)
+DEFAULT_SKETCH_WIDTH = 2 ** 14
+DEFAULT_SKETCH_DEPTH = 4
+
+# Number of heavy hitters tracked per bucket
+DEFAULT_TOP_K = 200
+
+# EWMA smoothing factor for the per-term baseline
+DEFAULT_ALPHA = 0.2
+
+HASHTAG_PATTERN = re.compile(r"#\w+")
+
+# Large Mersenne prime used for the pairwise-independent row hashes
+_PRIME = (1 << 61) - 1
+
+class CountMinSketch:
+    """
+    Fixed-size frequency sketch that never underestimates counts.
+    """
+    def __init__(self, width=DEFAULT_SKETCH_WIDTH, depth=DEFAULT_SKETCH_DEPTH, seed=0):
+        """
+        Args:
+            width (int): Number of counters per row.
+            depth (int): Number of rows (independent hash functions).
+            seed (int): Seed for the row hash parameters.
+        """
+        self.width = width
+        self.depth = depth
+        rng = np.random.default_rng(seed)
+        self.hash_a = [int(a) for a in rng.integers(1, _PRIME, size=depth, dtype=np.int64)]
+        self.hash_b = [int(b) for b in rng.integers(0, _PRIME, size=depth, dtype=np.int64)]
+        self.table = np.zeros((depth, width), dtype=np.float64)
+        self.rows = np.arange(depth)
+
+    def indexes(self, item):
+        """
+        Returns the counter index of an item in each row.
+
+        Args:
+            item (str): Item to hash.
+
+        Returns:
+            np.ndarray: One column index per row.
+        """
+        base = int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "little")
+        return np.array([((a * base + b) % _PRIME) % self.width for a, b in zip(self.hash_a, self.hash_b)])
+
+    def add(self, item, count=1):
+        """
+        Adds occurrences of an item.
+
+        Args:
+            item (str): Item to count.
+            count (int): Number of occurrences.
+        """
+        self.table[self.rows, self.indexes(item)] += count
+
+    def estimate(self, item, table=None):
+        """
+        Estimates an item's count.
+
+        Args:
+            item (str): Item to look up.
+            table (np.ndarray, optional): Table of the same shape to read instead of
+                this sketch's own counters (used for the EWMA baseline).
+
+        Returns:
+            float: Estimated count.
+        """
+        table = self.table if table is None else table
+        return float(table[self.rows, self.indexes(item)].min())
+
+    def clear(self):
+        """
+        Resets all counters to zero.
+        """
+        self.table.fill(0)
+
+class SpaceSaving:
+    """
+    Space-Saving top-k heavy-hitter tracker with a fixed number of slots.
+
+    The smallest tracked item is found with a min-heap of (count, item) entries.
+    Every count change pushes a new entry instead of updating the old one; entries
+    whose count no longer matches are discarded when they reach the top, and the
+    heap is rebuilt from the counts once stale entries outnumber the live ones.
+    """
+    def __init__(self, k=DEFAULT_TOP_K):
+        """
+        Args:
+            k (int): Number of items tracked.
+        """
+        self.k = k
+        self.counts = {}
+        self.heap = []
+
+    def add(self, item, count=1):
+        """
+        Counts occurrences of an item, replacing the smallest tracked item when full.
+
+        Args:
+            item (str): Item to count.
+            count (int): Number of occurrences.
+        """
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.k:
+            self.counts[item] = count
+        else:
+            self.counts[item] = self.counts.pop(self._pop_smallest()) + count
+        heapq.heappush(self.heap, (self.counts[item], item))
+        if len(self.heap) > 2 * self.k:
+            self.heap = [(tracked, name) for name, tracked in self.counts.items()]
+            heapq.heapify(self.heap)
+
+    def _pop_smallest(self):
+        """
+        Removes stale heap entries until the top one is a tracked item's current count.
+
+        Returns:
+            str: The tracked item with the smallest count.
+        """
+        while True:
+            tracked, item = heapq.heappop(self.heap)
+            if self.counts.get(item) == tracked:
+                return item
+
+    def top(self, n=None):
+        """
+        Returns tracked items ordered by count, highest first.
+
+        Args:
+            n (int, optional): Number of items to return. Defaults to all.
+
+        Returns:
+            list: (item, count) tuples.
+        """
+        ranked = sorted(self.counts.items(), key=lambda pair: pair[1], reverse=True)
+        return ranked if n is None else ranked[:n]
+
+    def clear(self):
+        """
+        Forgets all tracked items.
+        """
+        self.counts = {}
+        self.heap = []
+
+class BurstDetector:
+    """
+    Emits terms whose frequency in a time bucket spikes above their own baseline.
+    """
+    def __init__(self, bucket_seconds=DEFAULT_BUCKET_SECONDS, width=DEFAULT_SKETCH_WIDTH,
+                 depth=DEFAULT_SKETCH_DEPTH, top_k=DEFAULT_TOP_K, alpha=DEFAULT_ALPHA,
+                 min_count=5, min_ratio=3.0, min_zscore=3.0, warmup_buckets=3, seed=0):
+        """
+        Args:
+            bucket_seconds (int): Width of a time bucket in seconds.
+            width (int): Count-Min sketch width.
+            depth (int): Count-Min sketch depth.
+            top_k (int): Number of heavy hitters tracked per bucket.
+            alpha (float): EWMA smoothing factor for the baseline.
+            min_count (int): Minimum count in the bucket for a term to be emitted.
+            min_ratio (float): Minimum (count + 1) / (baseline + 1) ratio.
+            min_zscore (float): Minimum z-score of the count against the baseline.
+            warmup_buckets (int): Number of buckets used to build the baseline before
+                anything is emitted.
+            seed (int): Seed for the sketch hash functions.
+        """
+        self.bucket_seconds = bucket_seconds
+        self.alpha = alpha
+        self.min_count = min_count
+        self.min_ratio = min_ratio
+        self.min_zscore = min_zscore
+        self.warmup_buckets = warmup_buckets
+        self.sketch = CountMinSketch(width, depth, seed)
+        self.heavy_hitters = SpaceSaving(top_k)
+        self.baseline_mean = np.zeros((depth, width), dtype=np.float64)
+        self.baseline_sq = np.zeros((depth, width), dtype=np.float64)
+        self.bucket_start = None
+        self.buckets_seen = 0
+        self.emerging = []
+
+    def _terms(self, cleaned_text, raw_text=None):
+        terms = str(cleaned_text).split()
+        if raw_text is not None and isinstance(raw_text, str):
+            terms += [tag.lower() for tag in HASHTAG_PATTERN.findall(raw_text)]
+        return terms
+
+    def _close_bucket(self):
+        """
+        Scores the current bucket's heavy hitters against the baseline, then folds
+        the bucket into the baseline and resets it.
+
+        Returns:
+            list: Emerging topics found in the closed bucket.
+        """
+        emerging = []
+        if self.buckets_seen >= self.warmup_buckets:
+            for term, _ in self.heavy_hitters.top():
+                count = self.sketch.estimate(term)
+                mean = self.sketch.estimate(term, self.baseline_mean)
+                mean_sq = self.sketch.estimate(term, self.baseline_sq)
+                std = float(np.sqrt(max(mean_sq - mean ** 2, 0.0) + mean + 1.0))
+                ratio = (count + 1.0) / (mean + 1.0)
+                zscore = (count - mean) / std
+                if count >= self.min_count and ratio >= self.min_ratio and zscore >= self.min_zscore:
+                    emerging.append({
+                        "bucket_start": pd.Timestamp(self.bucket_start, unit="s", tz="UTC"),
+                        "term": term,
+                        "count": count,
+                        "baseline": mean,
+                        "ratio": ratio,
+                        "zscore": zscore,
+                    })
+        emerging.sort(key=lambda topic: topic["zscore"], reverse=True)
+
+        table = self.sketch.table
+        self.baseline_mean = self.alpha * table + (1 - self.alpha) * self.baseline_mean
+        self.baseline_sq = self.alpha * table ** 2 + (1 - self.alpha) * self.baseline_sq
+        self.buckets_seen += 1
+        self.sketch.clear()
+        self.heavy_hitters.clear()
+        return emerging
+
+    def _advance_to(self, bucket_start):
+        """
+        Closes the current bucket and decays the baseline over any empty buckets.
+        """
+        emerging = self._close_bucket()
+        empty_buckets = (bucket_start - self.bucket_start) // self.bucket_seconds - 1
+        if empty_buckets > 0:
+            decay = (1 - self.alpha) ** empty_buckets
+            self.baseline_mean *= decay
+            self.baseline_sq *= decay
+            self.buckets_seen += empty_buckets
+        self.bucket_start = bucket_start
+        return emerging
+
+    def ingest(self, cleaned_texts, timestamps, raw_texts=None):
+        """
+        Counts a batch of tweets, closing buckets as time moves forward.
+
+        Tweets older than the current bucket are counted in the current bucket.
+
+        Args:
+            cleaned_texts (iterable): Cleaned tweet texts.
+            timestamps (iterable): Tweet creation times.
+            raw_texts (iterable, optional): Raw tweet texts, used to track hashtags.
+
+        Returns:
+            list: Emerging topics from every bucket closed by this batch.
+        """
+        cleaned_texts = list(cleaned_texts)
+        times = pd.to_datetime(pd.Series(list(timestamps), dtype=object), utc=True)
+        epochs = ((times - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).tolist()
+        raw_texts = list(raw_texts) if raw_texts is not None else [None] * len(cleaned_texts)
+
+        emerging = []
+        for cleaned_text, raw_text, epoch in zip(cleaned_texts, raw_texts, epochs):
+            bucket_start = epoch - epoch % self.bucket_seconds
+            if self.bucket_start is None:
+                self.bucket_start = bucket_start
+            elif bucket_start > self.bucket_start:
+                emerging.extend(self._advance_to(bucket_start))
+            for term in self._terms(cleaned_text, raw_text):
+                self.sketch.add(term)
+                self.heavy_hitters.add(term)
+
+        if emerging:
+            self.emerging = emerging
+        return emerging
+
+    def ingest_frame(self, data, text_column="cleaned_text", time_column="created_at", raw_column="text"):
+        """
+        Counts a DataFrame of cleaned tweets.
+
+        Args:
+            data (pd.DataFrame): Tweet data.
+            text_column (str): Column holding cleaned text.
+            time_column (str): Column holding creation timestamps.
+            raw_column (str): Column holding raw text, used for hashtags if present.
+
+        Returns:
+            list: Emerging topics from every bucket closed by this batch.
+        """
+        raw_texts = data[raw_column].tolist() if raw_column in data.columns else None
+        return self.ingest(data[text_column].fillna("").tolist(), data[time_column].tolist(), raw_texts)
+
+    def flush(self):
+        """
+        Closes the current bucket without waiting for a later tweet.
+
+        Returns:
+            list: Emerging topics from the closed bucket.
+        """
+        if self.bucket_start is None:
+            return []
+        emerging = self._close_bucket()
+        self.bucket_start += self.bucket_seconds
+        if emerging:
+            self.emerging = emerging
+        return emerging
@@ -27,8 +27,11 @@ DEFAULT_KEYWORDS = ["#AI", "#MachineLearning", "#DataScience"]
 # Visualization settings
 TRENDING_TOPICS_IMAGE = "./visualizations/trending_topics.png"
 
-# Ensure directories exist
 import os
-os.makedirs(RAW_TWEETS_DIR, exist_ok=True)
-os.makedirs(PROCESSED_TWEETS_DIR, exist_ok=True)
-os.makedirs(VISUALIZATION_DIR, exist_ok=True)
+
+def ensure_directories():
+    """
+    Creates the data directories if they do not exist yet.
+    """
+    for directory in (RAW_TWEETS_DIR, PROCESSED_TWEETS_DIR, VISUALIZATION_DIR):
+        os.makedirs(directory, exist_ok=True)
@@ -0,0 +1,233 @@
+"""
+dashboard_renderer.py
+
+This script renders the dashboard charts headlessly, for cron and batch runs. It
+computes the small aggregate behind each chart (sentiment counts, daily volume, top
+locations and, optionally, trending topics) from the database rollup tables or from
+a results file, and caches every chart's PNG under a hash of its aggregate. Charts
+whose data has not changed are skipped; the others are rendered in parallel worker
+processes with matplotlib's non-interactive Agg backend. matplotlib and seaborn are
+only imported inside the workers that draw.
+
+Usage:
+    python dashboard_renderer.py --source db
+    python dashboard_renderer.py --source file --input ./processed_tweets/sentiment_results.csv
+
+Author: Satej
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+OUTPUT_DIR = "./visualizations/"
+CACHE_DIR = "./visualizations/.render_cache/"
+
+# Bump when chart styling changes, so cached images are re-rendered
+RENDER_VERSION = 1
+
+# Number of locations shown in the geographic chart
+TOP_LOCATIONS = 10
+
+def aggregates_from_frame(data, trending_topics=None):
+    """
+    Computes the chart aggregates from a sentiment results DataFrame.
+
+    Args:
+        data (pd.DataFrame): Sentiment analysis results.
+        trending_topics (dict, optional): Keywords and scores to chart.
+
+    Returns:
+        dict: Chart name to aggregate Series.
+    """
+    created_at = pd.to_datetime(data["created_at"], errors="coerce")
+    # Categorical value_counts also lists categories with no tweets in this data
+    top_locations = data["location"].value_counts()
+    aggregates = {
+        "sentiment_distribution": data["sentiment"].value_counts().sort_index(),
+        "tweet_volume": created_at.dt.strftime("%Y-%m-%d").value_counts().sort_index(),
+        "top_locations": top_locations[top_locations > 0].head(TOP_LOCATIONS),
+    }
+    if trending_topics:
+        aggregates["trending_topics"] = pd.Series(trending_topics, dtype=float)
+    return aggregates
+
+def aggregates_from_database(db_path=None, trending_topics=None):
+    """
+    Reads the chart aggregates from the database rollup tables.
+
+    Args:
+        db_path (str, optional): Path to the database file.
+        trending_topics (dict, optional): Keywords and scores to chart.
+
+    Returns:
+        dict: Chart name to aggregate Series.
+    """
+    from tweet_queries import TweetQueries
+
+    with TweetQueries(db_path) as queries:
+        aggregates = {
+            "sentiment_distribution": queries.sentiment_totals().sort_index(),
+            "tweet_volume": queries.volume_by_day(),
+            "top_locations": queries.top_locations(TOP_LOCATIONS),
+        }
+    if trending_topics:
+        aggregates["trending_topics"] = pd.Series(trending_topics, dtype=float)
+    return aggregates
+
+def aggregate_hash(name, aggregate):
+    """
+    Computes the content hash identifying a chart's rendered image.
+
+    Args:
+        name (str): Chart name.
+        aggregate (pd.Series): Data drawn in the chart.
+
+    Returns:
+        str: Hex digest.
+    """
+    payload = json.dumps({
+        "chart": name,
+        "version": RENDER_VERSION,
+        "index": [str(label) for label in aggregate.index],
+        "values": [float(value) for value in aggregate.values],
+    })
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def _render_chart(name, aggregate, image_path):
+    """
+    Draws one chart to a PNG file. Runs in a worker process.
+
+    Args:
+        name (str): Chart name.
+        aggregate (pd.Series): Data to draw.
+        image_path (str): Destination PNG path.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    if name == "sentiment_distribution":
+        plt.figure(figsize=(8, 6))
+        sns.barplot(x=aggregate.index, y=aggregate.values, palette="viridis")
+        plt.title("Sentiment Distribution", fontsize=16)
+        plt.xlabel("Sentiment", fontsize=12)
+        plt.ylabel("Tweet Count", fontsize=12)
+    elif name == "tweet_volume":
+        plt.figure(figsize=(10, 6))
+        aggregate.plot(kind="line", marker="o", color="blue")
+        plt.title("Tweet Volume Over Time", fontsize=16)
+        plt.xlabel("Date", fontsize=12)
+        plt.ylabel("Number of Tweets", fontsize=12)
+        plt.grid()
+    elif name == "top_locations":
+        plt.figure(figsize=(10, 6))
+        sns.barplot(y=aggregate.index, x=aggregate.values, palette="magma")
+        plt.title("Top 10 Tweet Locations", fontsize=16)
+        plt.xlabel("Tweet Count", fontsize=12)
+        plt.ylabel("Location", fontsize=12)
+    elif name == "trending_topics":
+        plt.figure(figsize=(10, 6))
+        plt.barh(list(aggregate.index), list(aggregate.values), color="skyblue")
+        plt.xlabel("TF-IDF Score")
+        plt.ylabel("Keywords")
+        plt.title("Trending Topics")
+        plt.gca().invert_yaxis()
+    else:
+        raise ValueError(f"Unknown chart: {name}")
+    plt.tight_layout()
+    # Written to a temporary file and renamed into place, so a killed worker never
+    # leaves a truncated PNG under a cache name that later runs would trust
+    temp_path = _temp_path(image_path)
+    try:
+        plt.savefig(temp_path, format="png")
+        os.replace(temp_path, image_path)
+    finally:
+        plt.close("all")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return image_path
+
+def _temp_path(path):
+    """
+    Creates an empty hidden temporary file next to path and returns its name.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".render_", suffix=".tmp")
+    os.close(fd)
+    return temp_path
+
+def render_dashboard(aggregates, output_dir=OUTPUT_DIR, cache_dir=CACHE_DIR, workers=None):
+    """
+    Renders the dashboard charts, skipping those whose aggregate is unchanged.
+
+    Args:
+        aggregates (dict): Chart name to aggregate Series.
+        output_dir (str): Directory for the published '<chart>.png' files.
+        cache_dir (str): Directory for the content-addressed images.
+        workers (int, optional): Number of render processes. Defaults to one per
+            changed chart.
+
+    Returns:
+        dict: Chart name to 'cached' or 'rendered'.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    status = {}
+    pending = {}
+    for name, aggregate in aggregates.items():
+        cached_path = os.path.join(cache_dir, f"{name}_{aggregate_hash(name, aggregate)}.png")
+        if os.path.exists(cached_path):
+            status[name] = "cached"
+        else:
+            pending[name] = (aggregate, cached_path)
+            status[name] = "rendered"
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers or len(pending)) as executor:
+            futures = [executor.submit(_render_chart, name, aggregate, path)
+                       for name, (aggregate, path) in pending.items()]
+            for future in futures:
+                future.result()
+
+    for name, aggregate in aggregates.items():
+        cached_path = os.path.join(cache_dir, f"{name}_{aggregate_hash(name, aggregate)}.png")
+        published_path = os.path.join(output_dir, f"{name}.png")
+        temp_path = _temp_path(published_path)
+        shutil.copyfile(cached_path, temp_path)
+        os.replace(temp_path, published_path)
+
+    print(f"Dashboard rendered to {output_dir}: {status}")
+    return status
+
+def main():
+    """
+    Command-line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Render the analytics dashboard charts headlessly.")
+    parser.add_argument("--source", choices=["db", "file"], default="db",
+                        help="Read aggregates from the database rollups or from a results file.")
+    parser.add_argument("--input", default="./processed_tweets/sentiment_results.csv",
+                        help="Sentiment results file, when --source file.")
+    parser.add_argument("--db-path", default=None, help="Database file, when --source db.")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.source == "db":
+        aggregates = aggregates_from_database(args.db_path)
+    else:
+        from stage_io import read_frame
+        aggregates = aggregates_from_frame(read_frame(args.input))
+    render_dashboard(aggregates, args.output_dir, args.cache_dir, args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,19 @@ Author: Satej
 """
 
 import tweepy
+import numpy as np
 import pandas as pd
 import os
-from datetime import datetime
+import json
+import queue
+import tempfile
+import threading
+import time
+import tracemalloc
+from array import array
+from datetime import datetime, timedelta, timezone
+from instrumentation import increment, set_gauge
+from stage_io import FORMAT_EXTENSIONS, write_frame
 
 # Configuration: Replace with your Twitter API credentials
 API_KEY = "your_api_key"
@@ -21,7 +31,102 @@ ACCESS_TOKEN_SECRET = "your_access_token_secret"
 
 # Set up output directory for storing raw tweet data
 OUTPUT_DIR = "./raw_tweets/"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+# Batch rotation and writer queue settings
+MAX_TWEETS_PER_FILE = 1000
+MAX_SECONDS_PER_FILE = 300
+# How often a quiet stream's partial batch is checked for age-based rotation
+ROTATION_CHECK_SECONDS = 5
+MAX_QUEUED_BATCHES = 16
+
+# Reference points for converting tweet timestamps to epoch microseconds
+EPOCH = datetime(1970, 1, 1)
+EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+# Epoch value stored for a missing timestamp; it is NumPy's NaT
+MISSING_TIMESTAMP = np.iinfo(np.int64).min
+
+# Timestamp format of the 'created_at' field in tweet JSON
+TWITTER_TIME_FORMAT = "%a %b %d %H:%M:%S +0000 %Y"
+
+class TweetBuffer:
+    """
+    Column-oriented buffer for the tweets of one batch.
+
+    Ids and timestamps (epoch microseconds) are kept in typed int64 arrays, and the
+    user and location strings are dictionary-encoded: each distinct value is
+    stored once and rows hold an int32 code. Only the tweet text stays a list of
+    Python strings. to_frame() hands the columns to pandas without copying the
+    arrays, with user and location as categorical columns.
+    """
+    __slots__ = ("ids", "timestamps", "texts", "user_codes", "users", "_user_index",
+                 "location_codes", "locations", "_location_index")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.timestamps = array("q")
+        self.texts = []
+        self.user_codes = array("i")
+        self.users = []
+        self._user_index = {}
+        self.location_codes = array("i")
+        self.locations = []
+        self._location_index = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def _encode(value, index, values):
+        if value is None:
+            return -1
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(values)
+            values.append(value)
+        return code
+
+    def append(self, tweet_id, created_at, text, user, location):
+        """
+        Adds one tweet to the buffer.
+
+        Args:
+            tweet_id (int): Tweet id.
+            created_at (datetime): Creation time; naive values are taken as UTC.
+            text (str): Tweet text.
+            user (str): Screen name of the author.
+            location (str): Location from the author's profile, or None.
+        """
+        if created_at is None:
+            timestamp = MISSING_TIMESTAMP
+        elif created_at.tzinfo is None:
+            timestamp = (created_at - EPOCH) // ONE_MICROSECOND
+        else:
+            timestamp = (created_at - EPOCH_UTC) // ONE_MICROSECOND
+        self.ids.append(tweet_id)
+        self.timestamps.append(timestamp)
+        self.texts.append(text)
+        self.user_codes.append(self._encode(user, self._user_index, self.users))
+        self.location_codes.append(self._encode(location, self._location_index, self.locations))
+
+    def to_frame(self):
+        """
+        Returns the batch as a DataFrame with columns id, created_at, text, user and
+        location. The id and timestamp columns are views of the buffer's arrays, so
+        the buffer must not be appended to afterwards.
+
+        Returns:
+            pd.DataFrame: Tweets of the batch.
+        """
+        return pd.DataFrame({
+            "id": np.frombuffer(self.ids, dtype=np.int64),
+            "created_at": np.frombuffer(self.timestamps, dtype=np.int64).view("datetime64[us]"),
+            "text": self.texts,
+            "user": pd.Categorical.from_codes(np.frombuffer(self.user_codes, dtype=np.int32), self.users),
+            "location": pd.Categorical.from_codes(np.frombuffer(self.location_codes, dtype=np.int32),
+                                                  self.locations),
+        }, copy=False)
 
 def authenticate_twitter_api():
     """
@@ -36,15 +141,150 @@ def authenticate_twitter_api():
     print("Twitter API authentication successful.")
     return api
 
+class BatchWriter:
+    """
+    Background thread that drains a bounded queue of tweet batches and writes each
+    batch to its own file (CSV, Parquet or Feather), so the streaming thread never waits on disk I/O unless
+    the queue is full.
+    """
+    def __init__(self, output_dir=OUTPUT_DIR, max_queued_batches=MAX_QUEUED_BATCHES, file_format="csv"):
+        """
+        Args:
+            output_dir (str): Directory for the batch files.
+            max_queued_batches (int): Number of batches that may wait in memory before
+                the streaming thread is blocked (backpressure).
+            file_format (str): Batch file format: 'csv', 'parquet' or 'feather'.
+        """
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self.file_format = file_format
+        self.queue = queue.Queue(maxsize=max_queued_batches)
+        self.sequence = 0
+        self.metrics = {
+            "batches_queued": 0,
+            "batches_written": 0,
+            "tweets_written": 0,
+            "write_errors": 0,
+            "max_queue_depth": 0,
+            "blocked_puts": 0,
+            "blocked_seconds": 0.0,
+            "write_seconds": 0.0,
+        }
+        self.thread = threading.Thread(target=self._run, name="tweet-batch-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, tweets):
+        """
+        Queues a batch for writing. Blocks only if the writer has fallen behind and
+        the queue is full; the time spent blocked is recorded in the metrics.
+
+        Args:
+            tweets (TweetBuffer or list): Tweets of the batch, as a buffer or a list of
+                tweet dictionaries.
+        """
+        if not tweets:
+            return
+        self.sequence += 1
+        item = (self.sequence, tweets)
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.metrics["blocked_puts"] += 1
+            start = time.perf_counter()
+            self.queue.put(item)
+            self.metrics["blocked_seconds"] += time.perf_counter() - start
+        self.metrics["batches_queued"] += 1
+        self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], self.queue.qsize())
+        set_gauge("writer_queue_depth", self.queue.qsize())
+
+    def _batch_filename(self, sequence):
+        """
+        Returns a unique, chronologically sortable file name for a batch.
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        extension = FORMAT_EXTENSIONS[self.file_format]
+        return os.path.join(self.output_dir, f"tweets_{timestamp}_{sequence:06d}{extension}")
+
+    def _write_batch(self, sequence, tweets):
+        """
+        Writes a batch atomically: to a temporary file first, then renamed into place,
+        so readers never see a partially written CSV.
+        """
+        filename = self._batch_filename(sequence)
+        fd, temp_path = tempfile.mkstemp(dir=self.output_dir, prefix=".tweets_", suffix=".tmp")
+        os.close(fd)
+        try:
+            frame = tweets.to_frame() if isinstance(tweets, TweetBuffer) else pd.DataFrame(tweets)
+            write_frame(frame, temp_path, self.file_format)
+            os.replace(temp_path, filename)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        print(f"Saved {len(tweets)} tweets to {filename}")
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                sequence, tweets = item
+                start = time.perf_counter()
+                self._write_batch(sequence, tweets)
+                self.metrics["write_seconds"] += time.perf_counter() - start
+                self.metrics["batches_written"] += 1
+                self.metrics["tweets_written"] += len(tweets)
+                increment("rows_out", len(tweets), stage="collection")
+            except Exception as e:
+                self.metrics["write_errors"] += 1
+                print(f"Error writing tweet batch: {e}")
+            finally:
+                self.queue.task_done()
+
+    def backlog(self):
+        """
+        Returns the number of batches waiting to be written.
+        """
+        return self.queue.qsize()
+
+    def close(self):
+        """
+        Writes all queued batches and stops the writer thread.
+        """
+        self.queue.put(None)
+        self.thread.join()
+        print(f"Batch writer stopped: {self.metrics}")
+
 class StreamListener(tweepy.StreamListener):
     """
     Custom StreamListener class for processing incoming tweets in real time.
     """
-    def __init__(self):
+    def __init__(self, max_tweets=MAX_TWEETS_PER_FILE, max_seconds=MAX_SECONDS_PER_FILE, writer=None,
+                 check_interval=ROTATION_CHECK_SECONDS):
+        """
+        Args:
+            max_tweets (int): Number of tweets after which the batch is rotated.
+            max_seconds (int): Age in seconds (from its first tweet) after which the
+                batch is rotated.
+            writer (BatchWriter, optional): Writer that persists the batches. A new
+                one writing to OUTPUT_DIR is started if not given.
+            check_interval (float): How often a background timer checks the batch
+                age, so a partial batch is written even when no tweets arrive.
+        """
         super().__init__()
-        self.tweets = []
-        self.max_tweets = 1000  # Set limit for the number of tweets per session
+        self.tweets = TweetBuffer()
+        self.max_tweets = max_tweets  # Set limit for the number of tweets per batch file
+        self.max_seconds = max_seconds
         self.start_time = datetime.now()
+        self.batch_started = time.monotonic()
+        self.writer = writer if writer is not None else BatchWriter()
+        # on_status runs on the stream thread and the rotation timer on its own
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.check_interval = check_interval
+        self.timer = threading.Thread(target=self._rotate_periodically, name="tweet-batch-rotation", daemon=True)
+        self.timer.start()
 
     def on_status(self, status):
         """
@@ -54,30 +294,56 @@ class StreamListener(tweepy.StreamListener):
             status (tweepy.Status): The tweet object provided by the API.
         """
         try:
-            tweet = {
-                "id": status.id,
-                "created_at": status.created_at,
-                "text": status.text,
-                "user": status.user.screen_name,
-                "location": status.user.location
-            }
-            self.tweets.append(tweet)
-
-            # Save tweets periodically or if the limit is reached
-            if len(self.tweets) >= self.max_tweets:
-                self.save_tweets_to_csv()
+            with self.lock:
+                if not self.tweets:
+                    self.batch_started = time.monotonic()
+                self.tweets.append(status.id, status.created_at, status.text,
+                                   status.user.screen_name, status.user.location)
+
+                # Rotate the batch when it is full or old enough
+                if (len(self.tweets) >= self.max_tweets
+                        or time.monotonic() - self.batch_started >= self.max_seconds):
+                    self._rotate()
 
         except Exception as e:
             print(f"Error processing tweet: {e}")
 
+    def on_keep_alive(self):
+        """
+        Rotates an aged batch on the stream's keep-alive signal as well.
+        """
+        self.rotate_if_expired()
+
+    def rotate_if_expired(self):
+        """
+        Hands the current batch to the writer if it is not empty and has reached
+        max_seconds, so a quiet stream does not hold tweets in memory indefinitely.
+        """
+        with self.lock:
+            if self.tweets and time.monotonic() - self.batch_started >= self.max_seconds:
+                self._rotate()
+
+    def _rotate_periodically(self):
+        while not self.stopped.wait(self.check_interval):
+            try:
+                self.rotate_if_expired()
+            except Exception as e:
+                print(f"Error rotating tweet batch: {e}")
+
+    def _rotate(self):
+        """
+        Submits the current batch and starts a new one. The caller holds the lock.
+        """
+        self.writer.submit(self.tweets)
+        self.tweets = TweetBuffer()  # Start a new buffer; the writer owns the old one
+        self.batch_started = time.monotonic()
+
     def save_tweets_to_csv(self):
         """
-        Saves collected tweets to a CSV file in the output directory.
+        Hands the current batch to the background writer and starts a new batch.
         """
-        filename = os.path.join(OUTPUT_DIR, f"tweets_{self.start_time.strftime('%Y%m%d_%H%M%S')}.csv")
-        pd.DataFrame(self.tweets).to_csv(filename, index=False)
-        print(f"Saved {len(self.tweets)} tweets to {filename}")
-        self.tweets = []  # Reset the tweet list for the next batch
+        with self.lock:
+            self._rotate()
 
     def on_error(self, status_code):
         """
@@ -91,19 +357,88 @@ class StreamListener(tweepy.StreamListener):
             print("Rate limit exceeded. Disconnecting stream.")
             return False
 
-def stream_tweets(keywords):
+    def close(self):
+        """
+        Stops the rotation timer, flushes the pending batch and waits for the writer
+        to finish.
+        """
+        self.stopped.set()
+        self.timer.join()
+        self.save_tweets_to_csv()
+        self.writer.close()
+
+def measure_buffer_memory(n_tweets=100000, seed=0):
+    """
+    Compares the memory held per in-flight tweet by a list of dictionaries and by
+    TweetBuffer, and the extra memory needed to hand each over as a DataFrame.
+
+    Tweets are parsed from JSON as they would arrive from the stream, so the
+    measurement includes the id, timestamp and string objects each layout keeps
+    alive after the status object is dropped.
+
+    Args:
+        n_tweets (int): Number of synthetic tweets.
+        seed (int): Random seed for the synthetic tweets.
+
+    Returns:
+        dict: Bytes per tweet held and peak bytes per tweet for the hand-off, for
+            each layout.
+    """
+    from synthetic_corpus import generate_corpus
+
+    corpus = generate_corpus(n_tweets, seed)
+    lines = [
+        json.dumps({
+            "id": int(tweet.id),
+            "created_at": tweet.created_at.strftime(TWITTER_TIME_FORMAT),
+            "text": tweet.text,
+            "user": {"screen_name": tweet.user, "location": tweet.location if isinstance(tweet.location, str) else None},
+        })
+        for tweet in corpus.itertuples()
+    ]
+    del corpus
+
+    results = {}
+    for layout in ("dicts", "buffer"):
+        tracemalloc.start()
+        tweets = [] if layout == "dicts" else TweetBuffer()
+        for line in lines:
+            raw = json.loads(line)
+            created_at = datetime.strptime(raw["created_at"], TWITTER_TIME_FORMAT)
+            user = raw["user"]
+            if layout == "dicts":
+                tweets.append({"id": raw["id"], "created_at": created_at, "text": raw["text"],
+                               "user": user["screen_name"], "location": user["location"]})
+            else:
+                tweets.append(raw["id"], created_at, raw["text"], user["screen_name"], user["location"])
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        frame = pd.DataFrame(tweets) if layout == "dicts" else tweets.to_frame()
+        handoff_peak = tracemalloc.get_traced_memory()[1] - held
+        tracemalloc.stop()
+        del frame, tweets
+        results[f"{layout}_bytes_per_tweet"] = held / n_tweets
+        results[f"{layout}_handoff_bytes_per_tweet"] = handoff_peak / n_tweets
+    print(f"In-flight tweet memory: {results}")
+    return results
+
+def stream_tweets(keywords, file_format="csv"):
     """
     Streams tweets in real time based on specified keywords or hashtags.
 
     Args:
         keywords (list): List of keywords or hashtags to filter the tweets.
+        file_format (str): Format of the raw batch files: 'csv', 'parquet' or 'feather'.
     """
     api = authenticate_twitter_api()
-    stream_listener = StreamListener()
+    stream_listener = StreamListener(writer=BatchWriter(file_format=file_format))
     stream = tweepy.Stream(auth=api.auth, listener=stream_listener)
 
     print(f"Starting tweet stream for keywords: {keywords}")
-    stream.filter(track=keywords, languages=["en"])
+    try:
+        stream.filter(track=keywords, languages=["en"])
+    finally:
+        stream_listener.close()
 
 if __name__ == "__main__":
     # Example keywords: Replace with your own
@@ -10,28 +10,45 @@ Author: Satej
 
 import pandas as pd
 import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+import time
+from instrumentation import increment, timed
+from nltk_resources import get_stopwords, get_word_tokenize
+from parallel_processing import parallel_map_series, worker_pool
+from stage_io import FrameWriter, iter_frames, read_frame, write_frame
+from tweet_schema import apply_schema
 
-# Download necessary NLTK resources
-nltk.download("stopwords")
-nltk.download("punkt")
+# Precompiled patterns for the batch cleaning engine
+URL_PATTERN = re.compile(r"http\S+|www\S+|https\S+", flags=re.MULTILINE)
+NON_WORD_PATTERN = re.compile(r"\W|\d")
 
-STOPWORDS = set(stopwords.words("english"))
+# Once punctuation and digits are stripped, the only rewrites the Treebank word
+# tokenizer still applies are these splits of apostrophe-free contractions.
+CONTRACTION_SPLITS = {
+    "cannot": "can not",
+    "gimme": "gim me",
+    "gonna": "gon na",
+    "gotta": "got ta",
+    "lemme": "lem me",
+    "wanna": "wan na",
+}
+CONTRACTION_PATTERN = re.compile(r"\b(?:cannot|gimme|gonna|gotta|lemme)\b|\bwanna(?=\s|$)")
+
+# Number of rows read, cleaned and written at a time in streaming mode
+DEFAULT_CHUNK_SIZE = 50000
 
 def load_data(file_path):
     """
-    Loads raw tweet data from a CSV file.
+    Loads raw tweet data from a stage file (CSV, Parquet or Feather), with the
+    low-cardinality columns as categoricals.
 
     Args:
-        file_path (str): Path to the CSV file containing raw tweet data.
+        file_path (str): Path to the file containing raw tweet data.
 
     Returns:
         pd.DataFrame: DataFrame with loaded tweet data.
     """
     try:
-        data = pd.read_csv(file_path)
+        data = read_frame(file_path)
         print(f"Loaded data from {file_path}, shape: {data.shape}")
         return data
     except Exception as e:
@@ -53,23 +70,210 @@ def clean_text(text):
     # Remove special characters and numbers
     text = re.sub(r"\W|\d", " ", text)
     # Tokenize and remove stop words
-    tokens = word_tokenize(text.lower())
-    tokens = [word for word in tokens if word not in STOPWORDS]
+    tokens = get_word_tokenize()(text.lower())
+    stopwords = get_stopwords()
+    tokens = [word for word in tokens if word not in stopwords]
     return " ".join(tokens)
 
-def preprocess_data(input_file, output_file):
+def clean_text_batch(texts):
+    """
+    Cleans a batch of tweet texts with precompiled patterns and vectorized string ops.
+
+    Produces the same output as applying clean_text to each text, but tokenizes by
+    splitting on whitespace instead of running the NLTK word tokenizer, which is
+    equivalent once URLs, special characters and digits have been removed.
+    Missing texts are treated as empty strings.
+
+    Args:
+        texts (pd.Series or list): Raw tweet texts.
+
+    Returns:
+        pd.Series: Cleaned texts aligned with the input index.
+    """
+    texts = pd.Series(texts, dtype=object).fillna("")
+    normalized = (
+        texts.str.replace(URL_PATTERN, "", regex=True)
+        .str.replace(NON_WORD_PATTERN, " ", regex=True)
+        .str.lower()
+        .str.replace(CONTRACTION_PATTERN, lambda m: CONTRACTION_SPLITS[m.group(0)], regex=True)
+    )
+    stopwords_frozen = get_stopwords()
+    return pd.Series(
+        [" ".join([word for word in text.split() if word not in stopwords_frozen]) for text in normalized],
+        index=texts.index,
+        dtype=object,
+    )
+
+def check_clean_text_parity(texts):
+    """
+    Compares the batch cleaning engine against clean_text on a corpus.
+
+    Args:
+        texts (list): Raw tweet texts.
+
+    Returns:
+        list: (index, expected, actual) tuples for every text whose output differs.
+    """
+    batch_output = clean_text_batch(texts).tolist()
+    mismatches = []
+    for i, (text, actual) in enumerate(zip(texts, batch_output)):
+        expected = clean_text(text)
+        if expected != actual:
+            mismatches.append((i, expected, actual))
+    print(f"Parity check: {len(texts) - len(mismatches)}/{len(texts)} texts match")
+    return mismatches
+
+def benchmark_clean_text(texts):
+    """
+    Measures the speedup of the batch cleaning engine over per-tweet clean_text.
+
+    Args:
+        texts (list): Raw tweet texts.
+
+    Returns:
+        dict: Rows per second for each path and the speedup.
+    """
+    start = time.perf_counter()
+    [clean_text(text) for text in texts]
+    per_tweet_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    clean_text_batch(texts)
+    batch_seconds = time.perf_counter() - start
+
+    report = {
+        "rows": len(texts),
+        "per_tweet_rows_per_sec": len(texts) / per_tweet_seconds if per_tweet_seconds else float("inf"),
+        "batch_rows_per_sec": len(texts) / batch_seconds if batch_seconds else float("inf"),
+        "speedup": per_tweet_seconds / batch_seconds if batch_seconds else float("inf"),
+    }
+    print(f"clean_text: {report['per_tweet_rows_per_sec']:.0f} rows/s, "
+          f"clean_text_batch: {report['batch_rows_per_sec']:.0f} rows/s, "
+          f"speedup: {report['speedup']:.2f}x")
+    return report
+
+def _clean_text_shard(texts):
+    """
+    Cleans a shard of tweet texts inside a worker process.
+
+    Args:
+        texts (list): Raw tweet texts.
+
+    Returns:
+        list: Cleaned texts, in the same order.
+    """
+    return clean_text_batch(texts).tolist()
+
+def clean_text_column(texts, workers=None, cache=None, pool=None):
+    """
+    Cleans a column of tweet texts, optionally across several worker processes.
+
+    Args:
+        texts (pd.Series): Raw tweet texts.
+        workers (int, optional): Number of worker processes. Runs serially if unset.
+        cache (TextCache, optional): Memoization cache keyed on the raw text, so
+            duplicate tweets are cleaned only once.
+        pool (Pool, optional): Worker pool from worker_pool, reused across calls.
+
+    Returns:
+        pd.Series: Cleaned texts aligned with the input index.
     """
-    Processes raw tweet data and saves the cleaned data to a new CSV file.
+    def compute(batch):
+        if workers and workers > 1:
+            return parallel_map_series(batch, _clean_text_shard, workers=workers, pool=pool)
+        return clean_text_batch(batch)
+
+    if cache is not None:
+        return cache.map(texts, compute)
+    return compute(texts)
+
+@timed("preprocess")
+def preprocess_data(input_file, output_file=None, chunksize=None, workers=None, cache=None, deduplicator=None):
+    """
+    Processes raw tweet data and saves the cleaned data to a new stage file.
+
+    The file formats are inferred from the extensions (CSV, Parquet or Feather). The
+    input may also be a DataFrame and the output file may be omitted, so the stage
+    can be chained in memory without a disk round-trip.
 
     Args:
-        input_file (str): Path to the input CSV file with raw tweet data.
-        output_file (str): Path to the output CSV file for saving cleaned data.
+        input_file (str or pd.DataFrame): Path to the input file with raw tweet data,
+            or the raw tweet data itself.
+        output_file (str, optional): Path to the output file for saving cleaned data.
+        chunksize (int, optional): If set, stream the input in chunks of this many
+            rows instead of loading the whole file into memory.
+        workers (int, optional): Number of worker processes used for cleaning.
+        cache (TextCache, optional): Memoization cache for cleaned texts.
+        deduplicator (Deduplicator, optional): If given, exact and near-duplicate
+            tweets are dropped after cleaning, before anything is written.
+
+    Returns:
+        pd.DataFrame: Cleaned data, or None if the input was processed in streaming
+            mode.
+
+    Raises:
+        ValueError: If the input file cannot be loaded, so the pipeline records the
+            stage as failed instead of keeping an older output.
     """
-    raw_data = load_data(input_file)
-    if raw_data is not None:
-        raw_data["cleaned_text"] = raw_data["text"].apply(clean_text)
-        raw_data.to_csv(output_file, index=False)
+    if chunksize and not isinstance(input_file, pd.DataFrame):
+        preprocess_data_in_chunks(input_file, output_file, chunksize, workers, cache, deduplicator)
+        return None
+
+    raw_data = apply_schema(input_file) if isinstance(input_file, pd.DataFrame) else load_data(input_file)
+    if raw_data is None:
+        raise ValueError(f"Could not load raw tweet data from {input_file}")
+    cleaned_data = raw_data.assign(cleaned_text=clean_text_column(raw_data["text"], workers, cache))
+    if deduplicator is not None:
+        cleaned_data = deduplicator.deduplicate(cleaned_data)[0]
+    increment("rows_in", len(raw_data), stage="preprocess")
+    increment("rows_out", len(cleaned_data), stage="preprocess")
+    if output_file:
+        write_frame(cleaned_data, output_file)
         print(f"Cleaned data saved to {output_file}")
+    if cache is not None:
+        print(f"Clean text cache: {cache.stats()}")
+    return cleaned_data
+
+def preprocess_data_in_chunks(input_file, output_file, chunksize=DEFAULT_CHUNK_SIZE, workers=None, cache=None,
+                              deduplicator=None):
+    """
+    Streams raw tweet data through the cleaning step in fixed-size chunks.
+
+    Each chunk is cleaned and appended to the output file before the next one is
+    read, so peak memory depends on the chunk size rather than the file size. The
+    output matches the one produced by the in-memory path. Both files may be CSV,
+    Parquet or Feather, inferred from their extensions.
+
+    Args:
+        input_file (str): Path to the input file with raw tweet data.
+        output_file (str): Path to the output file for saving cleaned data.
+        chunksize (int): Number of rows to process per chunk.
+        workers (int, optional): Number of worker processes used for cleaning.
+        cache (TextCache, optional): Memoization cache for cleaned texts.
+        deduplicator (Deduplicator, optional): If given, duplicates are dropped
+            from each chunk after cleaning.
+    """
+    try:
+        reader = iter_frames(input_file, chunksize)
+        first_chunk = next(reader, None)
+    except Exception as e:
+        print(f"Error loading file: {e}")
+        return
+
+    total_rows = 0
+    # One pool for the whole file, so workers are not respawned per chunk
+    with FrameWriter(output_file) as output, worker_pool(workers) as pool:
+        chunk = first_chunk
+        while chunk is not None:
+            chunk = chunk.assign(cleaned_text=clean_text_column(chunk["text"], workers, cache, pool))
+            if deduplicator is not None:
+                chunk = deduplicator.deduplicate(chunk)[0]
+            output.write(chunk)
+            total_rows += len(chunk)
+            chunk = next(reader, None)
+    print(f"Cleaned data saved to {output_file} ({total_rows} rows streamed in chunks of {chunksize})")
+    if cache is not None:
+        print(f"Clean text cache: {cache.stats()}")
 
 if __name__ == "__main__":
     # Example usage with file paths (replace with your own)
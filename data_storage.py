@@ -10,49 +10,565 @@ Author: Satej
 import sqlite3
 import pandas as pd
 import os
+import re
+import time
+from collections import Counter
+import numpy as np
+from instrumentation import increment, span
+from tweet_schema import SENTIMENT_LABELS, apply_schema
 
 # Database file path (can be replaced with a cloud-based database connection string)
 DATABASE_PATH = "./database/tweets_database.db"
-os.makedirs("./database/", exist_ok=True)
 
-def create_database():
+# Table holding the tweet rows. Readers use the 'tweets' view, which joins the
+# lookup tables back in so user, location and sentiment read as text.
+TWEETS_TABLE = "tweet_rows"
+
+# Low-cardinality columns stored as ids into lookup tables:
+# column -> (lookup table, id column in TWEETS_TABLE)
+LOOKUP_COLUMNS = {
+    "user": ("users", "user_id"),
+    "location": ("locations", "location_id"),
+    "sentiment": ("sentiments", "sentiment_id"),
+}
+
+# Column definitions of the tweets table, in order
+TWEETS_SCHEMA = [
+    ("id", "INTEGER PRIMARY KEY"),
+    ("created_at", "TEXT"),
+    ("text", "TEXT"),
+    ("user_id", "INTEGER REFERENCES users(id)"),
+    ("location_id", "INTEGER REFERENCES locations(id)"),
+    ("sentiment_id", "INTEGER REFERENCES sentiments(id)"),
+    ("cleaned_text", "TEXT"),
+]
+
+# Secondary indexes backing the analyst queries in tweet_queries.py
+TWEETS_INDEXES = {
+    "idx_tweets_created_at": "created_at",
+    "idx_tweets_user": "user_id, created_at",
+    "idx_tweets_location": "location_id",
+    "idx_tweets_sentiment": "sentiment_id, created_at",
+}
+
+# FTS5 index over the tweet text, kept in sync with the tweets table by triggers
+TWEETS_FTS_STATEMENTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tweets_fts USING fts5(
+        text, cleaned_text, content='tweet_rows', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tweets_fts_insert AFTER INSERT ON tweet_rows BEGIN
+        INSERT INTO tweets_fts(rowid, text, cleaned_text)
+        VALUES (new.id, new.text, new.cleaned_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tweets_fts_delete AFTER DELETE ON tweet_rows BEGIN
+        INSERT INTO tweets_fts(tweets_fts, rowid, text, cleaned_text)
+        VALUES ('delete', old.id, old.text, old.cleaned_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tweets_fts_update AFTER UPDATE OF text, cleaned_text ON tweet_rows BEGIN
+        INSERT INTO tweets_fts(tweets_fts, rowid, text, cleaned_text)
+        VALUES ('delete', old.id, old.text, old.cleaned_text);
+        INSERT INTO tweets_fts(rowid, text, cleaned_text)
+        VALUES (new.id, new.text, new.cleaned_text);
+    END
+    """,
+]
+
+# Pre-aggregated count tables: table name -> (bucket column, group column)
+ROLLUP_TABLES = {
+    "rollup_hourly_sentiment": ("hour", "sentiment"),
+    "rollup_daily_location": ("day", "location"),
+    "rollup_daily_keyword": ("day", "keyword"),
+}
+
+# SQL expressions deriving the rollup keys from a tweets row aliased as 't'
+ROLLUP_SQL_KEYS = {
+    "rollup_hourly_sentiment": ("substr(t.created_at, 1, 13) || ':00:00'", "COALESCE(t.sentiment, '')"),
+    "rollup_daily_location": ("substr(t.created_at, 1, 10)", "COALESCE(t.location, '')"),
+}
+
+# Keywords rolled up per day are the hashtags found in the tweet text
+HASHTAG_PATTERN = re.compile(r"#\w+")
+
+# Number of rows written per transaction by the bulk upsert path
+DEFAULT_BATCH_SIZE = 50000
+
+# Lookup ids cached per TweetStore and lookup table before the cache is cleared
+LOOKUP_CACHE_SIZE = 1000000
+
+# Connection settings for write-heavy bulk loads
+WRITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+]
+
+def _lookup_id_columns():
+    """
+    Maps each lookup id column of TWEETS_TABLE to its (column, lookup table).
+    """
+    return {id_column: (column, table_name) for column, (table_name, id_column) in LOOKUP_COLUMNS.items()}
+
+def _tweets_view_sql():
+    """
+    Builds the definition of the 'tweets' view over TWEETS_TABLE and the lookup tables.
+    """
+    id_columns = _lookup_id_columns()
+    columns, joins = [], []
+    for name, _ in TWEETS_SCHEMA:
+        if name in id_columns:
+            column, table_name = id_columns[name]
+            columns.append(f'{table_name}.name AS "{column}"')
+            joins.append(f"LEFT JOIN {table_name} ON {table_name}.id = r.{name}")
+        else:
+            columns.append(f"r.{name}")
+    return f"CREATE VIEW tweets AS SELECT {', '.join(columns)} FROM {TWEETS_TABLE} r {' '.join(joins)}"
+
+def _migrate_text_columns(cursor):
+    """
+    Moves the rows of a 'tweets' table with text user/location/sentiment columns
+    (databases created before the lookup tables) into TWEETS_TABLE.
+
+    The table must already have been renamed to 'tweets_legacy'.
+    """
+    legacy_columns = {row[1] for row in cursor.execute("PRAGMA table_info(tweets_legacy)")}
+    for column, (table_name, _) in LOOKUP_COLUMNS.items():
+        if column in legacy_columns:
+            cursor.execute(f'INSERT OR IGNORE INTO {table_name} (name) '
+                           f'SELECT DISTINCT "{column}" FROM tweets_legacy WHERE "{column}" IS NOT NULL')
+    id_columns = _lookup_id_columns()
+    values, joins = [], []
+    for name, _ in TWEETS_SCHEMA:
+        column, table_name = id_columns.get(name, (name, None))
+        if column not in legacy_columns:
+            values.append("NULL")
+        elif table_name is None:
+            values.append(f"l.{name}")
+        else:
+            values.append(f"{table_name}.id")
+            joins.append(f'LEFT JOIN {table_name} ON {table_name}.name = l."{column}"')
+    names = ", ".join(name for name, _ in TWEETS_SCHEMA)
+    cursor.execute(f"INSERT INTO {TWEETS_TABLE} ({names}) "
+                   f"SELECT {', '.join(values)} FROM tweets_legacy l {' '.join(joins)}")
+    print(f"Migrated {cursor.rowcount} tweets to lookup-table storage.")
+    cursor.execute("DROP TABLE tweets_legacy")
+
+def create_database(db_path=None):
     """
     Creates the SQLite database and initializes the required table if it doesn't exist.
+
+    Tweets are stored in TWEETS_TABLE with user, location and sentiment as ids into
+    lookup tables, and read through the 'tweets' view. A database created before the
+    lookup tables is migrated. Columns added to the schema since a database was
+    created are added to it, along with the secondary indexes, the FTS5 full-text
+    index and the rollup tables. A full-text index or rollup tables created for an
+    existing table are populated from the stored tweets.
+
+    Args:
+        db_path (str, optional): Path to the database file. Defaults to DATABASE_PATH.
     """
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        db_path = db_path or DATABASE_PATH
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS tweets (
-                id INTEGER PRIMARY KEY,
-                created_at TEXT,
-                text TEXT,
-                user TEXT,
-                location TEXT,
-                sentiment TEXT
+        for table_name, _ in LOOKUP_COLUMNS.values():
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {table_name} (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+        cursor.executemany("INSERT OR IGNORE INTO sentiments (name) VALUES (?)",
+                           [(label,) for label in SENTIMENT_LABELS])
+        legacy = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tweets'"
+        ).fetchone()
+        if legacy:
+            # The full-text index is rebuilt over the new table below
+            for trigger in ("tweets_fts_insert", "tweets_fts_delete", "tweets_fts_update"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            cursor.execute("DROP TABLE IF EXISTS tweets_fts")
+            cursor.execute("ALTER TABLE tweets RENAME TO tweets_legacy")
+        columns = ",\n".join(f"                {name} {definition}" for name, definition in TWEETS_SCHEMA)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {TWEETS_TABLE} (
+{columns}
             )
         """)
+        existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({TWEETS_TABLE})")}
+        for name, definition in TWEETS_SCHEMA:
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {TWEETS_TABLE} ADD COLUMN {name} {definition}")
+        if legacy:
+            _migrate_text_columns(cursor)
+        cursor.execute("DROP VIEW IF EXISTS tweets")
+        cursor.execute(_tweets_view_sql())
+        for index_name, index_columns in TWEETS_INDEXES.items():
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {TWEETS_TABLE} ({index_columns})")
+        fts_exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tweets_fts'"
+        ).fetchone()
+        for statement in TWEETS_FTS_STATEMENTS:
+            cursor.execute(statement)
+        if not fts_exists:
+            cursor.execute("INSERT INTO tweets_fts(tweets_fts) VALUES ('rebuild')")
+        rollups_exist = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rollup_hourly_sentiment'"
+        ).fetchone()
+        for table_name, (bucket_column, group_column) in ROLLUP_TABLES.items():
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table_name} (
+                    {bucket_column} TEXT,
+                    {group_column} TEXT,
+                    tweet_count INTEGER NOT NULL,
+                    PRIMARY KEY ({bucket_column}, {group_column})
+                )
+            """)
+        if not rollups_exist:
+            apply_rollups(conn, "tweets t", 1)
         conn.commit()
         conn.close()
         print("Database initialized successfully.")
     except Exception as e:
         print(f"Error creating database: {e}")
 
-def store_data_to_db(data, table_name="tweets"):
+def apply_rollups(conn, source, sign):
+    """
+    Adds (sign=1) or subtracts (sign=-1) the contribution of a set of tweets to
+    every rollup table.
+
+    Args:
+        conn (sqlite3.Connection): Open connection, usually inside a transaction.
+        source (str): FROM clause selecting the tweets, with the tweets table
+            aliased as 't'.
+        sign (int): 1 to add the tweets' counts, -1 to remove them.
+    """
+    for table_name, (bucket_sql, group_sql) in ROLLUP_SQL_KEYS.items():
+        bucket_column, group_column = ROLLUP_TABLES[table_name]
+        conn.execute(f"""
+            INSERT INTO {table_name} ({bucket_column}, {group_column}, tweet_count)
+            SELECT {bucket_sql}, {group_sql}, {sign} * COUNT(*) FROM {source}
+            WHERE t.created_at IS NOT NULL GROUP BY 1, 2
+            ON CONFLICT ({bucket_column}, {group_column})
+            DO UPDATE SET tweet_count = tweet_count + excluded.tweet_count
+        """)
+
+    keyword_counts = Counter()
+    for day, text in conn.execute(f"SELECT substr(t.created_at, 1, 10), t.text FROM {source} "
+                                  f"WHERE t.created_at IS NOT NULL AND t.text LIKE '%#%'"):
+        for keyword in {tag.lower() for tag in HASHTAG_PATTERN.findall(text)}:
+            keyword_counts[(day, keyword)] += sign
+    if keyword_counts:
+        conn.executemany("""
+            INSERT INTO rollup_daily_keyword (day, keyword, tweet_count) VALUES (?, ?, ?)
+            ON CONFLICT (day, keyword) DO UPDATE SET tweet_count = tweet_count + excluded.tweet_count
+        """, [(day, keyword, count) for (day, keyword), count in keyword_counts.items()])
+
+    if sign < 0:
+        for table_name in ROLLUP_TABLES:
+            conn.execute(f"DELETE FROM {table_name} WHERE tweet_count = 0")
+
+class TweetStore:
+    """
+    Persistent SQLite writer that bulk-upserts tweet batches.
+
+    The connection is opened once, in WAL mode with tuned PRAGMAs, and batches are
+    written with executemany inside explicit transactions. Rows whose id is already
+    stored are updated instead of failing the whole batch. When the rollup tables
+    exist, they are updated in the same transaction: the previous version of every
+    row in the batch is subtracted and the new version added. User, location and
+    sentiment values are replaced by their lookup table ids, resolved once per
+    distinct value and cached.
+    """
+    def __init__(self, db_path=None, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Args:
+            db_path (str, optional): Path to the database file. Defaults to DATABASE_PATH.
+            batch_size (int): Number of rows written per transaction.
+        """
+        self.db_path = db_path or DATABASE_PATH
+        self.batch_size = batch_size
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        for pragma in WRITE_PRAGMAS:
+            self.conn.execute(pragma)
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS batch_ids (id INTEGER PRIMARY KEY)")
+        self._columns = {}
+        self._lookup_cache = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def table_columns(self, table_name):
+        """
+        Returns the column names of a table, cached per store.
+
+        Args:
+            table_name (str): Name of the table.
+
+        Returns:
+            list: Column names in table order.
+        """
+        if table_name not in self._columns:
+            rows = self.conn.execute(f"PRAGMA table_info({table_name})").fetchall()
+            self._columns[table_name] = [row[1] for row in rows]
+        return self._columns[table_name]
+
+    def lookup_ids(self, table_name, names):
+        """
+        Returns the lookup table ids of values, adding values not stored yet.
+
+        Args:
+            table_name (str): Lookup table, e.g. 'users'.
+            names (list): Distinct values.
+
+        Returns:
+            np.ndarray: Id of each value.
+        """
+        known = self._lookup_cache.setdefault(table_name, {})
+        if len(known) > LOOKUP_CACHE_SIZE:
+            known.clear()
+        missing = [name for name in names if name not in known]
+        if missing:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(f"INSERT OR IGNORE INTO {table_name} (name) VALUES (?)",
+                                      [(name,) for name in missing])
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            # Stay below SQLite's limit on the number of bound parameters
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                known.update(self.conn.execute(
+                    f"SELECT name, id FROM {table_name} WHERE name IN ({placeholders})", chunk))
+        return np.fromiter((known[name] for name in names), dtype=np.int64, count=len(names))
+
+    def encode_lookups(self, data):
+        """
+        Replaces the user, location and sentiment columns by their lookup table ids.
+
+        Only the distinct values (the categories) are looked up; the rows are mapped
+        through their category codes.
+
+        Args:
+            data (pd.DataFrame): Tweets with text or categorical lookup columns.
+
+        Returns:
+            pd.DataFrame: Tweets with user_id, location_id and sentiment_id columns.
+        """
+        data = apply_schema(data)
+        encoded = {}
+        for column, (table_name, id_column) in LOOKUP_COLUMNS.items():
+            if column not in data.columns:
+                continue
+            values = data[column].cat
+            ids = self.lookup_ids(table_name, [str(name) for name in values.categories])
+            codes = values.codes.to_numpy()
+            # Missing values have code -1, which picks the appended placeholder
+            encoded[id_column] = pd.arrays.IntegerArray(np.append(ids, 0)[codes], codes < 0)
+        return data.drop(columns=[column for column in LOOKUP_COLUMNS if column in data.columns]).assign(**encoded)
+
+    @staticmethod
+    def _to_rows(data, columns):
+        """
+        Converts DataFrame columns to SQLite-ready tuples (timestamps as text, NaN as NULL).
+        """
+        column_values = []
+        for column in columns:
+            series = data[column]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                series = series.astype(str).where(series.notna(), None)
+            if series.hasnans:
+                column_values.append(series.astype(object).where(series.notna(), None).tolist())
+            else:
+                column_values.append(series.tolist())
+        return list(zip(*column_values))
+
+    def upsert(self, data, table_name="tweets", key="id"):
+        """
+        Inserts or updates rows, matching DataFrame columns to the table's schema.
+
+        Columns the table does not declare are ignored. Writes to 'tweets' go to
+        TWEETS_TABLE, with the lookup columns encoded as ids.
+
+        Args:
+            data (pd.DataFrame): Rows to write.
+            table_name (str): Name of the database table.
+            key (str): Primary key column used for conflict detection.
+
+        Returns:
+            int: Number of rows written.
+        """
+        target = table_name
+        if table_name == "tweets":
+            data = self.encode_lookups(data)
+            target = TWEETS_TABLE
+        table_columns = self.table_columns(target)
+        if not table_columns:
+            raise ValueError(f"Table '{target}' does not exist")
+        columns = [column for column in data.columns if column in table_columns]
+        if key not in columns:
+            raise ValueError(f"Data has no '{key}' column")
+
+        placeholders = ", ".join("?" for _ in columns)
+        quoted = ", ".join(f'"{column}"' for column in columns)
+        updates = ", ".join(f'"{column}" = excluded."{column}"' for column in columns if column != key)
+        conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+        sql = f'INSERT INTO {target} ({quoted}) VALUES ({placeholders}) ON CONFLICT("{key}") {conflict}'
+
+        maintain_rollups = table_name == "tweets" and bool(self.table_columns("rollup_hourly_sentiment"))
+        # CROSS JOIN fixes the join order: start from the batch ids and look each
+        # row up, instead of scanning the tweets view for matching ids
+        batch_source = "temp.batch_ids b CROSS JOIN tweets t ON t.id = b.id"
+        key_position = columns.index(key)
+
+        written = 0
+        with span("storage", table=table_name):
+            for start in range(0, len(data), self.batch_size):
+                rows = self._to_rows(data.iloc[start:start + self.batch_size], columns)
+                self.conn.execute("BEGIN")
+                try:
+                    if maintain_rollups:
+                        self.conn.execute("DELETE FROM temp.batch_ids")
+                        self.conn.executemany("INSERT OR IGNORE INTO temp.batch_ids (id) VALUES (?)",
+                                              [(row[key_position],) for row in rows])
+                        apply_rollups(self.conn, batch_source, -1)
+                    self.conn.executemany(sql, rows)
+                    if maintain_rollups:
+                        apply_rollups(self.conn, batch_source, 1)
+                    self.conn.execute("COMMIT")
+                except Exception:
+                    self.conn.execute("ROLLBACK")
+                    raise
+                written += len(rows)
+        increment("rows_out", written, stage="storage")
+        return written
+
+    def close(self):
+        """
+        Closes the connection.
+        """
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+# Shared store reused across store_data_to_db calls, opened on first use
+_default_store = None
+
+def get_tweet_store():
+    """
+    Returns the shared TweetStore for DATABASE_PATH, opening it on first use.
+
+    Returns:
+        TweetStore: Persistent store.
+    """
+    global _default_store
+    if _default_store is None:
+        _default_store = TweetStore()
+    return _default_store
+
+def store_data_to_db(data, table_name="tweets", store=None):
     """
     Stores the processed tweet data into the database.
 
     Args:
         data (pd.DataFrame): DataFrame containing the data to store.
         table_name (str): Name of the database table.
+        store (TweetStore, optional): Store to write through. Defaults to the shared
+            store for DATABASE_PATH.
+
+    Raises:
+        Exception: Any error from the database is re-raised after it is reported,
+            so callers (the DAG storage stage, the batch manifest) record the write
+            as failed instead of done.
     """
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        data.to_sql(table_name, conn, if_exists='append', index=False)
-        conn.close()
-        print(f"Data successfully stored in the '{table_name}' table.")
+        store = store or get_tweet_store()
+        written = store.upsert(data, table_name)
+        print(f"Data successfully stored in the '{table_name}' table ({written} rows).")
     except Exception as e:
         print(f"Error storing data to database: {e}")
+        raise
+
+def store_file_to_db(input_file, table_name="tweets"):
+    """
+    Stores a sentiment results stage file (CSV, Parquet or Feather) into the database.
+
+    Args:
+        input_file (str): Path to the stage file.
+        table_name (str): Name of the database table.
+
+    Raises:
+        Exception: If the file cannot be read or the write fails, so the pipeline
+            DAG marks the stage as failed and does not save its input hash.
+    """
+    from stage_io import read_frame
+
+    create_database()
+    store_data_to_db(read_frame(input_file), table_name)
+
+def benchmark_bulk_load(n_rows=1000000, db_path="./database/benchmark.db", batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Compares rows/sec of DataFrame.to_sql appends against the bulk upsert path.
+
+    Args:
+        n_rows (int): Number of synthetic rows to load.
+        db_path (str): Scratch database file, deleted before each run.
+        batch_size (int): Rows per transaction for the upsert path.
+
+    Returns:
+        dict: Rows per second for each path, plus the upsert rate when every row
+            already exists.
+    """
+    data = pd.DataFrame({
+        "id": range(n_rows),
+        "created_at": pd.date_range("2024-01-01", periods=n_rows, freq="s").astype(str),
+        "text": "benchmark tweet text #AI",
+        "user": [f"user_{i % 5000}" for i in range(n_rows)],
+        "location": "Earth",
+        "sentiment": "neutral",
+        "cleaned_text": "benchmark tweet text ai",
+    })
+    report = {"rows": n_rows}
+
+    def reset():
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        create_database(db_path)
+
+    reset()
+    conn = sqlite3.connect(db_path)
+    start = time.perf_counter()
+    with TweetStore(db_path) as store:
+        encoded = store.encode_lookups(data)
+    encoded.to_sql(TWEETS_TABLE, conn, if_exists="append", index=False)
+    conn.close()
+    report["to_sql_rows_per_sec"] = n_rows / (time.perf_counter() - start)
+
+    reset()
+    with TweetStore(db_path, batch_size) as store:
+        start = time.perf_counter()
+        store.upsert(data)
+        report["upsert_rows_per_sec"] = n_rows / (time.perf_counter() - start)
+        start = time.perf_counter()
+        store.upsert(data)
+        report["upsert_existing_rows_per_sec"] = n_rows / (time.perf_counter() - start)
+
+    print(f"to_sql: {report['to_sql_rows_per_sec']:.0f} rows/s, "
+          f"upsert: {report['upsert_rows_per_sec']:.0f} rows/s, "
+          f"upsert over existing rows: {report['upsert_existing_rows_per_sec']:.0f} rows/s")
+    return report
 
 if __name__ == "__main__":
     # Example usage
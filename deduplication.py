@@ -0,0 +1,722 @@
+"""
+deduplication.py
+
+This script removes duplicate tweets before the expensive analysis stages. Exact
+repeats of a tweet id (e.g. replayed or re-collected batches) are caught with a
+scalable Bloom filter. Near-duplicates (retweets, copypasta with a word or two
+changed) are caught with MinHash signatures over character shingles of the cleaned
+text and locality-sensitive hashing (LSH) to find candidate matches, whose estimated
+Jaccard similarity is compared against a configurable threshold.
+
+Both structures have bounded memory: the Bloom filter keeps a limited number of
+slices and forgets the oldest ids when it is full, and the LSH index keeps the most
+recent documents only. The state can be saved to and loaded from a '.npz' file, so
+duplicates are recognized across pipeline runs. When a raw batch changes after it
+was deduplicated, a small per-batch record of the ids and documents it added lets
+its new version be checked against everything except its own earlier entries.
+
+Author: Satej
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import increment, timed
+from stage_io import read_frame, write_frame
+
+# Default location of the saved deduplication state
+DEFAULT_STATE_FILE = "./processed_tweets/.dedup_state.npz"
+
+# Bloom filter sizing: ids in the first slice, combined false positive rate, growth
+# factor of each new slice and number of slices kept before the oldest is dropped
+DEFAULT_BLOOM_CAPACITY = 100000
+DEFAULT_BLOOM_ERROR_RATE = 0.001
+DEFAULT_BLOOM_GROWTH = 2
+DEFAULT_BLOOM_MAX_SLICES = 6
+
+# Each new slice gets this fraction of the previous slice's error rate, so the
+# combined rate stays below the configured one
+BLOOM_TIGHTENING = 0.5
+
+# MinHash/LSH settings: estimated Jaccard similarity above which a tweet counts as
+# a near-duplicate, signature length, shingle length in characters, and number of
+# recent documents indexed (signatures take num_perm * 4 bytes each)
+DEFAULT_SIMILARITY_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 64
+DEFAULT_SHINGLE_SIZE = 5
+DEFAULT_MAX_DOCUMENTS = 100000
+
+# Shingles hashed per vectorized block when computing signatures
+DEFAULT_SIGNATURE_BLOCK = 100000
+
+_MASK_32 = np.uint64(0xFFFFFFFF)
+
+def _mix64(values):
+    """
+    Scrambles 64-bit integers (the splitmix64 finalizer). Overflow wraps around.
+    """
+    values = values.astype(np.uint64, copy=True)
+    with np.errstate(over="ignore"):
+        values ^= values >> np.uint64(30)
+        values *= np.uint64(0xBF58476D1CE4E5B9)
+        values ^= values >> np.uint64(27)
+        values *= np.uint64(0x94D049BB133111EB)
+        values ^= values >> np.uint64(31)
+    return values
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over 64-bit integer keys, stored as a packed bit array.
+    """
+    def __init__(self, capacity, error_rate, bits=None, count=0):
+        """
+        Args:
+            capacity (int): Number of keys the filter is sized for.
+            error_rate (float): False positive rate at full capacity.
+            bits (np.ndarray, optional): Existing packed bits, when loading state.
+            count (int): Number of keys already added.
+        """
+        self.capacity = int(capacity)
+        self.error_rate = float(error_rate)
+        self.num_bits = max(8, int(math.ceil(-self.capacity * math.log(self.error_rate) / math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8) if bits is None else bits
+        self.count = int(count)
+
+    def _positions(self, h1, h2):
+        """
+        Returns the bit positions of each key (double hashing), shape (num_hashes, n).
+        """
+        steps = np.arange(self.num_hashes, dtype=np.uint64)[:, None]
+        with np.errstate(over="ignore"):
+            return (h1[None, :] + steps * h2[None, :]) % np.uint64(self.num_bits)
+
+    def contains(self, h1, h2):
+        """
+        Checks hashed keys for membership.
+
+        Args:
+            h1 (np.ndarray): First hash of each key.
+            h2 (np.ndarray): Second hash of each key.
+
+        Returns:
+            np.ndarray: Boolean array, True where the key was probably added.
+        """
+        positions = self._positions(h1, h2)
+        found = (self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return found.all(axis=0)
+
+    def add(self, h1, h2):
+        """
+        Adds hashed keys.
+
+        Args:
+            h1 (np.ndarray): First hash of each key.
+            h2 (np.ndarray): Second hash of each key.
+        """
+        positions = self._positions(h1, h2).ravel()
+        masks = np.left_shift(1, (positions & np.uint64(7)).astype(np.uint8)).astype(np.uint8)
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), masks)
+        self.count += len(h1)
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that adds larger, stricter slices as it fills up, keeping at most
+    max_slices of them.
+    """
+    def __init__(self, capacity=DEFAULT_BLOOM_CAPACITY, error_rate=DEFAULT_BLOOM_ERROR_RATE,
+                 growth=DEFAULT_BLOOM_GROWTH, max_slices=DEFAULT_BLOOM_MAX_SLICES):
+        """
+        Args:
+            capacity (int): Number of keys in the first slice.
+            error_rate (float): Upper bound on the combined false positive rate.
+            growth (int): Capacity multiplier of each new slice.
+            max_slices (int): Slices kept; when another is needed the oldest one is
+                dropped, so ids older than the retained slices are forgotten.
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.max_slices = max_slices
+        self.slices = []
+        self.dropped_slices = 0
+
+    def __len__(self):
+        return sum(bloom.count for bloom in self.slices)
+
+    @staticmethod
+    def hash_keys(keys):
+        """
+        Computes the two hashes of each integer key used by every slice.
+
+        Args:
+            keys (np.ndarray): Integer keys, e.g. tweet ids.
+
+        Returns:
+            tuple: (h1, h2) arrays of uint64.
+        """
+        h1 = _mix64(np.asarray(keys).astype(np.int64).view(np.uint64))
+        h2 = _mix64(h1) | np.uint64(1)
+        return h1, h2
+
+    def _new_slice(self):
+        # Once slices are being dropped, new ones stop growing so memory stays bounded
+        index = min(len(self.slices) + self.dropped_slices, self.max_slices - 1)
+        bloom = BloomFilter(self.capacity * self.growth ** index,
+                            self.error_rate * (1 - BLOOM_TIGHTENING) * BLOOM_TIGHTENING ** index)
+        self.slices.append(bloom)
+        if len(self.slices) > self.max_slices:
+            self.slices.pop(0)
+            self.dropped_slices += 1
+        return bloom
+
+    def contains(self, keys):
+        """
+        Checks integer keys for membership.
+
+        Args:
+            keys (np.ndarray): Integer keys.
+
+        Returns:
+            np.ndarray: Boolean array, True where the key was probably added.
+        """
+        h1, h2 = self.hash_keys(keys)
+        found = np.zeros(len(h1), dtype=bool)
+        for bloom in self.slices:
+            found |= bloom.contains(h1, h2)
+        return found
+
+    def add(self, keys):
+        """
+        Adds integer keys, opening new slices as the current one fills up.
+
+        Args:
+            keys (np.ndarray): Integer keys.
+        """
+        h1, h2 = self.hash_keys(keys)
+        start = 0
+        while start < len(h1):
+            bloom = self.slices[-1] if self.slices and self.slices[-1].count < self.slices[-1].capacity \
+                else self._new_slice()
+            end = min(len(h1), start + bloom.capacity - bloom.count)
+            bloom.add(h1[start:end], h2[start:end])
+            start = end
+
+def choose_bands(threshold, num_perm):
+    """
+    Picks the LSH band layout whose candidate probability curve best separates
+    similarities below and above the threshold.
+
+    Args:
+        threshold (float): Jaccard similarity threshold.
+        num_perm (int): Signature length.
+
+    Returns:
+        tuple: (bands, rows) with bands * rows <= num_perm.
+    """
+    below = np.linspace(0, threshold, 101)
+    above = np.linspace(threshold, 1, 101)
+    best, best_error = (1, num_perm), None
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        false_positives = np.trapezoid(1 - (1 - below ** rows) ** bands, below)
+        false_negatives = np.trapezoid((1 - above ** rows) ** bands, above)
+        if best_error is None or false_positives + false_negatives < best_error:
+            best, best_error = (bands, rows), false_positives + false_negatives
+    return best
+
+class MinHashLSH:
+    """
+    MinHash signatures of recent documents with an LSH index for near-duplicate lookups.
+    """
+    def __init__(self, threshold=DEFAULT_SIMILARITY_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                 shingle_size=DEFAULT_SHINGLE_SIZE, max_documents=DEFAULT_MAX_DOCUMENTS, seed=0):
+        """
+        Args:
+            threshold (float): Estimated Jaccard similarity from which a document is
+                a near-duplicate of an indexed one.
+            num_perm (int): Number of hash permutations in a signature.
+            shingle_size (int): Length of the character shingles.
+            max_documents (int): Documents indexed; the oldest are evicted first.
+            seed (int): Seed for the permutation parameters.
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.max_documents = max_documents
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        # Multiply-shift permutations: the top 32 bits of a * h + b (mod 2**64), odd a
+        self.hash_a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.hash_b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self.powers = np.uint64(0x100000001B3) ** np.arange(shingle_size - 1, -1, -1, dtype=np.uint64)
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+        # Signatures and their band hashes are kept in ring buffers; slot = document
+        # number % max_documents
+        self.signatures = np.zeros((max_documents, num_perm), dtype=np.uint32)
+        self.band_keys = np.zeros((max_documents, self.bands), dtype=np.uint64)
+        self.num_documents = 0
+        self.buckets = [{} for _ in range(self.bands)]
+
+    def __len__(self):
+        return min(self.num_documents, self.max_documents)
+
+    def compute_signatures(self, texts, max_shingles=DEFAULT_SIGNATURE_BLOCK):
+        """
+        Computes the MinHash signatures of texts' character shingles.
+
+        The shingles of a block of texts are hashed and permuted in one vectorized
+        step, and each text's minimum is taken with a segmented reduction. Only the
+        texts' bytes are held for the whole call; every per-shingle array is built
+        one block at a time.
+
+        Args:
+            texts (list): Cleaned tweet texts.
+            max_shingles (int): Approximate number of shingles hashed per block,
+                bounding the temporary memory to about num_perm * 8 bytes per
+                shingle of a block (a longer text forms a block on its own).
+
+        Returns:
+            np.ndarray: Array of shape (len(texts), num_perm) of uint32 values.
+        """
+        size = self.shingle_size
+        encoded = [text.encode("utf-8").ljust(size, b"\0") for text in texts]
+        lengths = np.fromiter((len(data) for data in encoded), dtype=np.int64, count=len(encoded))
+        result = np.empty((len(encoded), self.num_perm), dtype=np.uint32)
+        if not encoded:
+            return result
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        windows = np.lib.stride_tricks.sliding_window_view(data, size)
+        # Shingles may not cross from one text into the next
+        counts = lengths - size + 1
+        first_window = np.cumsum(lengths) - lengths
+        first_shingle = np.cumsum(counts) - counts
+        total_shingles = int(counts.sum())
+        with np.errstate(over="ignore"):
+            block_start = 0
+            while block_start < len(encoded):
+                block_end = int(np.searchsorted(first_shingle, first_shingle[block_start] + max_shingles,
+                                                side="left"))
+                block_end = max(block_end, block_start + 1)
+                low = first_shingle[block_start]
+                high = first_shingle[block_end] if block_end < len(encoded) else total_shingles
+                positions = (np.repeat(first_window[block_start:block_end] - first_shingle[block_start:block_end],
+                                       counts[block_start:block_end])
+                             + np.arange(low, high))
+                shingles = _mix64((windows[positions].astype(np.uint64) * self.powers).sum(axis=1)) & _MASK_32
+                values = (self.hash_a[:, None] * shingles[None, :] + self.hash_b[:, None]) >> np.uint64(32)
+                result[block_start:block_end] = np.minimum.reduceat(
+                    values, first_shingle[block_start:block_end] - low, axis=1).T
+                block_start = block_end
+        return result
+
+    def signature(self, text):
+        """
+        Computes the MinHash signature of one text.
+
+        Args:
+            text (str): Cleaned tweet text.
+
+        Returns:
+            np.ndarray: Signature of num_perm uint32 values.
+        """
+        return self.compute_signatures([text])[0]
+
+    def compute_band_keys(self, signatures):
+        """
+        Hashes each LSH band of signatures to a 64-bit bucket key.
+
+        Args:
+            signatures (np.ndarray): Signatures, shape (n, num_perm).
+
+        Returns:
+            np.ndarray: Bucket keys, shape (n, bands).
+        """
+        bands = signatures[:, :self.bands * self.rows].reshape(len(signatures), self.bands, self.rows)
+        keys = np.zeros(bands.shape[:2], dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for row in range(self.rows):
+                keys = _mix64(keys * np.uint64(0x100000001B3) + bands[:, :, row])
+        return keys
+
+    def document_number(self, slot):
+        """
+        Returns the number (insertion order) of the document currently in a slot.
+        """
+        return slot + (self.num_documents - 1 - slot) // self.max_documents * self.max_documents
+
+    def query(self, signature, band_keys, excluded=()):
+        """
+        Finds the most similar indexed document among the LSH candidates.
+
+        Args:
+            signature (np.ndarray): Signature to look up.
+            band_keys (list): Its bucket keys from compute_band_keys.
+            excluded (list): (start, end) ranges of document numbers to ignore.
+
+        Returns:
+            float: Highest estimated Jaccard similarity, or 0.0 without candidates.
+        """
+        candidates = set()
+        for buckets, key in zip(self.buckets, band_keys):
+            candidates.update(buckets.get(key, ()))
+        if excluded:
+            candidates = {
+                slot for slot in candidates
+                if not any(start <= self.document_number(slot) < end for start, end in excluded)
+            }
+        if not candidates:
+            return 0.0
+        slots = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        return float((self.signatures[slots] == signature).mean(axis=1).max())
+
+    def insert(self, signature, band_keys):
+        """
+        Indexes a document's signature, evicting the oldest document if full.
+
+        Args:
+            signature (np.ndarray): Signature to index.
+            band_keys (list): Its bucket keys from compute_band_keys.
+        """
+        slot = self.num_documents % self.max_documents
+        if self.num_documents >= self.max_documents:
+            for buckets, key in zip(self.buckets, self.band_keys[slot].tolist()):
+                members = buckets[key]
+                members.remove(slot)
+                if not members:
+                    del buckets[key]
+        self.signatures[slot] = signature
+        self.band_keys[slot] = band_keys
+        for buckets, key in zip(self.buckets, band_keys):
+            buckets.setdefault(key, []).append(slot)
+        self.num_documents += 1
+
+    def find_duplicates(self, texts, excluded=()):
+        """
+        Checks texts in order against the index, indexing those that are new.
+
+        Later texts are also compared against earlier new texts of the same call.
+        The new texts get consecutive document numbers, starting at the
+        num_documents value before the call.
+
+        Args:
+            texts (list): Cleaned tweet texts.
+            excluded (list): (start, end) ranges of indexed document numbers that
+                do not count as matches.
+
+        Returns:
+            np.ndarray: Boolean array, True for near-duplicates.
+        """
+        signatures = self.compute_signatures(texts)
+        all_band_keys = self.compute_band_keys(signatures).tolist()
+        duplicates = np.zeros(len(texts), dtype=bool)
+        for index, (signature, band_keys) in enumerate(zip(signatures, all_band_keys)):
+            if self.query(signature, band_keys, excluded) >= self.threshold:
+                duplicates[index] = True
+            else:
+                self.insert(signature, band_keys)
+        return duplicates
+
+    def rebuild_index(self):
+        """
+        Rebuilds the LSH buckets from the stored band keys (after loading state).
+        """
+        self.buckets = [{} for _ in range(self.bands)]
+        for slot, band_keys in enumerate(self.band_keys[:len(self)].tolist()):
+            for buckets, key in zip(self.buckets, band_keys):
+                buckets.setdefault(key, []).append(slot)
+
+class Deduplicator:
+    """
+    Drops exact (same id) and near-duplicate (similar cleaned text) tweets from batches.
+    """
+    def __init__(self, threshold=DEFAULT_SIMILARITY_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                 shingle_size=DEFAULT_SHINGLE_SIZE, max_documents=DEFAULT_MAX_DOCUMENTS,
+                 bloom_capacity=DEFAULT_BLOOM_CAPACITY, bloom_error_rate=DEFAULT_BLOOM_ERROR_RATE,
+                 bloom_max_slices=DEFAULT_BLOOM_MAX_SLICES, seed=0):
+        """
+        Args:
+            threshold (float): Similarity from which a tweet is a near-duplicate.
+            num_perm (int): MinHash signature length.
+            shingle_size (int): Length of the character shingles.
+            max_documents (int): Recent tweets indexed for near-duplicate lookups.
+            bloom_capacity (int): Ids in the first Bloom filter slice.
+            bloom_error_rate (float): Bloom filter false positive rate, i.e. the
+                fraction of new tweets wrongly dropped as repeats.
+            bloom_max_slices (int): Bloom filter slices kept.
+            seed (int): Seed for the MinHash permutations.
+        """
+        self.ids = ScalableBloomFilter(bloom_capacity, bloom_error_rate, max_slices=bloom_max_slices)
+        self.texts = MinHashLSH(threshold, num_perm, shingle_size, max_documents, seed)
+        self.totals = {"rows_in": 0, "exact_duplicates": 0, "near_duplicates": 0, "rows_out": 0}
+        self.batch = None
+
+    def begin_batch(self, previous=None):
+        """
+        Starts recording the ids and documents that the following deduplicate calls
+        add for one raw batch.
+
+        Args:
+            previous (dict, optional): Record from end_batch for an earlier version of
+                the same batch. Until end_batch, tweets matching only that version's
+                ids or documents are kept, so a changed batch is not dropped as a
+                duplicate of itself.
+        """
+        previous = previous or {}
+        excluded_ids = np.unique(np.asarray(previous.get("ids", ()), dtype=np.int64))
+        self.batch = {
+            "excluded_ids": excluded_ids,
+            "excluded_documents": [tuple(map(int, document_range)) for document_range in previous.get("documents", ())],
+            "ids": [excluded_ids],
+            "documents": [],
+        }
+
+    def end_batch(self):
+        """
+        Stops recording and returns what the batch (with its earlier versions) added.
+
+        Returns:
+            dict: 'ids' (np.ndarray of tweet ids) and 'documents' ((start, end)
+                ranges of document numbers still in the MinHash index), to pass to
+                begin_batch when a changed version of the batch is deduplicated.
+        """
+        batch, self.batch = self.batch, None
+        oldest = self.texts.num_documents - len(self.texts)
+        documents = []
+        # Ranges of consecutive deduplicate calls touch, so they are merged
+        for start, end in sorted(batch["excluded_documents"] + batch["documents"]):
+            start = max(start, oldest)
+            if end <= start:
+                continue
+            if documents and start <= documents[-1][1]:
+                documents[-1] = (documents[-1][0], max(end, documents[-1][1]))
+            else:
+                documents.append((start, end))
+        return {"ids": np.unique(np.concatenate(batch["ids"])), "documents": documents}
+
+    @timed("dedup")
+    def deduplicate(self, data, id_column="id", text_column="cleaned_text"):
+        """
+        Removes duplicates from a batch and remembers the kept tweets.
+
+        Tweets are checked in order, so the first of several copies within the batch
+        is kept. Tweets with an empty cleaned text are never treated as
+        near-duplicates. Between begin_batch and end_batch, entries of the batch's
+        earlier version are ignored and the added entries are recorded.
+
+        Args:
+            data (pd.DataFrame): Cleaned tweets.
+            id_column (str): Column with the tweet id.
+            text_column (str): Column with the cleaned text.
+
+        Returns:
+            tuple: (pd.DataFrame of kept tweets, dict with the batch's rows_in,
+                exact_duplicates, near_duplicates, rows_out and dedup_rate).
+        """
+        keep = np.ones(len(data), dtype=bool)
+
+        if id_column in data.columns:
+            # Parsed as nullable integers: a float64 column would round 19-digit
+            # snowflake ids, so distinct tweets could collide
+            ids = pd.to_numeric(data[id_column], errors="coerce", dtype_backend="numpy_nullable")
+            if not pd.api.types.is_integer_dtype(ids):
+                ids = ids.where(ids == ids.round()).astype("Int64")
+            has_id = ids.notna().to_numpy()
+            repeated = ids.duplicated().to_numpy() & has_id
+            unique_rows = has_id & ~repeated
+            unique_ids = ids[unique_rows].to_numpy(dtype=np.int64)
+            found = self.ids.contains(unique_ids)
+            seen = np.zeros(len(data), dtype=bool)
+            seen[unique_rows] = found
+            if self.batch is not None:
+                # An id from the batch's earlier version is only excused once, so a
+                # repeat later in the batch is still caught
+                own = np.isin(unique_ids, self.batch["excluded_ids"])
+                seen[unique_rows] &= ~own
+                self.batch["excluded_ids"] = np.setdiff1d(self.batch["excluded_ids"], unique_ids[own])
+                self.batch["ids"].append(unique_ids[~found])
+            keep &= ~(repeated | seen)
+            self.ids.add(unique_ids[~found])
+        exact_duplicates = int((~keep).sum())
+
+        texts = data[text_column].fillna("").astype(str).to_numpy()
+        rows = np.flatnonzero(keep & (texts != ""))
+        first_document = self.texts.num_documents
+        excluded = self.batch["excluded_documents"] if self.batch is not None else ()
+        near = self.texts.find_duplicates(texts[rows].tolist(), excluded)
+        if self.batch is not None:
+            self.batch["documents"].append((first_document, self.texts.num_documents))
+        keep[rows[near]] = False
+        near_duplicates = int(near.sum())
+
+        kept = data[keep]
+        stats = {
+            "rows_in": len(data),
+            "exact_duplicates": exact_duplicates,
+            "near_duplicates": near_duplicates,
+            "rows_out": len(kept),
+        }
+        for key, value in stats.items():
+            self.totals[key] += value
+        stats["dedup_rate"] = 1 - len(kept) / len(data) if len(data) else 0.0
+        increment("rows_in", stats["rows_in"], stage="dedup")
+        increment("rows_out", stats["rows_out"], stage="dedup")
+        increment("duplicates", exact_duplicates, kind="exact")
+        increment("duplicates", near_duplicates, kind="near")
+        print(f"Dedup: {stats['rows_in']} tweets in, {exact_duplicates} exact and {near_duplicates} "
+              f"near duplicates dropped, {stats['rows_out']} kept ({stats['dedup_rate']:.1%} removed)")
+        return kept, stats
+
+    def save(self, file_path=DEFAULT_STATE_FILE):
+        """
+        Saves the Bloom filter and MinHash index to a '.npz' file.
+
+        Args:
+            file_path (str): Destination file.
+        """
+        texts = self.texts
+        meta = {
+            "bloom": {
+                "capacity": self.ids.capacity,
+                "error_rate": self.ids.error_rate,
+                "growth": self.ids.growth,
+                "max_slices": self.ids.max_slices,
+                "dropped_slices": self.ids.dropped_slices,
+                "slices": [[bloom.capacity, bloom.error_rate, bloom.count] for bloom in self.ids.slices],
+            },
+            "minhash": {
+                "threshold": texts.threshold,
+                "num_perm": texts.num_perm,
+                "shingle_size": texts.shingle_size,
+                "max_documents": texts.max_documents,
+                "seed": texts.seed,
+                "num_documents": texts.num_documents,
+            },
+            "totals": self.totals,
+        }
+        arrays = {f"bloom_{index}": bloom.bits for index, bloom in enumerate(self.ids.slices)}
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = file_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), signatures=texts.signatures[:len(texts)], **arrays)
+        os.replace(temp_path, file_path)
+        print(f"Dedup state saved to {file_path} ({len(self.ids)} ids, {len(texts)} signatures)")
+
+    @classmethod
+    def load(cls, file_path=DEFAULT_STATE_FILE):
+        """
+        Loads a deduplicator saved with save().
+
+        Args:
+            file_path (str): State file.
+
+        Returns:
+            Deduplicator: Restored deduplicator.
+        """
+        with np.load(file_path) as state:
+            meta = json.loads(str(state["meta"]))
+            bloom_meta, minhash_meta = meta["bloom"], meta["minhash"]
+            deduplicator = cls(minhash_meta["threshold"], minhash_meta["num_perm"], minhash_meta["shingle_size"],
+                               minhash_meta["max_documents"], bloom_meta["capacity"], bloom_meta["error_rate"],
+                               bloom_meta["max_slices"], minhash_meta["seed"])
+            deduplicator.ids.growth = bloom_meta["growth"]
+            deduplicator.ids.dropped_slices = bloom_meta["dropped_slices"]
+            deduplicator.ids.slices = [
+                BloomFilter(capacity, error_rate, state[f"bloom_{index}"], count)
+                for index, (capacity, error_rate, count) in enumerate(bloom_meta["slices"])
+            ]
+            signatures = state["signatures"]
+        texts = deduplicator.texts
+        texts.signatures[:len(signatures)] = signatures
+        texts.band_keys[:len(signatures)] = texts.compute_band_keys(signatures)
+        # The ring buffer is saved slot by slot, so the next slot to overwrite is unchanged
+        texts.num_documents = minhash_meta["num_documents"]
+        texts.rebuild_index()
+        deduplicator.totals = meta["totals"]
+        return deduplicator
+
+    @classmethod
+    def load_or_create(cls, file_path=DEFAULT_STATE_FILE, **kwargs):
+        """
+        Loads saved state if the file exists, otherwise creates a new deduplicator.
+
+        Args:
+            file_path (str): State file.
+            **kwargs: Settings for a new deduplicator.
+
+        Returns:
+            Deduplicator: Deduplicator.
+        """
+        if os.path.exists(file_path):
+            return cls.load(file_path)
+        return cls(**kwargs)
+
+def save_batch_record(record, file_path):
+    """
+    Saves a record returned by Deduplicator.end_batch to a '.npz' file.
+
+    Args:
+        record (dict): Ids and document ranges added by a batch.
+        file_path (str): Destination file.
+    """
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = file_path + ".tmp"
+    with open(temp_path, "wb") as f:
+        np.savez(f, ids=record["ids"], documents=np.array(record["documents"], dtype=np.int64).reshape(-1, 2))
+    os.replace(temp_path, file_path)
+
+def load_batch_record(file_path):
+    """
+    Loads a batch record saved with save_batch_record.
+
+    Args:
+        file_path (str): Record file.
+
+    Returns:
+        dict: The record, or None if the file does not exist.
+    """
+    if not os.path.exists(file_path):
+        return None
+    with np.load(file_path) as record:
+        return {"ids": record["ids"], "documents": [tuple(document_range) for document_range in record["documents"].tolist()]}
+
+def deduplicate_file(input_file, output_file, state_file=DEFAULT_STATE_FILE,
+                     threshold=DEFAULT_SIMILARITY_THRESHOLD, record_file=None):
+    """
+    Deduplicates a cleaned tweet file against the saved state and updates the state.
+
+    Args:
+        input_file (str): Cleaned tweet file (CSV, Parquet or Feather).
+        output_file (str): Destination for the kept tweets.
+        state_file (str): Deduplication state file, created if missing.
+        threshold (float): Near-duplicate similarity threshold for a new state.
+        record_file (str, optional): Record of what this raw batch added to the
+            state. If it exists, the batch changed since it was last deduplicated
+            and its earlier entries are ignored; it is then rewritten. It is saved
+            before the state, so a crash in between only excuses entries that
+            never made it into the state.
+
+    Returns:
+        dict: Dedup statistics of the batch.
+    """
+    deduplicator = Deduplicator.load_or_create(state_file, threshold=threshold)
+    if record_file:
+        deduplicator.begin_batch(load_batch_record(record_file))
+    kept, stats = deduplicator.deduplicate(read_frame(input_file))
+    write_frame(kept, output_file)
+    if record_file:
+        save_batch_record(deduplicator.end_batch(), record_file)
+    deduplicator.save(state_file)
+    return stats
+
+if __name__ == "__main__":
+    # Example usage
+    deduplicate_file("./processed_tweets/cleaned_tweets.csv", "./processed_tweets/deduplicated_tweets.csv")
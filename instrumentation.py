@@ -0,0 +1,427 @@
+"""
+instrumentation.py
+
+This script provides lightweight metrics and tracing for the pipeline stages:
+timing spans (as a context manager or decorator), counters and gauges such as rows
+in/out, cache hits, queue depth and bytes written, and peak memory. Metrics
+can be exported as a Prometheus text file (for the node_exporter textfile collector)
+and spans as a JSON trace viewable in chrome://tracing or Perfetto.
+
+Instrumentation is disabled by default. While disabled, span() returns a shared
+no-op context manager and the counter and gauge functions return immediately, so
+the calls can stay in hot paths.
+
+Author: Satej
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+# Prefix of every exported Prometheus metric name
+METRIC_PREFIX = "social_analytics"
+
+# Maximum number of finished spans kept for the JSON trace
+MAX_TRACE_SPANS = 100_000
+
+_enabled = False
+_trace_memory = False
+_started_tracemalloc = False
+_lock = threading.Lock()
+_local = threading.local()
+_counters = {}
+_gauges = {}
+_span_totals = {}
+_trace_events = []
+# Number of open spans per thread, and a count bumped whenever a span opens while
+# another thread has one open; a span that saw either has no reliable peak
+_open_spans = {}
+_overlaps = 0
+_start_time = time.perf_counter()
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _peak_rss_bytes():
+    """
+    Returns the process's peak resident set size in bytes, if available.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def enable(trace_memory=False):
+    """
+    Turns instrumentation on.
+
+    Args:
+        trace_memory (bool): Also measure the peak Python heap allocation inside
+            each span with tracemalloc. This is accurate per span but slows
+            allocation-heavy code noticeably. tracemalloc keeps one peak for the
+            whole process, so a span that overlaps a span on another thread (e.g.
+            concurrent DAG stages) records no peak. Without trace_memory spans
+            record no peak; the process peak RSS (which only ever rises, so it
+            cannot be attributed to a span) is kept in the 'process_peak_rss_bytes'
+            gauge instead.
+    """
+    global _enabled, _trace_memory, _started_tracemalloc
+    _trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+    _enabled = True
+
+def disable():
+    """
+    Turns instrumentation off. Collected metrics are kept until reset().
+
+    tracemalloc is stopped only if enable() started it, so a caller tracing memory
+    on its own keeps its trace.
+    """
+    global _enabled, _started_tracemalloc
+    _enabled = False
+    if _started_tracemalloc and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _started_tracemalloc = False
+
+def is_enabled():
+    """
+    Returns True if instrumentation is on.
+    """
+    return _enabled
+
+def reset():
+    """
+    Clears all collected metrics and spans.
+    """
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _span_totals.clear()
+        _trace_events.clear()
+
+def increment(name, value=1, **labels):
+    """
+    Adds to a counter, e.g. rows processed or cache hits.
+
+    Args:
+        name (str): Counter name.
+        value (float): Amount to add.
+        **labels: Label values, e.g. stage='preprocess'.
+    """
+    if not _enabled:
+        return
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def set_gauge(name, value, **labels):
+    """
+    Sets a gauge to its current value, e.g. queue depth.
+
+    Args:
+        name (str): Gauge name.
+        value (float): Current value.
+        **labels: Label values.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _gauges[(name, _label_key(labels))] = value
+
+class _NullSpan:
+    """
+    Span returned while instrumentation is disabled.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    """
+    Times a block of code and, when memory tracing is on, records its peak memory.
+    """
+    __slots__ = ("name", "labels", "start", "seconds", "peak_bytes", "child_peak", "parent", "opened")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.seconds = 0.0
+        self.peak_bytes = None
+        self.child_peak = 0
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1] if stack else None
+        self.opened = _open_span()
+        if _trace_memory and tracemalloc.is_tracing():
+            # The peak so far belongs to the enclosing span; keep it before resetting
+            if self.parent is not None:
+                self.parent.child_peak = max(self.parent.child_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter()
+        self.seconds = end - self.start
+        _local.stack.pop()
+        overlapped = _close_span(self.opened)
+        if _trace_memory and tracemalloc.is_tracing():
+            if not overlapped:
+                self.peak_bytes = max(tracemalloc.get_traced_memory()[1], self.child_peak)
+                if self.parent is not None:
+                    self.parent.child_peak = max(self.parent.child_peak, self.peak_bytes)
+        else:
+            peak_rss = _peak_rss_bytes()
+            if peak_rss is not None:
+                set_gauge("process_peak_rss_bytes", peak_rss)
+        _record_span(self, end, exc_type is not None)
+        return False
+
+def _open_span():
+    """
+    Registers a span opening on the current thread.
+
+    Returns:
+        tuple: Whether another thread had a span open, and the overlap count, for
+            _close_span.
+    """
+    global _overlaps
+    thread = threading.get_ident()
+    with _lock:
+        _open_spans[thread] = _open_spans.get(thread, 0) + 1
+        if len(_open_spans) > 1:
+            _overlaps += 1
+        return len(_open_spans) > 1, _overlaps
+
+def _close_span(opened):
+    """
+    Registers a span closing on the current thread.
+
+    Args:
+        opened (tuple): What _open_span returned for the span.
+
+    Returns:
+        bool: True if a span on another thread was open at any time during the span.
+    """
+    thread = threading.get_ident()
+    shared, overlaps = opened
+    with _lock:
+        _open_spans[thread] -= 1
+        if not _open_spans[thread]:
+            del _open_spans[thread]
+        return shared or overlaps != _overlaps
+
+def _record_span(span, end, failed):
+    key = (span.name, _label_key(span.labels))
+    with _lock:
+        totals = _span_totals.setdefault(key, {"count": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                               "errors": 0, "peak_bytes": None})
+        totals["count"] += 1
+        totals["seconds"] += span.seconds
+        totals["max_seconds"] = max(totals["max_seconds"], span.seconds)
+        totals["errors"] += int(failed)
+        if span.peak_bytes is not None:
+            totals["peak_bytes"] = max(totals["peak_bytes"] or 0, span.peak_bytes)
+        if len(_trace_events) < MAX_TRACE_SPANS:
+            args = {**span.labels, "error": failed}
+            if span.peak_bytes is not None:
+                args["peak_bytes"] = span.peak_bytes
+            _trace_events.append({
+                "name": span.name,
+                "ph": "X",
+                "ts": (span.start - _start_time) * 1e6,
+                "dur": span.seconds * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": args,
+            })
+
+def span(name, **labels):
+    """
+    Returns a context manager that times the enclosed block.
+
+    Example:
+        with span("sentiment", mode="batch"):
+            perform_sentiment_analysis(data)
+
+    Args:
+        name (str): Span name, usually the stage.
+        **labels: Label values.
+
+    Returns:
+        Span: Context manager, or a shared no-op one while disabled.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, labels)
+
+def timed(name=None, **labels):
+    """
+    Decorator that records every call of a function as a span.
+
+    Args:
+        name (str, optional): Span name. Defaults to the function name.
+        **labels: Label values.
+
+    Returns:
+        function: Decorator.
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(span_name, labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def snapshot():
+    """
+    Returns a copy of the collected metrics.
+
+    Returns:
+        dict: 'counters', 'gauges' and 'spans', each keyed by (name, labels).
+    """
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "spans": {key: dict(totals) for key, totals in _span_totals.items()},
+        }
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+def _atomic_write(file_path, content):
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = file_path + ".tmp"
+    with open(temp_path, "w") as f:
+        f.write(content)
+    os.replace(temp_path, file_path)
+
+def write_prometheus(file_path):
+    """
+    Writes the metrics in the Prometheus text exposition format.
+
+    Counters become '<name>_total', gauges keep their name, and spans become
+    '<prefix>_span_seconds' summaries with a maximum gauge, plus a peak memory gauge
+    when memory tracing is on.
+
+    Args:
+        file_path (str): Destination, e.g. a node_exporter textfile directory '.prom' file.
+    """
+    metrics = snapshot()
+    lines = []
+
+    def add_family(name, metric_type, samples):
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.extend(f"{sample_name}{_format_labels(labels)} {value}" for sample_name, labels, value in samples)
+
+    by_name = {}
+    for (name, labels), value in sorted(metrics["counters"].items()):
+        by_name.setdefault(name, []).append((f"{METRIC_PREFIX}_{name}_total", labels, value))
+    for name, samples in by_name.items():
+        add_family(f"{METRIC_PREFIX}_{name}_total", "counter", samples)
+
+    by_name = {}
+    for (name, labels), value in sorted(metrics["gauges"].items()):
+        by_name.setdefault(name, []).append((f"{METRIC_PREFIX}_{name}", labels, value))
+    for name, samples in by_name.items():
+        add_family(f"{METRIC_PREFIX}_{name}", "gauge", samples)
+
+    spans = sorted(metrics["spans"].items())
+    if spans:
+        base = f"{METRIC_PREFIX}_span_seconds"
+        summary, maximum, errors, peaks = [], [], [], []
+        for (name, labels), totals in spans:
+            labels = (("span", name),) + labels
+            summary.append((f"{base}_count", labels, totals["count"]))
+            summary.append((f"{base}_sum", labels, totals["seconds"]))
+            maximum.append((f"{base}_max", labels, totals["max_seconds"]))
+            errors.append((f"{METRIC_PREFIX}_span_errors_total", labels, totals["errors"]))
+            if totals["peak_bytes"] is not None:
+                peaks.append((f"{METRIC_PREFIX}_span_peak_memory_bytes", labels, totals["peak_bytes"]))
+        add_family(base, "summary", summary)
+        add_family(f"{base}_max", "gauge", maximum)
+        add_family(f"{METRIC_PREFIX}_span_errors_total", "counter", errors)
+        if peaks:
+            add_family(f"{METRIC_PREFIX}_span_peak_memory_bytes", "gauge", peaks)
+
+    _atomic_write(file_path, "\n".join(lines) + "\n")
+    print(f"Metrics written to {file_path}")
+
+def write_trace(file_path):
+    """
+    Writes the recorded spans as a JSON trace (Chrome trace event format).
+
+    Args:
+        file_path (str): Destination JSON file.
+    """
+    with _lock:
+        events = list(_trace_events)
+    _atomic_write(file_path, json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+    print(f"Trace with {len(events)} spans written to {file_path}")
+
+def measure_overhead(iterations=1_000_000):
+    """
+    Measures the per-call cost of span() and increment() while disabled and enabled.
+
+    Args:
+        iterations (int): Number of calls timed per case.
+
+    Returns:
+        dict: Nanoseconds per call for each case.
+    """
+    was_enabled, was_tracing_memory = _enabled, _trace_memory
+    results = {}
+    for state in (False, True):
+        if state:
+            enable()
+        else:
+            disable()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            with span("overhead"):
+                pass
+        results[f"span_{'enabled' if state else 'disabled'}_ns"] = (time.perf_counter() - start) / iterations * 1e9
+        start = time.perf_counter()
+        for _ in range(iterations):
+            increment("overhead")
+        results[f"increment_{'enabled' if state else 'disabled'}_ns"] = (time.perf_counter() - start) / iterations * 1e9
+    if was_enabled:
+        enable(was_tracing_memory)
+    else:
+        disable()
+    with _lock:
+        _span_totals.pop(("overhead", ()), None)
+        _counters.pop(("overhead", ()), None)
+        _trace_events[:] = [event for event in _trace_events if event["name"] != "overhead"]
+    print(results)
+    return results
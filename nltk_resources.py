@@ -0,0 +1,102 @@
+"""
+nltk_resources.py
+
+This script loads the NLTK data used by the pipeline (English stop words, the punkt
+tokenizer and the VADER lexicon) on first use instead of at import time. Each
+resource is looked up once per process. A missing resource is downloaded once into
+the local NLTK data directory, unless downloads are disabled for offline hosts by
+setting the SOCIAL_ANALYTICS_OFFLINE environment variable, in which case a clear
+error says which resource to install.
+
+Author: Satej
+"""
+
+import functools
+import os
+import threading
+
+# Location of each resource inside the NLTK data directory
+NLTK_RESOURCES = {
+    "stopwords": "corpora/stopwords",
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+    "vader_lexicon": "sentiment/vader_lexicon.zip",
+}
+
+# Set SOCIAL_ANALYTICS_OFFLINE=1 to never download missing resources
+ALLOW_DOWNLOAD = os.environ.get("SOCIAL_ANALYTICS_OFFLINE", "") in ("", "0")
+
+_available = set()
+_lock = threading.Lock()
+
+def ensure_resource(name):
+    """
+    Makes sure an NLTK resource is installed, downloading it once if allowed.
+
+    Args:
+        name (str): Resource name from NLTK_RESOURCES.
+
+    Raises:
+        LookupError: If the resource is missing and cannot be downloaded.
+    """
+    if name in _available:
+        return
+    with _lock:
+        if name in _available:
+            return
+        import nltk
+        try:
+            nltk.data.find(NLTK_RESOURCES[name])
+        except LookupError:
+            if not ALLOW_DOWNLOAD or not nltk.download(name, quiet=True):
+                raise LookupError(f"NLTK resource '{name}' is not installed; install it with "
+                                  f"'python -m nltk.downloader {name}'") from None
+        _available.add(name)
+
+def tokenizer_resource():
+    """
+    Returns the punkt resource used by word_tokenize in the installed NLTK version.
+    """
+    try:
+        from nltk.tokenize.punkt import PunktTokenizer  # noqa: F401
+        return "punkt_tab"
+    except ImportError:
+        return "punkt"
+
+@functools.lru_cache(maxsize=None)
+def get_stopwords(language="english"):
+    """
+    Returns the NLTK stop word list, loaded once per process.
+
+    Args:
+        language (str): Stop word list language.
+
+    Returns:
+        frozenset: Stop words.
+    """
+    ensure_resource("stopwords")
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words(language))
+
+@functools.lru_cache(maxsize=None)
+def get_word_tokenize():
+    """
+    Returns NLTK's word_tokenize function once the punkt tokenizer is available.
+
+    Returns:
+        function: nltk.tokenize.word_tokenize.
+    """
+    ensure_resource(tokenizer_resource())
+    from nltk.tokenize import word_tokenize
+    return word_tokenize
+
+def create_sentiment_analyzer():
+    """
+    Creates a VADER sentiment analyzer, making sure the lexicon is installed.
+
+    Returns:
+        SentimentIntensityAnalyzer: New analyzer.
+    """
+    ensure_resource("vader_lexicon")
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
@@ -0,0 +1,137 @@
+"""
+parallel_processing.py
+
+This script provides helpers for running row-wise text processing steps across
+multiple CPU cores. A pandas Series is split into contiguous shards, each shard is
+processed by a worker process, and the results are reassembled in the original
+row order.
+
+Author: Satej
+"""
+
+import os
+import time
+from contextlib import nullcontext
+from multiprocessing import Pool
+
+import pandas as pd
+
+# Default number of worker processes (one per available CPU core)
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+def split_into_shards(values, num_shards):
+    """
+    Splits a sequence of values into contiguous, roughly equal shards.
+
+    Args:
+        values (list): Values to split.
+        num_shards (int): Number of shards to create.
+
+    Returns:
+        list: List of non-empty lists, in the original order.
+    """
+    num_shards = max(1, min(num_shards, len(values)))
+    shard_size, remainder = divmod(len(values), num_shards)
+    shards = []
+    start = 0
+    for i in range(num_shards):
+        end = start + shard_size + (1 if i < remainder else 0)
+        shards.append(list(values[start:end]))
+        start = end
+    return [shard for shard in shards if shard]
+
+def worker_pool(workers, initializer=None, initargs=()):
+    """
+    Creates a pool of worker processes to reuse across parallel_map_series calls.
+
+    Use it as a context manager around a whole stage run (e.g. every chunk of a
+    file), so the workers and the resources their initializer loads are created
+    once per stage instead of once per call.
+
+    Args:
+        workers (int, optional): Number of worker processes.
+        initializer (function, optional): Called once in each worker on startup.
+        initargs (tuple): Arguments passed to the initializer.
+
+    Returns:
+        Pool or contextlib.nullcontext: The pool, or a context yielding None when
+            workers is unset or 1 (the serial path needs no pool).
+    """
+    if not workers or workers <= 1:
+        return nullcontext(None)
+    return Pool(processes=workers, initializer=initializer, initargs=initargs)
+
+def parallel_map_series(series, shard_func, workers=DEFAULT_WORKERS, initializer=None, initargs=(), pool=None):
+    """
+    Applies a shard-level function to a Series using a pool of worker processes.
+
+    The Series is sharded across processes rather than dispatched row by row, and the
+    optional initializer runs once per worker, so expensive resources are loaded once
+    per process instead of once per task. Pass a pool from worker_pool to keep the
+    workers between calls; otherwise a pool is created for this call only.
+
+    Args:
+        series (pd.Series): Input values.
+        shard_func (function): Module-level function mapping a list of values to a
+            list of results of the same length.
+        workers (int): Number of worker processes.
+        initializer (function, optional): Called once in each worker on startup.
+        initargs (tuple): Arguments passed to the initializer.
+        pool (Pool, optional): Existing pool to run the shards on; its workers were
+            already initialized, so initializer is not used.
+
+    Returns:
+        pd.Series: Results aligned with the index of the input Series.
+    """
+    values = series.tolist()
+    if pool is None and (workers <= 1 or len(values) < 2):
+        if initializer is not None:
+            initializer(*initargs)
+        return pd.Series(shard_func(values), index=series.index, name=series.name)
+
+    shards = split_into_shards(values, workers)
+    if pool is not None:
+        # Pool.map returns shard results in submission order
+        shard_results = pool.map(shard_func, shards)
+    else:
+        with Pool(processes=len(shards), initializer=initializer, initargs=initargs) as pool:
+            shard_results = pool.map(shard_func, shards)
+
+    results = [item for shard in shard_results for item in shard]
+    return pd.Series(results, index=series.index, name=series.name)
+
+def compare_throughput(series, shard_func, workers=DEFAULT_WORKERS, initializer=None, initargs=()):
+    """
+    Compares the throughput of the serial and parallel paths for a shard function.
+
+    Args:
+        series (pd.Series): Input values.
+        shard_func (function): Module-level shard function to benchmark.
+        workers (int): Number of worker processes for the parallel run.
+        initializer (function, optional): Worker initializer, also run once before
+            the serial pass.
+        initargs (tuple): Arguments passed to the initializer.
+
+    Returns:
+        dict: Rows per second for each path and the parallel speedup.
+    """
+    start = time.perf_counter()
+    parallel_map_series(series, shard_func, workers=1, initializer=initializer, initargs=initargs)
+    serial_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel_map_series(series, shard_func, workers=workers, initializer=initializer, initargs=initargs)
+    parallel_seconds = time.perf_counter() - start
+
+    rows = len(series)
+    report = {
+        "rows": rows,
+        "workers": workers,
+        "serial_rows_per_sec": rows / serial_seconds if serial_seconds else float("inf"),
+        "parallel_rows_per_sec": rows / parallel_seconds if parallel_seconds else float("inf"),
+        "speedup": serial_seconds / parallel_seconds if parallel_seconds else float("inf"),
+    }
+    print(f"Serial: {report['serial_rows_per_sec']:.0f} rows/s, "
+          f"parallel ({workers} workers): {report['parallel_rows_per_sec']:.0f} rows/s, "
+          f"speedup: {report['speedup']:.2f}x")
+    return report
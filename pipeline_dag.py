@@ -0,0 +1,281 @@
+"""
+pipeline_dag.py
+
+This script provides a small DAG executor for the analytics pipeline. Each stage
+declares the files it reads and writes; a stage depends on the stages producing its
+inputs, independent stages run concurrently in threads or processes, and a stage is
+skipped when the content hash of its inputs and parameters matches its last
+successful run. Every run produces a per-stage timing report.
+
+Author: Satej
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+# Default location of the per-stage hashes from the last successful runs
+DEFAULT_STATE_FILE = "./processed_tweets/.pipeline_state.json"
+
+def hash_file(file_path, block_size=1 << 20):
+    """
+    Computes the SHA-256 digest of a file's contents.
+
+    Args:
+        file_path (str): Path to the file.
+        block_size (int): Number of bytes read at a time.
+
+    Returns:
+        str: Hex digest, or None if the file does not exist.
+    """
+    if not os.path.exists(file_path):
+        return None
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class Stage:
+    """
+    One pipeline step with declared input and output files.
+    """
+    def __init__(self, name, func, inputs=(), outputs=(), kwargs=None):
+        """
+        Args:
+            name (str): Unique stage name.
+            func (function): Callable run as func(**kwargs). Must be a module-level
+                function when stages run in processes.
+            inputs (iterable): Files the stage reads.
+            outputs (iterable): Files the stage writes.
+            kwargs (dict, optional): Keyword arguments passed to func; part of the
+                skip hash.
+        """
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.kwargs = dict(kwargs or {})
+
+    def input_hash(self):
+        """
+        Hashes the stage's input file contents and parameters.
+
+        Returns:
+            str: Hex digest.
+        """
+        payload = {
+            "stage": self.name,
+            "func": f"{self.func.__module__}.{self.func.__qualname__}",
+            "inputs": {path: hash_file(path) for path in self.inputs},
+            "kwargs": self.kwargs,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+def _output_signature(file_path):
+    """
+    Identifies the current version of an output file by inode, size and
+    modification time, so a stage that did not rewrite it can be told apart from
+    one that did.
+
+    Args:
+        file_path (str): Path to the file.
+
+    Returns:
+        tuple: (inode, size, mtime_ns), or None if the file does not exist.
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+def _run_stage(func, kwargs):
+    """
+    Runs a stage function and times it. Module-level so it can run in a process.
+    """
+    start = time.perf_counter()
+    func(**kwargs)
+    return time.perf_counter() - start
+
+class PipelineDAG:
+    """
+    Executes stages in dependency order, running independent stages concurrently.
+    """
+    def __init__(self, state_file=DEFAULT_STATE_FILE):
+        """
+        Args:
+            state_file (str): JSON file recording each stage's last successful hash.
+        """
+        self.stages = {}
+        self.state_file = state_file
+
+    def add_stage(self, stage):
+        """
+        Registers a stage.
+
+        Args:
+            stage (Stage): Stage to add.
+
+        Returns:
+            Stage: The added stage.
+        """
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage name: {stage.name}")
+        self.stages[stage.name] = stage
+        return stage
+
+    def dependencies(self):
+        """
+        Derives each stage's upstream stages from declared inputs and outputs.
+
+        Returns:
+            dict: Stage name to set of stage names it depends on.
+        """
+        producers = {}
+        for stage in self.stages.values():
+            for output in stage.outputs:
+                producers[os.path.normpath(output)] = stage.name
+        deps = {}
+        for stage in self.stages.values():
+            deps[stage.name] = {
+                producers[os.path.normpath(path)]
+                for path in stage.inputs
+                if os.path.normpath(path) in producers and producers[os.path.normpath(path)] != stage.name
+            }
+        self._check_acyclic(deps)
+        return deps
+
+    @staticmethod
+    def _check_acyclic(deps):
+        remaining = {name: set(upstream) for name, upstream in deps.items()}
+        while remaining:
+            ready = [name for name, upstream in remaining.items() if not upstream]
+            if not ready:
+                raise ValueError(f"Pipeline has a dependency cycle among: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for upstream in remaining.values():
+                upstream.difference_update(ready)
+
+    def _load_state(self):
+        if os.path.exists(self.state_file):
+            with open(self.state_file) as f:
+                return json.load(f)
+        return {}
+
+    def _save_state(self, state):
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.state_file + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.state_file)
+
+    def _is_up_to_date(self, stage, stage_hash, state):
+        return state.get(stage.name) == stage_hash and all(os.path.exists(path) for path in stage.outputs)
+
+    def run(self, max_workers=4, use_processes=False, force=False):
+        """
+        Runs the pipeline.
+
+        A stage starts as soon as all its upstream stages have finished. Its input
+        hash is computed at that point, so it reflects the files its upstream
+        stages just wrote. A stage fails if it raises or if any of its outputs is
+        missing or left exactly as it was before the stage ran (e.g. a stage that
+        reported an error and returned), so a stale output from an earlier run is
+        never taken for a fresh one. Stages downstream of a failure are not run.
+
+        Args:
+            max_workers (int): Maximum number of stages running at once.
+            use_processes (bool): Run stages in processes instead of threads.
+            force (bool): Run every stage even if its inputs are unchanged.
+
+        Returns:
+            list: One report entry per stage with 'stage', 'status' ('ran',
+                'skipped', 'failed' or 'blocked') and 'seconds'.
+        """
+        deps = self.dependencies()
+        state = self._load_state()
+        pending = {name: set(upstream) for name, upstream in deps.items()}
+        report = {}
+        hashes = {}
+        running = {}
+        previous_outputs = {}
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+
+        with executor_class(max_workers=max_workers) as executor:
+            while pending or running:
+                for name in [name for name, upstream in pending.items() if not upstream]:
+                    del pending[name]
+                    stage = self.stages[name]
+                    hashes[name] = stage.input_hash()
+                    if not force and self._is_up_to_date(stage, hashes[name], state):
+                        report[name] = {"stage": name, "status": "skipped", "seconds": 0.0}
+                        print(f"Stage '{name}' skipped: inputs unchanged")
+                        self._mark_done(name, pending)
+                        continue
+                    print(f"Stage '{name}' started")
+                    previous_outputs[name] = {path: _output_signature(path) for path in stage.outputs}
+                    running[executor.submit(_run_stage, stage.func, stage.kwargs)] = name
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        seconds = future.result()
+                    except Exception as e:
+                        print(f"Stage '{name}' failed: {e}")
+                        report[name] = {"stage": name, "status": "failed", "seconds": 0.0}
+                        self._block_downstream(name, pending, report)
+                        continue
+                    missing = [
+                        path for path, signature in previous_outputs[name].items()
+                        if _output_signature(path) in (None, signature)
+                    ]
+                    if missing:
+                        print(f"Stage '{name}' failed: outputs not written: {missing}")
+                        report[name] = {"stage": name, "status": "failed", "seconds": seconds}
+                        self._block_downstream(name, pending, report)
+                        continue
+                    report[name] = {"stage": name, "status": "ran", "seconds": seconds}
+                    state[name] = hashes[name]
+                    self._save_state(state)
+                    print(f"Stage '{name}' finished in {seconds:.2f}s")
+                    self._mark_done(name, pending)
+
+        ordered = [report[name] for name in self.stages if name in report]
+        print_timing_report(ordered)
+        return ordered
+
+    @staticmethod
+    def _mark_done(name, pending):
+        for upstream in pending.values():
+            upstream.discard(name)
+
+    def _block_downstream(self, name, pending, report):
+        blocked = [name]
+        while blocked:
+            failed = blocked.pop()
+            for stage_name in [stage_name for stage_name, upstream in pending.items() if failed in upstream]:
+                del pending[stage_name]
+                report[stage_name] = {"stage": stage_name, "status": "blocked", "seconds": 0.0}
+                blocked.append(stage_name)
+
+def print_timing_report(report):
+    """
+    Prints a per-stage timing table.
+
+    Args:
+        report (list): Entries returned by PipelineDAG.run.
+    """
+    print(f"{'stage':<20}{'status':<10}{'seconds':>10}")
+    for entry in report:
+        print(f"{entry['stage']:<20}{entry['status']:<10}{entry['seconds']:>10.2f}")
+    print(f"{'total (sum)':<30}{sum(entry['seconds'] for entry in report):>10.2f}")
@@ -0,0 +1,265 @@
+"""
+replay_stream.py
+
+This script replays recorded or synthetic tweets into a StreamListener without the
+Twitter API, for load testing the ingestion path on isolated hosts. Records are
+read from JSONL, CSV, Parquet or Feather files (or generated), wrapped in
+Status-like objects and passed to the listener's on_status at a configurable rate:
+a fixed number of tweets per second, in bursts, or at the original pace sped up by
+a factor. The replay reports sustained throughput and how far delivery fell behind
+schedule, which shows where a backlog starts to build.
+
+Author: Satej
+"""
+
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from stage_io import read_frame
+from synthetic_corpus import generate_corpus
+
+class ReplayUser:
+    """
+    Minimal stand-in for tweepy's User object.
+    """
+    __slots__ = ("screen_name", "location")
+
+    def __init__(self, screen_name, location):
+        self.screen_name = screen_name
+        self.location = location
+
+class ReplayStatus:
+    """
+    Minimal stand-in for tweepy's Status object, with the fields StreamListener reads.
+    """
+    __slots__ = ("id", "created_at", "text", "user")
+
+    def __init__(self, id, created_at, text, screen_name, location):
+        self.id = id
+        self.created_at = created_at
+        self.text = text
+        self.user = ReplayUser(screen_name, location)
+
+def _none_if_missing(value):
+    return None if value is None or (isinstance(value, float) and value != value) else value
+
+def status_from_record(record):
+    """
+    Converts a tweet record to a Status-like object.
+
+    Accepts both the flat format written by StreamListener (id, created_at, text,
+    user, location) and tweet JSON as returned by the API (user as an object with
+    screen_name and location).
+
+    Args:
+        record (dict): Tweet record.
+
+    Returns:
+        ReplayStatus: Status-like object.
+    """
+    user = record.get("user")
+    if isinstance(user, dict):
+        screen_name, location = user.get("screen_name"), user.get("location")
+    else:
+        screen_name, location = user, record.get("location")
+    created_at = _none_if_missing(record.get("created_at"))
+    if created_at is not None and not isinstance(created_at, datetime):
+        created_at = pd.Timestamp(created_at).to_pydatetime()
+    return ReplayStatus(int(record["id"]), created_at, record.get("text") or "",
+                        _none_if_missing(screen_name), _none_if_missing(location))
+
+def load_records(file_path):
+    """
+    Loads tweet records from a JSONL file or a stage file (CSV, Parquet, Feather).
+
+    Args:
+        file_path (str): Path to the recording.
+
+    Returns:
+        list: Tweet records as dictionaries.
+    """
+    if os.path.splitext(file_path)[1].lower() in (".jsonl", ".json"):
+        with open(file_path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    return read_frame(file_path).to_dict("records")
+
+def synthetic_records(n, seed=0):
+    """
+    Generates synthetic tweet records with synthetic_corpus.
+
+    Args:
+        n (int): Number of records.
+        seed (int): Random seed, so runs are reproducible.
+
+    Returns:
+        list: Tweet records as dictionaries.
+    """
+    return generate_corpus(n, seed).to_dict("records")
+
+class ReplayStream:
+    """
+    Delivers tweet records to a listener at a controlled rate.
+    """
+    def __init__(self, listener, records, rate=None, burst_size=1, speedup=None, shuffle=False, seed=0):
+        """
+        Args:
+            listener: Object with an on_status(status) method, e.g. StreamListener.
+            records (list): Tweet records to replay.
+            rate (float, optional): Tweets per second. Unlimited if neither rate nor
+                speedup is set.
+            burst_size (int): With a rate, deliver tweets in groups of this size, each
+                group at once, keeping the same average rate.
+            speedup (float, optional): Replay at the recorded created_at spacing
+                divided by this factor. Takes precedence over rate.
+            shuffle (bool): Replay records in a random, seed-determined order.
+            seed (int): Random seed for the shuffle.
+        """
+        self.listener = listener
+        self.records = list(records)
+        if shuffle:
+            random.Random(seed).shuffle(self.records)
+        self.rate = rate
+        self.burst_size = max(1, burst_size)
+        self.speedup = speedup
+
+    def _schedule(self):
+        """
+        Returns each record's delivery offset in seconds from the start of the replay.
+        """
+        if self.speedup:
+            times = pd.to_datetime(pd.Series([record.get("created_at") for record in self.records]),
+                                   errors="coerce", utc=True)
+            offsets = ((times - times.min()).dt.total_seconds() / self.speedup).fillna(0.0)
+            return offsets.clip(lower=0.0).tolist()
+        if self.rate:
+            return [(i // self.burst_size) * self.burst_size / self.rate for i in range(len(self.records))]
+        return [0.0] * len(self.records)
+
+    def run(self, max_tweets=None):
+        """
+        Replays the records into the listener.
+
+        Stops early if on_status returns False, as tweepy does.
+
+        Args:
+            max_tweets (int, optional): Stop after this many tweets.
+
+        Returns:
+            dict: Tweets delivered, elapsed seconds, sustained tweets/sec, and the
+                mean, p99 and maximum lag behind schedule in seconds.
+        """
+        records = self.records[:max_tweets] if max_tweets else self.records
+        schedule = self._schedule()[:len(records)]
+        lags = []
+        delivered = 0
+        start = time.perf_counter()
+        for record, offset in zip(records, schedule):
+            now = time.perf_counter() - start
+            if offset > now:
+                time.sleep(offset - now)
+                now = time.perf_counter() - start
+            lags.append(max(0.0, now - offset))
+            delivered += 1
+            if self.listener.on_status(status_from_record(record)) is False:
+                break
+        elapsed = time.perf_counter() - start
+
+        lags_sorted = sorted(lags)
+        stats = {
+            "tweets": delivered,
+            "seconds": elapsed,
+            "tweets_per_sec": delivered / elapsed if elapsed else float("inf"),
+            "mean_lag": sum(lags) / len(lags) if lags else 0.0,
+            "p99_lag": lags_sorted[int(0.99 * (len(lags_sorted) - 1))] if lags_sorted else 0.0,
+            "max_lag": lags_sorted[-1] if lags_sorted else 0.0,
+        }
+        writer = getattr(self.listener, "writer", None)
+        if writer is not None:
+            stats["writer_backlog"] = writer.backlog()
+            stats["writer_blocked_seconds"] = writer.metrics["blocked_seconds"]
+        print(f"Replayed {stats['tweets']} tweets in {stats['seconds']:.2f}s "
+              f"({stats['tweets_per_sec']:.0f} tweets/s, max lag {stats['max_lag']:.3f}s)")
+        return stats
+
+def replay_tweets(source=None, rate=None, burst_size=1, speedup=None, synthetic=10000, seed=0, max_tweets=None,
+                  output_dir=None):
+    """
+    Replays a recording (or synthetic tweets) through a StreamListener, in place of
+    data_collection.stream_tweets.
+
+    The batches are written outside the pipeline's raw tweet directory, so replayed
+    tweets are never picked up and stored as real ones.
+
+    Args:
+        source (str, optional): Recording to replay. Synthetic tweets are used if unset.
+        rate (float, optional): Tweets per second.
+        burst_size (int): Tweets delivered together at each tick when rate is set.
+        speedup (float, optional): Replay at the recorded pace divided by this factor.
+        synthetic (int): Number of synthetic tweets when no source is given.
+        seed (int): Random seed for synthetic data.
+        max_tweets (int, optional): Stop after this many tweets.
+        output_dir (str, optional): Directory for the replayed batch files. A new
+            temporary directory is created if unset; it is kept for inspection.
+
+    Returns:
+        dict: Replay statistics from ReplayStream.run, plus the 'output_dir' used.
+    """
+    from data_collection import BatchWriter, StreamListener
+
+    records = load_records(source) if source else synthetic_records(synthetic, seed)
+    output_dir = output_dir or tempfile.mkdtemp(prefix="replay_tweets_")
+    listener = StreamListener(writer=BatchWriter(output_dir=output_dir))
+    try:
+        stats = ReplayStream(listener, records, rate, burst_size, speedup, seed=seed).run(max_tweets)
+    finally:
+        listener.close()
+    stats["output_dir"] = output_dir
+    print(f"Replayed batches written to {output_dir}")
+    return stats
+
+def sweep_rates(rates, records=None, burst_size=1, max_tweets=None, lag_threshold=0.5, output_dir=None):
+    """
+    Replays the same tweets at increasing rates to find where ingestion falls behind.
+
+    Args:
+        rates (list): Tweets-per-second rates to try, in increasing order.
+        records (list, optional): Tweet records. Defaults to 10,000 synthetic tweets.
+        burst_size (int): Tweets delivered together at each tick.
+        max_tweets (int, optional): Tweets replayed per rate.
+        lag_threshold (float): Maximum lag in seconds still counted as keeping up.
+        output_dir (str, optional): Directory for the replayed batch files. If unset,
+            each rate writes to a temporary directory that is removed afterwards.
+
+    Returns:
+        pd.DataFrame: One row of replay statistics per rate, with a 'keeps_up' column.
+    """
+    from data_collection import BatchWriter, StreamListener
+
+    records = records if records is not None else synthetic_records(10000)
+    results = []
+    for rate in rates:
+        rate_dir = output_dir or tempfile.mkdtemp(prefix="replay_sweep_")
+        listener = StreamListener(writer=BatchWriter(output_dir=rate_dir))
+        try:
+            stats = ReplayStream(listener, records, rate, burst_size).run(max_tweets)
+        finally:
+            listener.close()
+            if output_dir is None:
+                shutil.rmtree(rate_dir, ignore_errors=True)
+        stats["rate"] = rate
+        stats["keeps_up"] = stats["max_lag"] <= lag_threshold
+        results.append(stats)
+    report = pd.DataFrame(results)
+    print(report[["rate", "tweets_per_sec", "p99_lag", "max_lag", "keeps_up"]].to_string(index=False))
+    return report
+
+if __name__ == "__main__":
+    # Example: replay 10,000 synthetic tweets at 2,000 tweets/sec in bursts of 100
+    replay_tweets(rate=2000, burst_size=100)
@@ -7,26 +7,46 @@ It classifies tweets as positive, negative, or neutral and provides an aggregate
 Author: Satej
 """
 
+import itertools
+import numpy as np
 import pandas as pd
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
 import os
+from instrumentation import increment, timed
+from nltk_resources import create_sentiment_analyzer
+from parallel_processing import parallel_map_series, worker_pool
+from stage_io import read_frame, write_frame
+from tweet_schema import SENTIMENT_LABELS, apply_schema, sentiment_from_codes
 
-# Download the necessary NLTK resource for sentiment analysis
-import nltk
-nltk.download("vader_lexicon")
+# Compound-score thresholds separating positive, neutral and negative tweets
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+# Columns returned by the batch scoring engine, in order
+SCORE_COLUMNS = ["neg", "neu", "pos", "compound"]
+
+# Words VADER checks for around a sentiment word, besides its negation, booster
+# and idiom lists
+VADER_CONTEXT_WORDS = {"but", "kind", "least", "never", "so", "this", "at", "very"}
+
+# Cache key prefix of the encoded scores, separating them from cached labels
+SCORES_KEY_PREFIX = "scores:"
+
+# Analyzer owned by the current worker process, created once by _init_sentiment_worker
+_worker_analyzer = None
 
 def load_data(file_path):
     """
-    Loads preprocessed tweet data from a CSV file.
+    Loads preprocessed tweet data from a stage file (CSV, Parquet or Feather), with
+    the low-cardinality columns as categoricals.
 
     Args:
-        file_path (str): Path to the CSV file containing cleaned tweet data.
+        file_path (str): Path to the file containing cleaned tweet data.
 
     Returns:
         pd.DataFrame: DataFrame with loaded tweet data.
     """
     try:
-        data = pd.read_csv(file_path)
+        data = read_frame(file_path)
         print(f"Loaded data from {file_path}, shape: {data.shape}")
         return data
     except Exception as e:
@@ -45,27 +65,304 @@ def analyze_sentiment(text, analyzer):
         str: Sentiment label (positive, neutral, negative).
     """
     scores = analyzer.polarity_scores(text)
-    if scores['compound'] > 0.05:
+    if scores['compound'] > POSITIVE_THRESHOLD:
         return "positive"
-    elif scores['compound'] < -0.05:
+    elif scores['compound'] < NEGATIVE_THRESHOLD:
         return "negative"
     else:
         return "neutral"
 
-def perform_sentiment_analysis(input_file, output_file):
+def label_sentiment(compound, positive_threshold=POSITIVE_THRESHOLD, negative_threshold=NEGATIVE_THRESHOLD):
+    """
+    Converts compound scores to sentiment labels in one vectorized pass.
+
+    Keeping compound scores around means tweets can be re-thresholded with this
+    function without being scored again.
+
+    Args:
+        compound (array-like): Compound VADER scores.
+        positive_threshold (float): Scores above this are labeled positive.
+        negative_threshold (float): Scores below this are labeled negative.
+
+    Returns:
+        pd.Categorical: Labels (positive, neutral, negative) with the shared
+            sentiment dtype.
+    """
+    compound = np.asarray(compound, dtype=float)
+    codes = np.select(
+        [compound > positive_threshold, compound < negative_threshold],
+        [SENTIMENT_LABELS.index("positive"), SENTIMENT_LABELS.index("negative")],
+        default=SENTIMENT_LABELS.index("neutral"),
+    )
+    return sentiment_from_codes(codes)
+
+def _context_words(analyzer):
+    """
+    Collects the words that make VADER adjust the valence of a neighbouring word:
+    negations, boosters and dampeners, and a few special cases.
+    """
+    constants = analyzer.constants
+    words = set(VADER_CONTEXT_WORDS) | set(constants.NEGATE)
+    for phrase in constants.BOOSTER_DICT:
+        words.update(phrase.split())
+    return words
+
+def _row_totals(values):
+    """
+    Sums each row left to right, in the same order as VADER's own running sums.
+    """
+    return values.cumsum(axis=1)[:, -1]
+
+def _plain_polarity_matrix(token_lists, lexicon):
+    """
+    Scores tokenized texts that need no VADER context rules.
+
+    Each distinct word's valence is looked up once for the whole batch, and the
+    sums, neg/neu/pos ratios and compound scores are computed with NumPy.
+
+    Args:
+        token_lists (list): Lowercased tokens of each text, as SentiText would
+            split them.
+        lexicon (dict): VADER lexicon mapping lowercase words to valences.
+
+    Returns:
+        np.ndarray: (n, 4) array of neg/neu/pos/compound values.
+    """
+    vocabulary = {}
+    codes = [[vocabulary.setdefault(token, len(vocabulary)) for token in tokens] for tokens in token_lists]
+    valences = np.array([lexicon.get(word, 0.0) for word in vocabulary], dtype=float)
+    lengths = np.fromiter(map(len, codes), dtype=np.intp, count=len(codes))
+    mask = np.arange(max(lengths.max(), 1)) < lengths[:, None]
+    sentiments = np.zeros(mask.shape)
+    sentiments[mask] = valences[np.fromiter(itertools.chain.from_iterable(codes), dtype=np.intp)]
+
+    sum_s = _row_totals(sentiments)
+    compound = sum_s / np.sqrt(sum_s * sum_s + 15)
+    pos_sum = _row_totals(np.where(sentiments > 0, sentiments + 1, 0.0))
+    neg_sum = np.abs(_row_totals(np.where(sentiments < 0, sentiments - 1, 0.0)))
+    neu_count = (mask & (sentiments == 0)).sum(axis=1)
+    total = pos_sum + neg_sum + neu_count
+    scored = lengths > 0
+    total[~scored] = 1.0
+    columns = (neg_sum / total, neu_count / total, pos_sum / total, compound)
+    matrix = np.zeros((len(codes), len(SCORE_COLUMNS)), dtype=float)
+    for j, (values, digits) in enumerate(zip(columns, (3, 3, 3, 4))):
+        # Python's round, as polarity_scores uses, rather than np.round's scaled rounding
+        matrix[:, j] = [round(value, digits) for value in values.tolist()]
+    matrix[~scored] = 0.0
+    return matrix
+
+def _polarity_matrix(texts, analyzer):
+    """
+    Scores texts into an (n, 4) array of neg/neu/pos/compound values.
+
+    Texts with no VADER punctuation, no all-caps words, none of VADER's context
+    words and no idiom, which covers most cleaned tweets, go through
+    _plain_polarity_matrix and get exactly the scores polarity_scores would give.
+    The rest are scored by polarity_scores one text at a time.
+    """
+    constants = analyzer.constants
+    matrix = np.empty((len(texts), len(SCORE_COLUMNS)), dtype=float)
+    context_words = _context_words(analyzer)
+    idiom_words = {word for idiom in constants.SPECIAL_CASE_IDIOMS for word in idiom.split()}
+    punctuation = set("".join(constants.PUNC_LIST))
+    plain_rows, plain_tokens = [], []
+    for i, text in enumerate(texts):
+        if isinstance(text, str) and punctuation.isdisjoint(text):
+            tokens = [token for token in text.split() if len(token) > 1]
+            lowered = [token.lower() for token in tokens]
+            if (not any(token.isupper() for token in tokens) and context_words.isdisjoint(lowered)
+                    and not (idiom_words.intersection(lowered)
+                             and any(idiom in " ".join(lowered) for idiom in constants.SPECIAL_CASE_IDIOMS))):
+                plain_rows.append(i)
+                plain_tokens.append(lowered)
+                continue
+        scores = analyzer.polarity_scores(text)
+        matrix[i] = (scores["neg"], scores["neu"], scores["pos"], scores["compound"])
+    if plain_rows:
+        matrix[plain_rows] = _plain_polarity_matrix(plain_tokens, analyzer.lexicon)
+    return matrix
+
+def score_sentiment_batch(texts, analyzer=None):
+    """
+    Scores a batch of texts and returns the full VADER scores as columns.
+
+    Args:
+        texts (pd.Series or list): Cleaned tweet texts.
+        analyzer (SentimentIntensityAnalyzer, optional): Analyzer to reuse. A new one
+            is created if not given.
+
+    Returns:
+        pd.DataFrame: Columns neg, neu, pos, compound and sentiment, aligned with the
+            input index when a Series is given.
+    """
+    if analyzer is None:
+        analyzer = create_sentiment_analyzer()
+    index = texts.index if isinstance(texts, pd.Series) else None
+    scores = pd.DataFrame(_polarity_matrix(list(texts), analyzer), columns=SCORE_COLUMNS, index=index)
+    scores["sentiment"] = label_sentiment(scores["compound"].to_numpy())
+    return scores
+
+def _init_sentiment_worker():
+    """
+    Loads the VADER lexicon once per worker process.
+    """
+    global _worker_analyzer
+    _worker_analyzer = create_sentiment_analyzer()
+
+def _analyze_sentiment_shard(texts):
+    """
+    Labels a shard of texts using the worker's analyzer.
+
+    Args:
+        texts (list): Cleaned tweet texts.
+
+    Returns:
+        list: Sentiment labels, in the same order.
+    """
+    return label_sentiment(_polarity_matrix(texts, _worker_analyzer)[:, 3]).tolist()
+
+def _score_sentiment_shard(texts):
+    """
+    Scores a shard of texts using the worker's analyzer.
+
+    Args:
+        texts (list): Cleaned tweet texts.
+
+    Returns:
+        list: (neg, neu, pos, compound) tuples, in the same order.
+    """
+    return [tuple(row) for row in _polarity_matrix(texts, _worker_analyzer)]
+
+def _encode_scores(scores):
+    """
+    Serializes a (neg, neu, pos, compound) tuple for the text cache.
+    """
+    return " ".join(repr(float(score)) for score in scores)
+
+def _decode_scores(value):
+    """
+    Parses a cached score string back into a (neg, neu, pos, compound) tuple.
+    """
+    return tuple(float(score) for score in value.split())
+
+def sentiment_worker_pool(workers):
+    """
+    Creates a worker pool whose processes each load the VADER lexicon once, for
+    reuse across several analyze_sentiment_column or score_sentiment_column calls.
+
+    Args:
+        workers (int, optional): Number of worker processes.
+
+    Returns:
+        Pool or contextlib.nullcontext: Context manager yielding the pool (None
+            for serial runs).
+    """
+    return worker_pool(workers, initializer=_init_sentiment_worker)
+
+def analyze_sentiment_column(texts, workers=None, cache=None, pool=None):
+    """
+    Labels a column of texts, optionally across several worker processes.
+
+    Args:
+        texts (pd.Series): Cleaned tweet texts.
+        workers (int, optional): Number of worker processes. Runs serially if unset.
+        cache (TextCache, optional): Memoization cache keyed on the cleaned text, so
+            duplicate tweets are scored only once.
+        pool (Pool, optional): Pool from sentiment_worker_pool, reused across calls.
+
+    Returns:
+        pd.Series: Sentiment labels aligned with the input index.
+    """
+    def compute(batch):
+        if workers and workers > 1:
+            return parallel_map_series(batch, _analyze_sentiment_shard, workers=workers,
+                                       initializer=_init_sentiment_worker, pool=pool)
+        return score_sentiment_batch(batch)["sentiment"]
+
+    if cache is not None:
+        return cache.map(texts, compute)
+    return compute(texts)
+
+def score_sentiment_column(texts, workers=None, cache=None, pool=None):
+    """
+    Scores a column of texts with full VADER scores, optionally across several
+    worker processes.
+
+    Args:
+        texts (pd.Series): Cleaned tweet texts.
+        workers (int, optional): Number of worker processes. Runs serially if unset.
+        cache (TextCache, optional): Memoization cache keyed on the cleaned text.
+            Score entries are kept under their own key prefix, so the same cache
+            can also hold labels from analyze_sentiment_column.
+        pool (Pool, optional): Pool from sentiment_worker_pool, reused across calls.
+
+    Returns:
+        pd.DataFrame: Columns neg, neu, pos, compound and sentiment, aligned with the
+            input index.
+    """
+    def compute(batch):
+        if workers and workers > 1:
+            return parallel_map_series(batch, _score_sentiment_shard, workers=workers,
+                                       initializer=_init_sentiment_worker, pool=pool).tolist()
+        return [tuple(row) for row in score_sentiment_batch(batch)[SCORE_COLUMNS].to_numpy()]
+
+    if cache is not None:
+        encoded = cache.map(texts, lambda batch: [_encode_scores(row) for row in compute(batch)],
+                            key_prefix=SCORES_KEY_PREFIX)
+        rows = [_decode_scores(value) for value in encoded]
+    else:
+        rows = compute(texts)
+
+    scores = pd.DataFrame(np.array(rows, dtype=float).reshape(-1, len(SCORE_COLUMNS)),
+                          columns=SCORE_COLUMNS, index=texts.index)
+    scores["sentiment"] = label_sentiment(scores["compound"].to_numpy())
+    return scores
+
+@timed("sentiment")
+def perform_sentiment_analysis(input_file, output_file=None, workers=None, cache=None, include_scores=False,
+                               pool=None):
     """
     Performs sentiment analysis on cleaned tweet data and saves the results.
 
     Args:
-        input_file (str): Path to the input CSV file with cleaned tweet data.
-        output_file (str): Path to the output CSV file for saving sentiment analysis results.
-    """
-    data = load_data(input_file)
-    if data is not None:
-        analyzer = SentimentIntensityAnalyzer()
-        data["sentiment"] = data["cleaned_text"].apply(lambda x: analyze_sentiment(x, analyzer))
-        data.to_csv(output_file, index=False)
+        input_file (str or pd.DataFrame): Path to the input file with cleaned tweet
+            data, or the cleaned tweet data itself.
+        output_file (str, optional): Path to the output file for saving sentiment
+            analysis results. The format (CSV, Parquet or Feather) is inferred from
+            the extension. If omitted, the results are only returned.
+        workers (int, optional): Number of worker processes used for scoring.
+        cache (TextCache, optional): Memoization cache for sentiment results.
+        include_scores (bool): If True, also save the neg, neu, pos and compound
+            scores alongside the label.
+        pool (Pool, optional): Pool from sentiment_worker_pool, so callers scoring
+            many batches keep their workers (and loaded lexicons) between calls.
+
+    Returns:
+        pd.DataFrame: Data with sentiment columns.
+
+    Raises:
+        ValueError: If the input file cannot be loaded, so the pipeline records the
+            stage as failed instead of keeping an older output.
+    """
+    data = input_file if isinstance(input_file, pd.DataFrame) else load_data(input_file)
+    if data is None:
+        raise ValueError(f"Could not load cleaned tweet data from {input_file}")
+    increment("rows_in", len(data), stage="sentiment")
+    if include_scores:
+        scores = score_sentiment_column(data["cleaned_text"], workers, cache, pool)
+        data = data.assign(**{column: scores[column] for column in SCORE_COLUMNS + ["sentiment"]})
+    else:
+        data = data.assign(sentiment=analyze_sentiment_column(data["cleaned_text"], workers, cache, pool))
+    # Labels from worker processes or the cache come back as strings
+    data = apply_schema(data)
+    increment("rows_out", len(data), stage="sentiment")
+    if output_file:
+        write_frame(data, output_file)
         print(f"Sentiment analysis results saved to {output_file}")
+    if cache is not None:
+        print(f"Sentiment cache: {cache.stats()}")
+    return data
 
 if __name__ == "__main__":
     # Example usage with file paths (replace with your own)
@@ -0,0 +1,303 @@
+"""
+stage_io.py
+
+This script provides the file I/O layer shared by the pipeline stages. Stage outputs
+can be stored as CSV (the default), as compressed Parquet with a typed 'created_at'
+timestamp column, or as Arrow IPC / Feather files that are read through a memory map.
+The format is chosen from the file extension unless given explicitly. Parquet and
+Feather require the optional 'pyarrow' package.
+
+Author: Satej
+"""
+
+import os
+import time
+
+import pandas as pd
+
+from instrumentation import increment, is_enabled
+from tweet_schema import CSV_DTYPES, apply_schema
+
+# File extension for each supported format
+FORMAT_EXTENSIONS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "feather": ".feather",
+}
+
+# Default compression codec per format
+DEFAULT_COMPRESSION = {
+    "parquet": "zstd",
+    # Uncompressed Feather files can be memory-mapped without a decode step
+    "feather": "uncompressed",
+}
+
+def _require_pyarrow():
+    """
+    Imports pyarrow, raising a helpful error if it is not installed.
+    """
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError as e:
+        raise ImportError("Parquet and Feather stage files require the 'pyarrow' package") from e
+
+def detect_format(file_path):
+    """
+    Infers the stage file format from a path's extension.
+
+    Args:
+        file_path (str): Path to a stage file.
+
+    Returns:
+        str: One of 'csv', 'parquet' or 'feather'.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in (".arrow", ".ipc"):
+        return "feather"
+    for file_format, format_extension in FORMAT_EXTENSIONS.items():
+        if extension == format_extension:
+            return file_format
+    return "csv"
+
+def with_format(file_path, file_format):
+    """
+    Replaces a path's extension with the one for the given format.
+
+    Args:
+        file_path (str): Original path.
+        file_format (str): Target format.
+
+    Returns:
+        str: Path with the format's extension.
+    """
+    return os.path.splitext(file_path)[0] + FORMAT_EXTENSIONS[file_format]
+
+def _typed_for_columnar(data):
+    """
+    Parses 'created_at' into a timestamp column before writing a columnar file.
+
+    Values that cannot be parsed become missing timestamps; how many is reported
+    and counted as 'coerced_timestamps', so the loss is not silent.
+    """
+    if "created_at" in data.columns and not pd.api.types.is_datetime64_any_dtype(data["created_at"]):
+        created_at = pd.to_datetime(data["created_at"], errors="coerce")
+        coerced = int((created_at.isna() & data["created_at"].notna()).sum())
+        if coerced:
+            print(f"Warning: {coerced} unparseable 'created_at' values stored as missing timestamps")
+            increment("coerced_timestamps", coerced)
+        data = data.assign(created_at=created_at)
+    return data
+
+def read_frame(file_path, file_format=None, columns=None):
+    """
+    Reads a stage file into a DataFrame.
+
+    The user, location and sentiment columns are returned as categoricals (see
+    tweet_schema.py).
+
+    Args:
+        file_path (str): Path to the stage file.
+        file_format (str, optional): Format name; inferred from the extension if unset.
+        columns (list, optional): Subset of columns to read.
+
+    Returns:
+        pd.DataFrame: Loaded data.
+    """
+    file_format = file_format or detect_format(file_path)
+    if file_format == "csv":
+        data = pd.read_csv(file_path, usecols=columns, dtype=CSV_DTYPES)
+    elif file_format == "parquet":
+        _require_pyarrow()
+        data = pd.read_parquet(file_path, columns=columns)
+    elif file_format == "feather":
+        _require_pyarrow()
+        from pyarrow import feather
+        data = feather.read_table(file_path, columns=columns, memory_map=True).to_pandas()
+    else:
+        raise ValueError(f"Unsupported stage file format: {file_format}")
+    return apply_schema(data)
+
+def write_frame(data, file_path, file_format=None, compression=None):
+    """
+    Writes a DataFrame to a stage file.
+
+    Args:
+        data (pd.DataFrame): Data to write.
+        file_path (str or file object): Destination path (or open text file for CSV).
+        file_format (str, optional): Format name; inferred from the extension if unset.
+        compression (str, optional): Codec for Parquet/Feather, e.g. 'zstd', 'snappy',
+            'lz4' or 'uncompressed'. Defaults per format.
+    """
+    if file_format is None:
+        file_format = detect_format(file_path) if isinstance(file_path, str) else "csv"
+    data = apply_schema(data)
+    if file_format == "csv":
+        data.to_csv(file_path, index=False)
+    else:
+        _require_pyarrow()
+        compression = compression or DEFAULT_COMPRESSION[file_format]
+        data = _typed_for_columnar(data)
+        if file_format == "parquet":
+            data.to_parquet(file_path, index=False, compression=compression)
+        elif file_format == "feather":
+            data.reset_index(drop=True).to_feather(file_path, compression=compression)
+        else:
+            raise ValueError(f"Unsupported stage file format: {file_format}")
+    if is_enabled() and isinstance(file_path, str):
+        increment("bytes_written", os.path.getsize(file_path), format=file_format)
+
+def iter_frames(file_path, chunksize, file_format=None):
+    """
+    Reads a stage file as a sequence of DataFrames of at most chunksize rows.
+
+    Args:
+        file_path (str): Path to the stage file.
+        chunksize (int): Maximum number of rows per chunk. Feather files are read one
+            record batch at a time, so their chunks follow the batches they were
+            written with.
+        file_format (str, optional): Format name; inferred from the extension if unset.
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of the file.
+    """
+    file_format = file_format or detect_format(file_path)
+    if file_format == "csv":
+        with pd.read_csv(file_path, chunksize=chunksize, dtype=CSV_DTYPES) as reader:
+            for chunk in reader:
+                yield apply_schema(chunk)
+    elif file_format == "parquet":
+        _require_pyarrow()
+        from pyarrow import parquet
+        for batch in parquet.ParquetFile(file_path).iter_batches(batch_size=chunksize):
+            yield apply_schema(batch.to_pandas())
+    elif file_format == "feather":
+        pyarrow = _require_pyarrow()
+        with pyarrow.memory_map(file_path) as source:
+            reader = pyarrow.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield apply_schema(reader.get_batch(i).to_pandas())
+    else:
+        raise ValueError(f"Unsupported stage file format: {file_format}")
+
+class FrameWriter:
+    """
+    Appends DataFrame chunks to one stage file, so large outputs can be written
+    without holding them in memory.
+    """
+    def __init__(self, file_path, file_format=None, compression=None):
+        """
+        Args:
+            file_path (str): Destination path.
+            file_format (str, optional): Format name; inferred from the extension if unset.
+            compression (str, optional): Codec for Parquet/Feather. Defaults per format.
+        """
+        self.file_path = file_path
+        self.file_format = file_format or detect_format(file_path)
+        if self.file_format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unsupported stage file format: {self.file_format}")
+        self.compression = compression or DEFAULT_COMPRESSION.get(self.file_format)
+        self.writer = None
+        self.schema = None
+        self.rows = 0
+
+    def _columnar_schema(self, table):
+        """
+        Returns a file schema that every chunk can be cast to.
+
+        Chunks encode their categoricals with different dictionaries: Parquet
+        accepts that once the indices are widened to int32, while Arrow IPC files
+        allow only one dictionary per column, so Feather columns are written as
+        plain values (read_frame turns them back into categoricals). A column that
+        is entirely missing in the first chunk has Arrow type null, which later
+        chunks cannot be cast to; numeric and timestamp columns never end up null
+        (pandas stores their missing values as NaN/NaT), so such columns are
+        written as strings.
+        """
+        pyarrow = _require_pyarrow()
+        fields = []
+        for field in table.schema:
+            dictionary = pyarrow.types.is_dictionary(field.type)
+            value_type = field.type.value_type if dictionary else field.type
+            if pyarrow.types.is_null(value_type):
+                value_type = pyarrow.large_string()
+            if dictionary and self.file_format == "parquet":
+                value_type = pyarrow.dictionary(pyarrow.int32(), value_type)
+            fields.append(field.with_type(value_type))
+        return pyarrow.schema(fields)
+
+    def write(self, data):
+        """
+        Appends a chunk to the file.
+
+        Args:
+            data (pd.DataFrame): Chunk with the same columns as the first one.
+        """
+        data = apply_schema(data)
+        if self.file_format == "csv":
+            data.to_csv(self.file_path, index=False, header=self.rows == 0, mode="w" if self.rows == 0 else "a")
+        else:
+            pyarrow = _require_pyarrow()
+            table = pyarrow.Table.from_pandas(_typed_for_columnar(data), preserve_index=False)
+            if self.writer is None:
+                self.schema = self._columnar_schema(table)
+                if self.file_format == "parquet":
+                    from pyarrow import parquet
+                    self.writer = parquet.ParquetWriter(self.file_path, self.schema, compression=self.compression)
+                else:
+                    options = pyarrow.ipc.IpcWriteOptions(
+                        compression=None if self.compression == "uncompressed" else self.compression)
+                    self.writer = pyarrow.ipc.new_file(self.file_path, self.schema, options=options)
+            self.writer.write_table(table.cast(self.schema))
+        self.rows += len(data)
+
+    def close(self):
+        """
+        Finishes the file. An empty CSV file is created if no chunk was written.
+        """
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        elif self.rows == 0 and self.file_format == "csv":
+            open(self.file_path, "w").close()
+        if is_enabled() and os.path.exists(self.file_path):
+            increment("bytes_written", os.path.getsize(self.file_path), format=self.file_format)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def benchmark_formats(data, directory, formats=("csv", "parquet", "feather")):
+    """
+    Compares write time, read time and file size of the stage file formats.
+
+    Args:
+        data (pd.DataFrame): Sample stage data.
+        directory (str): Directory for the temporary benchmark files.
+        formats (tuple): Formats to compare.
+
+    Returns:
+        pd.DataFrame: One row per format with write/read seconds and size in bytes.
+    """
+    os.makedirs(directory, exist_ok=True)
+    results = []
+    for file_format in formats:
+        path = os.path.join(directory, "benchmark" + FORMAT_EXTENSIONS[file_format])
+        start = time.perf_counter()
+        write_frame(data, path, file_format)
+        write_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        read_frame(path, file_format)
+        read_seconds = time.perf_counter() - start
+        results.append({
+            "format": file_format,
+            "write_seconds": write_seconds,
+            "read_seconds": read_seconds,
+            "size_bytes": os.path.getsize(path),
+        })
+        os.remove(path)
+    report = pd.DataFrame(results)
+    print(report.to_string(index=False))
+    return report
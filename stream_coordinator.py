@@ -0,0 +1,399 @@
+"""
+stream_coordinator.py
+
+This script ingests tweets from several sources concurrently with asyncio. Each
+source (a live Twitter stream, a recorded file, or a socket serving JSON lines as a
+local stand-in) is rate-limited on its own and feeds one bounded queue shared by all
+sources. When the consumer falls behind, the queue fills up and every source waits
+before reading more, so backpressure reaches the sources instead of memory growing.
+Each record is tagged with the keyword group that matched it, and the consumer
+writes the merged stream into one series of raw batch files.
+
+Author: Satej
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import threading
+import time
+
+from replay_stream import load_records, status_from_record
+
+# Records that may wait in the merged queue before sources are paused
+MAX_QUEUED_RECORDS = 10000
+
+# Records per raw batch file written by write_batches
+DEFAULT_BATCH_SIZE = 1000
+
+# Seconds after which a partial batch is written anyway
+DEFAULT_FLUSH_SECONDS = 60
+
+# Seconds a stream thread waits on the event loop before checking whether the
+# consumer has stopped
+HANDOFF_CHECK_SECONDS = 1.0
+
+# Marks the end of the merged stream in the queue
+_DONE = object()
+
+def _status_record(status):
+    """
+    Converts a Status (or Status-like) object to a flat tweet record.
+    """
+    return {
+        "id": status.id,
+        "created_at": status.created_at,
+        "text": status.text,
+        "user": status.user.screen_name,
+        "location": status.user.location,
+    }
+
+def normalize_record(record):
+    """
+    Converts a recorded tweet (flat, or API JSON with a nested user) to a flat record.
+
+    Args:
+        record (dict): Tweet record.
+
+    Returns:
+        dict: Record with id, created_at, text, user and location.
+    """
+    return _status_record(status_from_record(record))
+
+class TokenBucket:
+    """
+    Async token bucket limiting a source to a sustained rate with bursts.
+    """
+    def __init__(self, rate, burst=None):
+        """
+        Args:
+            rate (float): Records per second.
+            burst (int, optional): Records that may be taken at once after an idle
+                period. Defaults to one second's worth.
+        """
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        """
+        Waits until a record may be taken.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return waited
+            delay = (1 - self.tokens) / self.rate
+            await asyncio.sleep(delay)
+            waited += delay
+
+async def file_source(file_path, repeat=1):
+    """
+    Yields the tweets of a recording (JSONL, CSV, Parquet or Feather).
+
+    Args:
+        file_path (str): Path to the recording.
+        repeat (int): Number of times to replay the file.
+
+    Yields:
+        dict: Flat tweet records.
+    """
+    records = [normalize_record(record) for record in load_records(file_path)]
+    for _ in range(repeat):
+        for record in records:
+            yield record
+            # Let the other sources run between records
+            await asyncio.sleep(0)
+
+async def socket_source(host, port):
+    """
+    Yields tweets sent as JSON lines over a TCP connection, e.g. by a local replay
+    server standing in for the API. TCP flow control carries backpressure to the
+    sender.
+
+    Args:
+        host (str): Server host.
+        port (int): Server port.
+
+    Yields:
+        dict: Flat tweet records.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            if line.strip():
+                yield normalize_record(json.loads(line))
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+async def twitter_source(keywords, max_pending=1000):
+    """
+    Yields tweets from a live filtered Twitter stream.
+
+    The tweepy stream runs in its own thread and hands each status to the event
+    loop; when the coordinator is not keeping up, the stream thread waits, which
+    slows reading from the connection. It stops waiting and disconnects once this
+    generator is closed or the event loop has shut down.
+
+    The v1.1 streaming API allows one filter connection per set of credentials, so
+    open a single twitter_source tracking the keywords of every group and add it
+    without a group; the coordinator then tags each record with match_group.
+
+    Args:
+        keywords (list): Keywords or hashtags to track.
+        max_pending (int): Statuses buffered between the stream thread and the loop.
+
+    Yields:
+        dict: Flat tweet records.
+    """
+    import tweepy
+    from data_collection import authenticate_twitter_api
+
+    loop = asyncio.get_running_loop()
+    pending = asyncio.Queue(max_pending)
+    stopped = threading.Event()
+
+    def hand_off(record):
+        """
+        Puts a record on the loop's queue from the stream thread, waiting while it is
+        full. Returns False if the consumer stopped before the record was taken.
+        """
+        put = pending.put(record)
+        try:
+            future = asyncio.run_coroutine_threadsafe(put, loop)
+        except RuntimeError:
+            # The loop is already closed
+            put.close()
+            return False
+        while True:
+            try:
+                future.result(timeout=HANDOFF_CHECK_SECONDS)
+                return True
+            except concurrent.futures.CancelledError:
+                # Cancelled by the loop shutting down
+                return False
+            except concurrent.futures.TimeoutError:
+                if stopped.is_set() or loop.is_closed():
+                    future.cancel()
+                    return False
+
+    class _LoopListener(tweepy.StreamListener):
+        def on_status(self, status):
+            # Returning False disconnects the stream
+            return not stopped.is_set() and hand_off(_status_record(status))
+
+        def on_error(self, status_code):
+            print(f"Stream for {keywords} failed with status {status_code}")
+            hand_off(None)
+            return False
+
+    api = authenticate_twitter_api()
+    stream = tweepy.Stream(auth=api.auth, listener=_LoopListener())
+    stream.filter(track=keywords, languages=["en"], is_async=True)
+    try:
+        while True:
+            record = await pending.get()
+            if record is None:
+                return
+            yield record
+    finally:
+        stopped.set()
+        stream.disconnect()
+
+class StreamCoordinator:
+    """
+    Runs ingestion sources concurrently and merges them into one bounded queue.
+    """
+    def __init__(self, keyword_groups=None, max_queued_records=MAX_QUEUED_RECORDS):
+        """
+        Args:
+            keyword_groups (dict, optional): Group name to list of keywords, used to
+                tag records from sources that are not tied to a single group.
+            max_queued_records (int): Capacity of the merged queue.
+        """
+        self.keyword_groups = {
+            group: [keyword.lower() for keyword in keywords]
+            for group, keywords in (keyword_groups or {}).items()
+        }
+        self.max_queued_records = max_queued_records
+        self.sources = []
+        self.queue = None
+        self.metrics = {}
+
+    def add_source(self, name, source, group=None, rate=None, burst=None):
+        """
+        Registers a source.
+
+        Args:
+            name (str): Unique source name.
+            source: Async iterator of flat tweet records, e.g. from file_source,
+                socket_source or twitter_source.
+            group (str, optional): Keyword group of every record from this source.
+                If unset, records are tagged by matching their text against the
+                keyword groups.
+            rate (float, optional): Maximum records per second from this source.
+            burst (int, optional): Burst size for the rate limit.
+        """
+        bucket = TokenBucket(rate, burst) if rate else None
+        self.sources.append((name, source, group, bucket))
+        self.metrics[name] = {"records": 0, "throttled_seconds": 0.0, "blocked_seconds": 0.0, "error": None}
+
+    def match_group(self, text):
+        """
+        Returns the first keyword group with a keyword in the text.
+
+        Args:
+            text (str): Tweet text.
+
+        Returns:
+            str: Group name, or None if no group matches.
+        """
+        lowered = (text or "").lower()
+        for group, keywords in self.keyword_groups.items():
+            if any(keyword in lowered for keyword in keywords):
+                return group
+        return None
+
+    async def _pump(self, name, source, group, bucket):
+        metrics = self.metrics[name]
+        try:
+            async for record in source:
+                if bucket is not None:
+                    metrics["throttled_seconds"] += await bucket.acquire()
+                record["group"] = group or self.match_group(record.get("text"))
+                record["source"] = name
+                if self.queue.full():
+                    start = time.perf_counter()
+                    await self.queue.put(record)
+                    metrics["blocked_seconds"] += time.perf_counter() - start
+                else:
+                    self.queue.put_nowait(record)
+                metrics["records"] += 1
+        except Exception as e:
+            metrics["error"] = str(e)
+            print(f"Source '{name}' failed: {e}")
+
+    async def get(self):
+        """
+        Returns the next merged record.
+
+        Returns:
+            dict: Tweet record tagged with 'group' and 'source', or None once every
+                source has finished.
+        """
+        record = await self.queue.get()
+        if record is _DONE:
+            # Leave the marker for any other consumer
+            self.queue.put_nowait(_DONE)
+            return None
+        return record
+
+    async def run(self, consumer):
+        """
+        Runs all sources and a consumer until the sources are exhausted.
+
+        Args:
+            consumer (function): Coroutine function called with this coordinator;
+                it should read records with get() until it returns None.
+
+        Returns:
+            dict: Per-source metrics.
+        """
+        self.queue = asyncio.Queue(self.max_queued_records)
+        pumps = [asyncio.create_task(self._pump(*source)) for source in self.sources]
+        sources_done = asyncio.ensure_future(asyncio.gather(*pumps))
+        consumer_task = asyncio.create_task(consumer(self))
+        try:
+            # If the consumer stops first (e.g. it failed), the sources must not stay
+            # blocked on the full queue
+            await asyncio.wait([sources_done, consumer_task], return_when=asyncio.FIRST_COMPLETED)
+            if not consumer_task.done():
+                await self.queue.put(_DONE)
+            await consumer_task
+        finally:
+            for task in pumps + [consumer_task]:
+                task.cancel()
+        for name, metrics in self.metrics.items():
+            print(f"Source '{name}': {metrics}")
+        return self.metrics
+
+async def write_batches(coordinator, writer, batch_size=DEFAULT_BATCH_SIZE, flush_seconds=DEFAULT_FLUSH_SECONDS):
+    """
+    Consumer that writes the merged records to raw batch files.
+
+    Batches are handed to the writer from a worker thread, so a busy writer slows
+    this consumer (and, through the queue, the sources) without blocking the loop.
+
+    Args:
+        coordinator (StreamCoordinator): Coordinator to read from.
+        writer (BatchWriter): Writer for the batch files.
+        batch_size (int): Records per batch file.
+        flush_seconds (float): Write a partial batch after this many seconds.
+    """
+    loop = asyncio.get_running_loop()
+    batch = []
+    deadline = time.monotonic() + flush_seconds
+    while True:
+        try:
+            record = await asyncio.wait_for(coordinator.get(), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            if batch:
+                await loop.run_in_executor(None, writer.submit, batch)
+                batch = []
+            deadline = time.monotonic() + flush_seconds
+            continue
+        if record is None:
+            if batch:
+                await loop.run_in_executor(None, writer.submit, batch)
+            return
+        batch.append(record)
+        if len(batch) >= batch_size:
+            await loop.run_in_executor(None, writer.submit, batch)
+            batch = []
+            deadline = time.monotonic() + flush_seconds
+
+def ingest(coordinator, file_format="csv", batch_size=DEFAULT_BATCH_SIZE, flush_seconds=DEFAULT_FLUSH_SECONDS):
+    """
+    Runs a coordinator and writes the merged stream to the raw tweets directory.
+
+    Args:
+        coordinator (StreamCoordinator): Coordinator with its sources added.
+        file_format (str): Format of the raw batch files.
+        batch_size (int): Records per batch file.
+        flush_seconds (float): Write a partial batch after this many seconds.
+
+    Returns:
+        dict: Per-source metrics.
+    """
+    from data_collection import BatchWriter
+
+    writer = BatchWriter(file_format=file_format)
+    try:
+        return asyncio.run(coordinator.run(
+            lambda coordinator: write_batches(coordinator, writer, batch_size, flush_seconds)))
+    finally:
+        writer.close()
+
+if __name__ == "__main__":
+    # Example: track two topic groups on one live stream (a second filter connection
+    # with the same credentials would be rejected); records are tagged by keyword
+    groups = {
+        "ai": ["#AI", "#MachineLearning"],
+        "data": ["#DataScience", "#BigData"],
+    }
+    coordinator = StreamCoordinator(groups)
+    all_keywords = [keyword for keywords in groups.values() for keyword in keywords]
+    coordinator.add_source("twitter", twitter_source(all_keywords), rate=100)
+    ingest(coordinator)
@@ -0,0 +1,174 @@
+"""
+synthetic_corpus.py
+
+This script generates seeded synthetic tweet corpora for benchmarks and load tests.
+Tweets have the same columns as the raw batches written by data_collection.py and
+realistic text: sentiment-bearing words, Zipf-distributed hashtags and user
+handles, URLs, retweets and copies of earlier tweets, and a skewed location
+distribution with missing values. The same seed always produces the same corpus.
+
+Author: Satej
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from stage_io import write_frame
+
+# Named corpus sizes used by the benchmark suite
+CORPUS_SIZES = {
+    "10k": 10_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+}
+
+# Rows generated per chunk, to bound memory for the large corpora
+DEFAULT_CHUNK_SIZE = 250_000
+
+NEUTRAL_WORDS = [
+    "the", "a", "this", "new", "model", "data", "team", "release", "today", "update",
+    "cloud", "python", "research", "paper", "results", "training", "open", "source",
+    "benchmark", "api", "launch", "week", "product", "users", "version", "code", "and",
+    "is", "with", "for", "our", "just", "about", "think", "really", "more", "network",
+]
+POSITIVE_WORDS = ["great", "love", "amazing", "excellent", "happy", "awesome", "impressive", "good"]
+NEGATIVE_WORDS = ["bad", "awful", "terrible", "hate", "broken", "disappointing", "sad", "worst"]
+HASHTAGS = [
+    "#AI", "#MachineLearning", "#DataScience", "#DeepLearning", "#Python", "#BigData",
+    "#NLP", "#Cloud", "#Analytics", "#Tech", "#LLM", "#Startups", "#OpenSource", "#IoT",
+]
+LOCATIONS = [
+    "New York, NY", "London, England", "San Francisco, CA", "Bangalore, India", "Mumbai, India",
+    "Toronto, Canada", "Berlin, Germany", "Paris, France", "Sydney, Australia", "Austin, TX",
+    "Seattle, WA", "Singapore", "Tokyo, Japan", "Lagos, Nigeria", "São Paulo, Brazil",
+]
+
+def _zipf_choice(rng, n_items, size, exponent=1.2):
+    """
+    Draws item indices with a Zipf-like (power law) popularity distribution.
+    """
+    weights = 1.0 / np.arange(1, n_items + 1) ** exponent
+    return rng.choice(n_items, size=size, p=weights / weights.sum())
+
+def _generate_chunk(rng, first_id, size, start, users, duplicate_rate, retweet_rate, url_rate, missing_location_rate):
+    """
+    Generates one chunk of synthetic tweets.
+    """
+    vocabulary = np.array(NEUTRAL_WORDS + POSITIVE_WORDS + NEGATIVE_WORDS, dtype=object)
+    n_neutral, n_positive = len(NEUTRAL_WORDS), len(POSITIVE_WORDS)
+
+    lengths = rng.integers(6, 21, size=size)
+    words = rng.integers(0, n_neutral, size=(size, 20))
+    # Each tweet leans positive, negative or neutral through a few sentiment words
+    mood = rng.choice(3, size=size, p=[0.4, 0.35, 0.25])
+    mood_words = np.where(mood[:, None] == 0,
+                          n_neutral + rng.integers(0, n_positive, size=(size, 3)),
+                          n_neutral + n_positive + rng.integers(0, len(NEGATIVE_WORDS), size=(size, 3)))
+    words[:, :3] = np.where(mood[:, None] == 2, words[:, :3], mood_words)
+    words = rng.permuted(words, axis=1)
+    tokens = vocabulary[words]
+
+    hashtags = np.array(HASHTAGS, dtype=object)[_zipf_choice(rng, len(HASHTAGS), size)]
+    has_url = rng.random(size) < url_rate
+    url_ids = rng.integers(0, 36 ** 8, size=size)
+    texts = [
+        " ".join(row[:length]) + " " + tag + (f" https://t.co/{np.base_repr(url_id, 36).lower()}" if url else "")
+        for row, length, tag, url, url_id in zip(tokens.tolist(), lengths.tolist(), hashtags.tolist(),
+                                                 has_url.tolist(), url_ids.tolist())
+    ]
+
+    user_names = users[_zipf_choice(rng, len(users), size, exponent=1.05)]
+    # Retweets and copy-pasted tweets repeat the text of earlier tweets in the chunk
+    sources = (np.arange(size) * rng.random(size)).astype(np.int64)
+    is_retweet = rng.random(size) < retweet_rate
+    is_copy = ~is_retweet & (rng.random(size) < duplicate_rate)
+    for i in np.flatnonzero(is_retweet | is_copy).tolist():
+        source = sources[i]
+        texts[i] = f"RT @{user_names[source]}: {texts[source]}" if is_retweet[i] else texts[source]
+
+    locations = np.array(LOCATIONS, dtype=object)[_zipf_choice(rng, len(LOCATIONS), size, exponent=1.5)]
+    locations[rng.random(size) < missing_location_rate] = None
+
+    offsets = np.sort(rng.integers(0, 24 * 3600, size=size))
+    return pd.DataFrame({
+        "id": np.arange(first_id, first_id + size, dtype=np.int64),
+        "created_at": pd.Timestamp(start) + pd.to_timedelta(offsets, unit="s"),
+        "text": texts,
+        "user": user_names,
+        "location": locations,
+    })
+
+def generate_corpus_chunks(n_rows, seed=0, chunk_size=DEFAULT_CHUNK_SIZE, start="2024-01-01", n_users=50_000,
+                           duplicate_rate=0.05, retweet_rate=0.15, url_rate=0.3, missing_location_rate=0.3):
+    """
+    Generates a synthetic tweet corpus in chunks.
+
+    Args:
+        n_rows (int): Total number of tweets.
+        seed (int): Random seed.
+        chunk_size (int): Tweets per chunk.
+        start (str): Start of the first day; each chunk covers the following day.
+        n_users (int): Number of distinct users.
+        duplicate_rate (float): Share of tweets copying an earlier tweet's text.
+        retweet_rate (float): Share of tweets that are retweets ('RT @user: ...').
+        url_rate (float): Share of tweets ending with a URL.
+        missing_location_rate (float): Share of tweets without a location.
+
+    Yields:
+        pd.DataFrame: Chunk with columns id, created_at, text, user, location.
+    """
+    rng = np.random.default_rng(seed)
+    users = np.array([f"user_{i}" for i in range(n_users)], dtype=object)
+    day = pd.Timestamp(start)
+    for first_id in range(1, n_rows + 1, chunk_size):
+        size = min(chunk_size, n_rows - first_id + 1)
+        yield _generate_chunk(rng, first_id, size, day, users, duplicate_rate, retweet_rate, url_rate,
+                              missing_location_rate)
+        day += pd.Timedelta(days=1)
+
+def generate_corpus(n_rows, seed=0, **kwargs):
+    """
+    Generates a synthetic tweet corpus as one DataFrame.
+
+    Args:
+        n_rows (int or str): Number of tweets, or a name from CORPUS_SIZES.
+        seed (int): Random seed.
+        **kwargs: Options passed to generate_corpus_chunks.
+
+    Returns:
+        pd.DataFrame: Tweets with columns id, created_at, text, user, location.
+    """
+    n_rows = CORPUS_SIZES.get(n_rows, n_rows)
+    return pd.concat(generate_corpus_chunks(n_rows, seed, **kwargs), ignore_index=True)
+
+def write_corpus(output_file, n_rows, seed=0, **kwargs):
+    """
+    Writes a synthetic corpus to a stage file, chunk by chunk for CSV.
+
+    Args:
+        output_file (str): Destination path; the format follows the extension.
+        n_rows (int or str): Number of tweets, or a name from CORPUS_SIZES.
+        seed (int): Random seed.
+        **kwargs: Options passed to generate_corpus_chunks.
+
+    Returns:
+        str: Path of the written file.
+    """
+    n_rows = CORPUS_SIZES.get(n_rows, n_rows)
+    directory = os.path.dirname(output_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if output_file.endswith(".csv"):
+        with open(output_file, "w", newline="") as f:
+            for i, chunk in enumerate(generate_corpus_chunks(n_rows, seed, **kwargs)):
+                chunk.to_csv(f, index=False, header=(i == 0))
+    else:
+        write_frame(generate_corpus(n_rows, seed, **kwargs), output_file)
+    print(f"Wrote {n_rows} synthetic tweets to {output_file}")
+    return output_file
+
+if __name__ == "__main__":
+    # Example: write the 10k corpus used by the quick benchmarks
+    write_corpus("./benchmarks/corpus_10k.csv", "10k")
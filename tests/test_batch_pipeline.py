@@ -0,0 +1,64 @@
+"""
+Tests for processing raw batches through the manifest: a stage is recorded as done
+only when it really succeeded, and a changed batch is deduplicated against other
+batches but not against its own earlier version.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import automation_pipeline
+import data_storage
+from batch_manifest import BatchManifest
+from data_preprocessing import preprocess_data
+from deduplication import Deduplicator
+from stage_io import read_frame
+from synthetic_corpus import generate_corpus
+
+RAW_FILE = os.path.join(automation_pipeline.RAW_TWEETS_DIR, "tweets_20240101_000000_0.csv")
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # The pipeline's directories, manifest and database are relative paths
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(data_storage, "_default_store", None)
+    automation_pipeline.ensure_directories()
+    yield tmp_path
+    if data_storage._default_store is not None:
+        data_storage._default_store.close()
+
+def completed_stages():
+    manifest = BatchManifest()
+    try:
+        return manifest.completed_stages(RAW_FILE)
+    finally:
+        manifest.close()
+
+def test_concurrent_failure_is_not_recorded_as_done(workdir):
+    generate_corpus(50, seed=0).to_csv(RAW_FILE, index=False)
+    automation_pipeline.process_new_batches(concurrent=True)
+    assert completed_stages() == set(automation_pipeline.BATCH_STAGES)
+
+    open(RAW_FILE, "w").close()
+    report = automation_pipeline.process_new_batches(concurrent=True)[os.path.normpath(RAW_FILE)]
+    assert {entry["stage"]: entry["status"] for entry in report}["preprocess"] == "failed"
+    assert completed_stages() == set()
+
+@pytest.mark.parametrize("concurrent", [False, True])
+def test_changed_batch_is_not_deduplicated_against_itself(workdir, concurrent):
+    tweets = generate_corpus(200, seed=0, duplicate_rate=0.0, retweet_rate=0.0)
+    tweets.to_csv(RAW_FILE, index=False)
+    automation_pipeline.process_new_batches(concurrent=concurrent, dedup=True)
+
+    extra = generate_corpus(50, seed=1, duplicate_rate=0.0, retweet_rate=0.0)
+    changed = pd.concat([tweets.iloc[50:], extra.assign(id=extra["id"] + 10_000)], ignore_index=True)
+    changed.to_csv(RAW_FILE, index=False)
+    automation_pipeline.process_new_batches(concurrent=concurrent, dedup=True)
+
+    expected = len(Deduplicator().deduplicate(preprocess_data(changed))[0])
+    paths = automation_pipeline.batch_output_paths(RAW_FILE)
+    output = paths["deduplicated"] if concurrent else paths["cleaned"]
+    assert len(read_frame(output)) == expected
+    assert expected > 150
@@ -0,0 +1,30 @@
+"""
+Tests for the Space-Saving heavy-hitter tracker used by the burst detector.
+"""
+
+import numpy as np
+
+from burst_detection import SpaceSaving
+
+def test_full_tracker_replaces_smallest_item():
+    tracker = SpaceSaving(k=3)
+    for item, count in [("a", 5), ("b", 2), ("c", 7), ("b", 2)]:
+        tracker.add(item, count)
+    tracker.add("d")
+    assert tracker.counts == {"a": 5, "c": 7, "d": 5}
+    tracker.add("e")
+    assert tracker.counts == {"c": 7, "d": 5, "e": 6}
+
+def test_heap_stays_bounded_and_counts_add_up():
+    rng = np.random.default_rng(0)
+    stream = [f"t{value}" for value in rng.zipf(1.3, 20_000)]
+    tracker = SpaceSaving(k=50)
+    for item in stream:
+        tracker.add(item)
+        assert len(tracker.heap) <= 2 * tracker.k
+    assert len(tracker.counts) == 50
+    assert sum(tracker.counts.values()) == len(stream)
+    assert [item for item, _ in tracker.top(3)] == ["t1", "t2", "t3"]
+
+    tracker.clear()
+    assert tracker.counts == {} and tracker.heap == []
@@ -0,0 +1,53 @@
+"""
+Parity tests for the batch cleaning engine: clean_text_batch must produce the same
+tokens as the per-tweet clean_text (NLTK word tokenizer) path.
+"""
+
+import pandas as pd
+import pytest
+
+from data_preprocessing import check_clean_text_parity, clean_text, clean_text_batch
+from synthetic_corpus import generate_corpus
+
+# Apostrophe-free contractions the Treebank tokenizer still splits, mixed with
+# punctuation, digits, URLs and non-ASCII text
+EDGE_CASES = [
+    "",
+    "   ",
+    "I cannot believe it",
+    "gonna gotta wanna gimme lemme",
+    "wanna! wannabe Wanna, WANNA",
+    "Cannot, CANNOT cannot.",
+    "gonnaa gotcha lemmee",
+    "don't won't can't I'm you're",
+    "Check https://example.com/x?y=1 and www.test.org now",
+    "http://a.b/c",
+    "Café naïve résumé coöperate",
+    "Straße München Ærø",
+    "日本語のツイート テスト",
+    "Привет мир",
+    "emoji 🚀🔥 party 🎉",
+    "full-width ｄｉｇｉｔｓ １２３ and arabic ٣٤٥",
+    "#AI @user_42 $TSLA 100% 3.14",
+    "tabs\tand\nnewlines\r\nhere",
+    "__init__ snake_case under_score",
+    "a b c d e",
+]
+
+def test_edge_cases_match_clean_text():
+    assert check_clean_text_parity(EDGE_CASES) == []
+
+def test_synthetic_corpus_matches_clean_text():
+    texts = generate_corpus(3000, seed=0)["text"].tolist()
+    assert check_clean_text_parity(texts) == []
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_single_text(text):
+    assert clean_text_batch([text]).iloc[0] == clean_text(text)
+
+def test_batch_keeps_index_and_treats_missing_as_empty():
+    texts = pd.Series(["Great day!", None, "Cannot wait"], index=[10, 20, 30])
+    cleaned = clean_text_batch(texts)
+    assert list(cleaned.index) == [10, 20, 30]
+    assert cleaned.loc[20] == ""
+    assert cleaned.loc[10] == clean_text("Great day!")
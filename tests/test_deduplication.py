@@ -0,0 +1,44 @@
+"""
+Tests for deduplicating a raw batch whose file changed after it was first processed.
+"""
+
+import pandas as pd
+
+from deduplication import Deduplicator, load_batch_record, save_batch_record
+
+def make_tweets(ids):
+    return pd.DataFrame({"id": ids, "cleaned_text": [f"tweet number {i} about topic {i * 7919}" for i in ids]})
+
+def deduplicate_batch(deduplicator, chunks, previous=None):
+    deduplicator.begin_batch(previous)
+    kept = [deduplicator.deduplicate(chunk)[0] for chunk in chunks]
+    return pd.concat(kept), deduplicator.end_batch()
+
+def test_changed_batch_is_not_a_duplicate_of_its_earlier_version(tmp_path):
+    state_path, record_path = str(tmp_path / "state.npz"), str(tmp_path / "record.npz")
+    deduplicator = Deduplicator()
+    first, record = deduplicate_batch(deduplicator, [make_tweets(range(200))])
+    assert len(first) == 200
+    deduplicator.save(state_path)
+    save_batch_record(record, record_path)
+
+    changed = make_tweets(list(range(50, 200)) + list(range(1000, 1050)))
+    # Without the record, the unchanged tweets count as duplicates of themselves
+    assert len(Deduplicator.load(state_path).deduplicate(changed)[0]) == 50
+
+    deduplicator = Deduplicator.load(state_path)
+    kept, record = deduplicate_batch(deduplicator, [changed.iloc[:120], changed.iloc[120:]],
+                                     load_batch_record(record_path))
+    assert len(kept) == 200
+    assert set(record["ids"].tolist()) == set(range(200)) | set(range(1000, 1050))
+    assert record["documents"] == [(0, 400)]
+
+def test_other_batches_and_repeats_are_still_dropped():
+    deduplicator = Deduplicator()
+    _, record = deduplicate_batch(deduplicator, [make_tweets(range(100))])
+    deduplicator.deduplicate(make_tweets(range(500, 600)))
+
+    changed = pd.concat([make_tweets(range(100)), make_tweets([10]), make_tweets([550])])
+    copied = make_tweets([2000]).assign(cleaned_text=make_tweets([520])["cleaned_text"])
+    kept, _ = deduplicate_batch(deduplicator, [changed.iloc[:60], changed.iloc[60:], copied], record)
+    assert kept["id"].tolist() == list(range(100))
@@ -0,0 +1,66 @@
+"""
+Tests for span memory tracing in the instrumentation module.
+"""
+
+import threading
+import tracemalloc
+
+import pytest
+
+import instrumentation
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    instrumentation.reset()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def span_peaks():
+    return {name: totals["peak_bytes"] for (name, _), totals in instrumentation.snapshot()["spans"].items()}
+
+def test_nested_spans_record_peaks():
+    instrumentation.enable(trace_memory=True)
+    with instrumentation.span("outer"):
+        with instrumentation.span("inner"):
+            block = bytearray(4_000_000)
+        del block
+    peaks = span_peaks()
+    assert peaks["inner"] >= 4_000_000
+    assert peaks["outer"] >= peaks["inner"]
+
+def test_spans_overlapping_other_threads_record_no_peak():
+    instrumentation.enable(trace_memory=True)
+    opened, release = threading.Event(), threading.Event()
+
+    def worker():
+        with instrumentation.span("worker"):
+            opened.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    opened.wait(5)
+    with instrumentation.span("main"):
+        release.set()
+    thread.join()
+    with instrumentation.span("alone"):
+        pass
+    peaks = span_peaks()
+    assert peaks["worker"] is None
+    assert peaks["main"] is None
+    assert peaks["alone"] is not None
+
+def test_disable_keeps_tracemalloc_started_by_caller():
+    tracemalloc.start()
+    instrumentation.enable(trace_memory=True)
+    instrumentation.disable()
+    assert tracemalloc.is_tracing()
+    tracemalloc.stop()
+
+    instrumentation.enable(trace_memory=True)
+    assert tracemalloc.is_tracing()
+    instrumentation.disable()
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,47 @@
+"""
+Tests for the pipeline DAG executor: a stage only counts as done when it actually
+rewrote its outputs.
+"""
+
+import json
+
+from data_preprocessing import preprocess_data
+from pipeline_dag import PipelineDAG, Stage
+from sentiment_analysis import perform_sentiment_analysis
+from synthetic_corpus import generate_corpus
+
+def build_dag(tmp_path, raw_path):
+    cleaned_path = str(tmp_path / "cleaned.csv")
+    sentiment_path = str(tmp_path / "sentiment.csv")
+    dag = PipelineDAG(str(tmp_path / "state.json"))
+    dag.add_stage(Stage("preprocess", preprocess_data, [raw_path], [cleaned_path],
+                        {"input_file": raw_path, "output_file": cleaned_path}))
+    dag.add_stage(Stage("sentiment", perform_sentiment_analysis, [cleaned_path], [sentiment_path],
+                        {"input_file": cleaned_path, "output_file": sentiment_path}))
+    return dag
+
+def statuses(report):
+    return {entry["stage"]: entry["status"] for entry in report}
+
+def test_emptied_raw_file_fails_instead_of_reusing_old_outputs(tmp_path):
+    raw_path = str(tmp_path / "raw.csv")
+    generate_corpus(20, seed=0).to_csv(raw_path, index=False)
+    assert statuses(build_dag(tmp_path, raw_path).run()) == {"preprocess": "ran", "sentiment": "ran"}
+    state = json.loads((tmp_path / "state.json").read_text())
+
+    open(raw_path, "w").close()
+    report = build_dag(tmp_path, raw_path).run()
+    assert statuses(report) == {"preprocess": "failed", "sentiment": "blocked"}
+    assert json.loads((tmp_path / "state.json").read_text()) == state
+
+def report_error_and_return(output_file):
+    print(f"Error: nothing written to {output_file}")
+
+def test_stage_leaving_its_output_untouched_fails(tmp_path):
+    output_path = tmp_path / "out.txt"
+    output_path.write_text("from an earlier run")
+    dag = PipelineDAG(str(tmp_path / "state.json"))
+    dag.add_stage(Stage("quiet", report_error_and_return, [], [str(output_path)],
+                        {"output_file": str(output_path)}))
+    assert statuses(dag.run()) == {"quiet": "failed"}
+    assert not (tmp_path / "state.json").exists()
@@ -0,0 +1,59 @@
+"""
+Parity tests for the batch sentiment engine: score_sentiment_batch must give the
+same VADER scores as calling polarity_scores on each text.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_preprocessing import clean_text_batch
+from nltk_resources import create_sentiment_analyzer
+from sentiment_analysis import SCORE_COLUMNS, score_sentiment_batch
+from synthetic_corpus import generate_corpus
+
+# Plain texts mixed with the cases VADER adjusts: negations, boosters, 'but',
+# idioms, all-caps words, punctuation emphasis and repeated words
+EDGE_CASES = [
+    "",
+    "x",
+    "good",
+    "good good bad",
+    "happy users excellent release",
+    "not good",
+    "really good",
+    "good but bad",
+    "the bomb",
+    "bad ass release",
+    "bad asset release",
+    "GOOD release",
+    "good!!",
+    "good??",
+    "user_ great",
+    "never so good",
+    "at least good",
+    "kind of good",
+    "hate hate love",
+]
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return create_sentiment_analyzer()
+
+def expected_scores(texts, analyzer):
+    scores = [analyzer.polarity_scores(text) for text in texts]
+    return np.array([[score[column] for column in SCORE_COLUMNS] for score in scores])
+
+def test_edge_cases_match_polarity_scores(analyzer):
+    scores = score_sentiment_batch(EDGE_CASES, analyzer)
+    np.testing.assert_array_equal(scores[SCORE_COLUMNS].to_numpy(), expected_scores(EDGE_CASES, analyzer))
+
+def test_cleaned_corpus_matches_polarity_scores(analyzer):
+    texts = clean_text_batch(generate_corpus(3000, seed=0)["text"])
+    scores = score_sentiment_batch(texts, analyzer)
+    np.testing.assert_array_equal(scores[SCORE_COLUMNS].to_numpy(), expected_scores(texts, analyzer))
+    assert scores.index.equals(texts.index)
+
+def test_labels_follow_compound_thresholds(analyzer):
+    scores = score_sentiment_batch(pd.Series(["excellent happy", "hate broken", "release"]), analyzer)
+    assert list(scores["sentiment"]) == ["positive", "negative", "neutral"]
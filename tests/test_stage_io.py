@@ -0,0 +1,42 @@
+"""
+Tests for the chunked stage file writer.
+"""
+
+import pandas as pd
+import pytest
+
+from data_preprocessing import preprocess_data
+from stage_io import FrameWriter, read_frame
+from synthetic_corpus import generate_corpus
+
+pytest.importorskip("pyarrow")
+
+@pytest.mark.parametrize("file_format", ["parquet", "feather"])
+def test_column_missing_from_first_chunk(tmp_path, file_format):
+    path = str(tmp_path / f"out.{file_format}")
+    chunks = [
+        pd.DataFrame({"id": [1, 2], "location": [None, None], "note": [None, None]}),
+        pd.DataFrame({"id": [3, 4], "location": ["Toronto, Canada", None], "note": ["late", None]}),
+    ]
+    with FrameWriter(path) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    data = read_frame(path)
+    assert data["id"].tolist() == [1, 2, 3, 4]
+    assert data["location"].tolist()[2] == "Toronto, Canada"
+    assert isinstance(data["location"].dtype, pd.CategoricalDtype)
+    assert data["note"].tolist()[2] == "late"
+
+@pytest.mark.parametrize("file_format", ["parquet", "feather"])
+def test_preprocess_chunks_with_missing_locations(tmp_path, file_format):
+    raw = generate_corpus(9, seed=0)
+    raw.loc[:2, "location"] = None
+    raw_path = str(tmp_path / "raw.csv")
+    output_path = str(tmp_path / f"out.{file_format}")
+    raw.to_csv(raw_path, index=False)
+
+    preprocess_data(raw_path, output_path, chunksize=3)
+    data = read_frame(output_path)
+    assert len(data) == 9
+    assert data["location"].iloc[:3].isna().all()
+    assert data["location"].iloc[3:].tolist() == raw["location"].iloc[3:].tolist()
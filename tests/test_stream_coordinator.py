@@ -0,0 +1,94 @@
+"""
+Tests for the live Twitter source: the stream thread must never block forever
+handing a status to an event loop that has stopped consuming.
+"""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import stream_coordinator
+
+tweepy = pytest.importorskip("tweepy")
+
+class FakeStream:
+    """
+    Stands in for tweepy.Stream: keeps the listener so the test can feed it.
+    """
+    instances = []
+
+    def __init__(self, auth, listener):
+        self.listener = listener
+        self.disconnected = False
+        FakeStream.instances.append(self)
+
+    def filter(self, **kwargs):
+        pass
+
+    def disconnect(self):
+        self.disconnected = True
+
+def make_status(status_id):
+    user = SimpleNamespace(screen_name="alice", location=None)
+    return SimpleNamespace(id=status_id, created_at="2024-01-01 00:00:00", text="ai news", user=user)
+
+@pytest.fixture
+def fake_stream(monkeypatch):
+    import data_collection
+    FakeStream.instances.clear()
+    monkeypatch.setattr(tweepy, "Stream", FakeStream)
+    monkeypatch.setattr(data_collection, "authenticate_twitter_api", lambda: SimpleNamespace(auth=None))
+    monkeypatch.setattr(stream_coordinator, "HANDOFF_CHECK_SECONDS", 0.05)
+
+def call_in_thread(func, *args):
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("value", func(*args)), daemon=True)
+    thread.start()
+    return thread, result
+
+def test_blocked_handoff_returns_once_consumer_stops(fake_stream):
+    async def scenario():
+        source = stream_coordinator.twitter_source(["ai"], max_pending=1)
+        first = asyncio.ensure_future(source.__anext__())
+        await asyncio.sleep(0.01)
+        listener = FakeStream.instances[0].listener
+
+        thread, result = call_in_thread(listener.on_status, make_status(1))
+        assert (await first)["id"] == 1
+        await asyncio.to_thread(thread.join, 5)
+        assert result["value"] is True
+
+        # Fill the queue, then block the stream thread on a second status
+        await asyncio.to_thread(listener.on_status, make_status(2))
+        blocked, result = call_in_thread(listener.on_status, make_status(3))
+        await asyncio.sleep(0.1)
+        assert blocked.is_alive()
+
+        await source.aclose()
+        await asyncio.to_thread(blocked.join, 5)
+        assert not blocked.is_alive()
+        assert result["value"] is False
+        assert FakeStream.instances[0].disconnected
+        assert listener.on_status(make_status(4)) is False
+
+    asyncio.run(scenario())
+
+# Closing the loop under a pending task is the point of this test
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnraisableExceptionWarning")
+def test_handoff_returns_when_loop_is_closed(fake_stream):
+    async def start():
+        # The source is left waiting for its first status when the loop closes
+        source = stream_coordinator.twitter_source(["ai"], max_pending=1)
+        first = asyncio.ensure_future(source.__anext__())
+        await asyncio.sleep(0.01)
+        return FakeStream.instances[0].listener, first
+
+    loop = asyncio.new_event_loop()
+    listener, first = loop.run_until_complete(start())
+    loop.close()
+    thread, result = call_in_thread(listener.on_status, make_status(1))
+    thread.join(5)
+    assert not thread.is_alive()
+    assert result["value"] is False
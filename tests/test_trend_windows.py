@@ -0,0 +1,41 @@
+"""
+Tests for the sliding-window trend engine: window totals must only ever hold the
+buckets still inside the window.
+"""
+
+import pandas as pd
+
+from trend_windows import SlidingWindowTrends
+
+def make_trends():
+    return SlidingWindowTrends(windows={"15min": 15 * 60, "1h": 60 * 60}, bucket_seconds=60, n_features=1024)
+
+def test_missing_timestamps_are_skipped():
+    trends = make_trends()
+    trends.ingest(["python release", "python bug", "cloud outage"],
+                  ["2024-01-01 00:00:00", None, "not a date"])
+    assert trends.stats()["15min"] == {"docs": 1, "buckets": 1}
+    assert list(trends.live_buckets) == [pd.Timestamp("2024-01-01", tz="UTC").value // 10 ** 9]
+
+    trends.expire(trends.latest_time + 2 * 60 * 60)
+    assert trends.stats()["1h"] == {"docs": 0, "buckets": 0}
+    assert trends.live_buckets == {}
+
+def test_late_tweets_after_expire_do_not_leak():
+    trends = make_trends()
+    start = pd.Timestamp("2024-01-01", tz="UTC")
+    trends.ingest(["python release"], [start])
+    now = trends.latest_time + 30 * 60
+    trends.expire(now)
+    assert trends.stats()["15min"]["docs"] == 0
+    assert trends.stats()["1h"]["docs"] == 1
+
+    # Out-of-order tweet for the bucket already dropped from the 15 minute window
+    trends.ingest(["python bug"], [start + pd.Timedelta(seconds=10)])
+    assert trends.stats()["15min"] == {"docs": 0, "buckets": 0}
+    assert trends.stats()["1h"] == {"docs": 2, "buckets": 1}
+    assert trends.top_terms("15min") == {}
+
+    trends.expire(now + 60 * 60)
+    assert trends.stats()["1h"] == {"docs": 0, "buckets": 0}
+    assert not trends.totals["1h"].doc_freq.any()
@@ -0,0 +1,36 @@
+"""
+Tests for the analyst query layer over the tweets database.
+"""
+
+import pandas as pd
+import pytest
+
+from data_storage import TweetStore, create_database
+from tweet_queries import TweetQueries
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "tweets.db")
+    create_database(path)
+    tweets = pd.DataFrame({
+        "id": [1, 2, 3],
+        "created_at": ["2024-01-02 10:00:00", "2024-01-01 09:00:00", "2024-01-03 08:00:00"],
+        "text": ["second tweet", "first tweet", "third tweet"],
+        "user": ["alice", "bob", "alice"],
+        "location": ["Toronto, Canada", None, "New York, NY"],
+        "sentiment": ["positive", "neutral", "negative"],
+    })
+    with TweetStore(path) as store:
+        store.upsert(tweets)
+    return path
+
+def test_between_without_bounds_returns_all_oldest_first(db_path):
+    with TweetQueries(db_path) as queries:
+        assert queries.between(None, None)["id"].tolist() == [2, 1, 3]
+        assert queries.between(None, None, limit=1)["id"].tolist() == [2]
+
+def test_between_with_one_bound(db_path):
+    with TweetQueries(db_path) as queries:
+        assert queries.between("2024-01-02", None)["id"].tolist() == [1, 3]
+        assert queries.between(None, "2024-01-02")["id"].tolist() == [2]
+        assert queries.between("2024-01-02", "2024-01-03")["id"].tolist() == [1]
@@ -0,0 +1,213 @@
+"""
+text_cache.py
+
+This script provides a memoization cache for per-text pipeline results, such as
+cleaned tweet text and sentiment labels. Retweets and spam make many tweets exact
+duplicates, so results are keyed on a hash of the input text and reused instead of
+recomputed. The cache is a bounded LRU in memory and can optionally be backed by an
+SQLite file so results survive between pipeline runs.
+
+Author: Satej
+"""
+
+import hashlib
+import sqlite3
+from collections import OrderedDict
+
+import pandas as pd
+
+from instrumentation import increment
+
+# Default number of entries kept in memory per cache
+DEFAULT_CACHE_SIZE = 100000
+
+def hash_text(text):
+    """
+    Computes the cache key for a piece of text.
+
+    Args:
+        text (str): Text to hash.
+
+    Returns:
+        str: Hex digest of the text's content hash.
+    """
+    return hashlib.blake2b(str(text).encode("utf-8"), digest_size=16).hexdigest()
+
+class TextCache:
+    """
+    LRU cache of text-derived results with hit/miss counters and optional SQLite backing.
+    """
+    def __init__(self, namespace, max_size=DEFAULT_CACHE_SIZE, db_path=None):
+        """
+        Args:
+            namespace (str): Name separating this cache's entries from other caches
+                sharing the same database (e.g. 'clean_text', 'sentiment').
+            max_size (int): Maximum number of entries kept in memory.
+            db_path (str, optional): Path to an SQLite file for persistent storage.
+        """
+        self.namespace = namespace
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.conn = None
+        if db_path:
+            self.conn = sqlite3.connect(db_path)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS text_cache (
+                    namespace TEXT,
+                    key TEXT,
+                    value TEXT,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            self.conn.commit()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _remember(self, key, value):
+        """
+        Stores a value in memory, evicting the least recently used entries if full.
+        """
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def _lookup(self, key):
+        """
+        Looks a key up in memory, then in the persistent store.
+
+        Returns:
+            The cached value, or None if the key is unknown.
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        if self.conn is not None:
+            row = self.conn.execute(
+                "SELECT value FROM text_cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is not None:
+                self._remember(key, row[0])
+                return row[0]
+        return None
+
+    def get(self, text):
+        """
+        Returns the cached result for a text, or None on a miss.
+
+        Args:
+            text (str): Input text.
+        """
+        value = self._lookup(hash_text(text))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put_many(self, items):
+        """
+        Stores results for several texts.
+
+        Args:
+            items (dict): Mapping of input text to result.
+        """
+        rows = []
+        for text, value in items.items():
+            key = hash_text(text)
+            self._remember(key, value)
+            rows.append((self.namespace, key, value))
+        self._persist(rows)
+
+    def _persist(self, rows):
+        """
+        Writes (namespace, key, value) rows to the persistent store in one transaction.
+        """
+        if self.conn is not None and rows:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO text_cache (namespace, key, value) VALUES (?, ?, ?)",
+                    rows,
+                )
+
+    def put(self, text, value):
+        """
+        Stores the result for a single text.
+
+        Args:
+            text (str): Input text.
+            value (str): Result to cache.
+        """
+        self.put_many({text: value})
+
+    def map(self, texts, compute_batch, key_prefix=""):
+        """
+        Maps a column of texts to results, computing only texts not already cached.
+
+        Duplicate texts within the batch are computed once. Every row served without
+        computation counts as a hit; every distinct text computed counts as a miss.
+
+        Args:
+            texts (pd.Series): Input texts.
+            compute_batch (function): Function mapping a Series of distinct uncached
+                texts to a Series (or list) of results in the same order.
+            key_prefix (str): Prefix added to the keys, so results of a different
+                kind for the same texts do not collide within the namespace.
+
+        Returns:
+            pd.Series: Results aligned with the input index.
+        """
+        keys = [key_prefix + hash_text(text) for text in texts]
+        results = {}
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key in results or key in missing:
+                continue
+            value = self._lookup(key)
+            if value is None:
+                missing[key] = text
+            else:
+                results[key] = value
+
+        if missing:
+            computed = list(compute_batch(pd.Series(list(missing.values()), dtype=object)))
+            rows = []
+            for key, value in zip(missing, computed):
+                self._remember(key, value)
+                results[key] = value
+                rows.append((self.namespace, key, value))
+            self._persist(rows)
+
+        self.misses += len(missing)
+        self.hits += len(keys) - len(missing)
+        increment("cache_misses", len(missing), namespace=self.namespace)
+        increment("cache_hits", len(keys) - len(missing), namespace=self.namespace)
+        return pd.Series([results[key] for key in keys], index=texts.index, name=texts.name, dtype=object)
+
+    def stats(self):
+        """
+        Returns the cache's counters.
+
+        Returns:
+            dict: Hits, misses, hit rate and number of entries held in memory.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.entries),
+        }
+
+    def close(self):
+        """
+        Closes the persistent store, if any.
+        """
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,241 @@
+"""
+trend_windows.py
+
+This script maintains trending-topic scores incrementally over sliding time windows.
+Instead of refitting TF-IDF on the full tweet history, each batch of new tweets is
+folded into per-bucket term statistics, running totals are kept for every window
+(e.g. last 15 minutes, hour and day), and buckets that fall out of a window are
+subtracted again. Terms are mapped to a fixed number of hashed features, so memory
+stays bounded regardless of vocabulary size.
+
+Author: Satej
+"""
+
+import re
+import zlib
+from collections import Counter, deque
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+# Sliding windows tracked by default, in seconds
+DEFAULT_WINDOWS = {"15min": 15 * 60, "1h": 60 * 60, "24h": 24 * 60 * 60}
+
+# Width of a time bucket, in seconds
+DEFAULT_BUCKET_SECONDS = 60
+
+# Number of hashed features (upper bound on distinct terms tracked)
+DEFAULT_N_FEATURES = 2 ** 18
+
+# Same token pattern as the TfidfVectorizer used by trending_topics.py
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+class _Bucket:
+    """
+    Term statistics for all tweets whose timestamp falls in one time bucket.
+    """
+    __slots__ = ("start", "docs", "doc_freq", "term_weight")
+
+    def __init__(self, start):
+        self.start = start
+        self.docs = 0
+        self.doc_freq = Counter()
+        self.term_weight = Counter()
+
+class _WindowTotals:
+    """
+    Running sums over the buckets currently inside one window.
+    """
+    def __init__(self, seconds, n_features):
+        self.seconds = seconds
+        self.docs = 0
+        self.doc_freq = np.zeros(n_features, dtype=np.int64)
+        self.term_weight = np.zeros(n_features, dtype=np.float64)
+        self.buckets = deque()
+
+    def add(self, bucket_stats, sign=1):
+        """
+        Adds (or with sign=-1, removes) a bucket's sparse statistics.
+        """
+        self.docs += sign * bucket_stats.docs
+        if bucket_stats.doc_freq:
+            idx = np.fromiter(bucket_stats.doc_freq.keys(), dtype=np.int64)
+            self.doc_freq[idx] += sign * np.fromiter(bucket_stats.doc_freq.values(), dtype=np.int64)
+        if bucket_stats.term_weight:
+            idx = np.fromiter(bucket_stats.term_weight.keys(), dtype=np.int64)
+            self.term_weight[idx] += sign * np.fromiter(bucket_stats.term_weight.values(), dtype=np.float64)
+
+class SlidingWindowTrends:
+    """
+    Incremental trending-topic engine over several sliding time windows.
+
+    A term's score in a window approximates the summed TF-IDF used by
+    trending_topics.extract_trending_topics: each tweet contributes its
+    length-normalized term frequency, which is weighted by the window's smoothed
+    inverse document frequency at query time.
+    """
+    def __init__(self, windows=None, bucket_seconds=DEFAULT_BUCKET_SECONDS,
+                 n_features=DEFAULT_N_FEATURES, stop_words=ENGLISH_STOP_WORDS):
+        """
+        Args:
+            windows (dict, optional): Mapping of window name to length in seconds.
+            bucket_seconds (int): Width of a time bucket in seconds.
+            n_features (int): Number of hashed features.
+            stop_words (iterable): Terms to ignore.
+        """
+        self.windows = dict(windows or DEFAULT_WINDOWS)
+        self.bucket_seconds = bucket_seconds
+        self.n_features = n_features
+        self.stop_words = frozenset(stop_words or ())
+        self.totals = {name: _WindowTotals(seconds, n_features) for name, seconds in self.windows.items()}
+        self.live_buckets = {}
+        self.feature_names = {}
+        self.latest_time = None
+
+    def _feature_index(self, term):
+        """
+        Maps a term to its hashed feature index and remembers a name for the feature.
+        """
+        index = zlib.crc32(term.encode("utf-8")) % self.n_features
+        self.feature_names[index] = term
+        return index
+
+    def _tokenize(self, text):
+        return [token for token in TOKEN_PATTERN.findall(str(text).lower()) if token not in self.stop_words]
+
+    def ingest(self, texts, timestamps):
+        """
+        Folds a batch of tweets into the windows. Cost is proportional to the batch.
+
+        Tweets whose timestamp is missing or cannot be parsed are skipped, since they
+        belong to no bucket.
+
+        Args:
+            texts (iterable): Cleaned tweet texts.
+            timestamps (iterable): Tweet creation times (datetimes or parseable strings).
+        """
+        texts = list(texts)
+        times = pd.to_datetime(pd.Series(list(timestamps), dtype=object), utc=True, errors="coerce")
+        valid = times.notna().to_numpy()
+        if not valid.all():
+            print(f"Skipping {int((~valid).sum())} tweets without a valid timestamp")
+            texts = [text for text, keep in zip(texts, valid) if keep]
+            times = times[valid]
+        epochs = ((times - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).tolist()
+        touched = {}
+        for text, epoch in zip(texts, epochs):
+            if self.latest_time is None or epoch > self.latest_time:
+                self.latest_time = epoch
+            start = epoch - epoch % self.bucket_seconds
+            bucket = touched.get(start)
+            if bucket is None:
+                bucket = touched[start] = _Bucket(start)
+            bucket.docs += 1
+            tokens = self._tokenize(text)
+            if not tokens:
+                continue
+            counts = Counter(self._feature_index(token) for token in tokens)
+            weight = 1.0 / len(tokens)
+            for index, count in counts.items():
+                bucket.doc_freq[index] += 1
+                bucket.term_weight[index] += count * weight
+
+        for start, delta in touched.items():
+            live = self.live_buckets.get(start)
+            is_new = live is None
+            if is_new:
+                live = self.live_buckets[start] = _Bucket(start)
+            live.docs += delta.docs
+            live.doc_freq.update(delta.doc_freq)
+            live.term_weight.update(delta.term_weight)
+            for totals in self.totals.values():
+                if self._is_expired(start, totals):
+                    continue
+                totals.add(delta)
+                if is_new:
+                    totals.buckets.append(live)
+        self.expire()
+
+    def _is_expired(self, start, totals, now=None):
+        """
+        Returns True if the bucket starting at `start` lies outside a window.
+        """
+        now = self.latest_time if now is None else now
+        return start + self.bucket_seconds <= now - totals.seconds
+
+    def ingest_frame(self, data, text_column="cleaned_text", time_column="created_at"):
+        """
+        Folds a DataFrame of cleaned tweets into the windows.
+
+        Args:
+            data (pd.DataFrame): Tweet data.
+            text_column (str): Column holding cleaned text.
+            time_column (str): Column holding creation timestamps.
+        """
+        self.ingest(data[text_column].fillna("").tolist(), data[time_column].tolist())
+
+    def expire(self, now=None):
+        """
+        Removes buckets that have fallen out of each window.
+
+        A `now` later than the latest tweet also becomes the new latest time, so
+        tweets arriving afterwards for buckets already removed are not added back.
+
+        Args:
+            now (int, optional): Current time as epoch seconds. Defaults to the
+                latest tweet timestamp seen.
+        """
+        if now is not None and (self.latest_time is None or now > self.latest_time):
+            self.latest_time = now
+        now = self.latest_time
+        if now is None:
+            return
+        for totals in self.totals.values():
+            kept = deque()
+            while totals.buckets:
+                bucket = totals.buckets.popleft()
+                if self._is_expired(bucket.start, totals, now):
+                    totals.add(bucket, sign=-1)
+                else:
+                    kept.append(bucket)
+            totals.buckets = kept
+
+        longest = max(self.totals.values(), key=lambda totals: totals.seconds)
+        for start in [start for start in self.live_buckets if self._is_expired(start, longest, now)]:
+            del self.live_buckets[start]
+
+    def top_terms(self, window, top_n=10):
+        """
+        Returns the highest-scoring terms in a window.
+
+        Args:
+            window (str): Window name, e.g. '1h'.
+            top_n (int): Number of terms to return.
+
+        Returns:
+            dict: Terms and their scores, highest first, in the same format as
+                trending_topics.extract_trending_topics.
+        """
+        totals = self.totals[window]
+        if totals.docs == 0:
+            return {}
+        present = np.flatnonzero(totals.doc_freq > 0)
+        if present.size == 0:
+            return {}
+        # Smoothed idf, matching TfidfVectorizer(smooth_idf=True)
+        idf = np.log((1 + totals.docs) / (1 + totals.doc_freq[present])) + 1
+        scores = totals.term_weight[present] * idf
+        top_n = min(top_n, present.size)
+        best = np.argpartition(-scores, top_n - 1)[:top_n]
+        best = best[np.argsort(-scores[best])]
+        return {self.feature_names.get(int(present[i]), str(present[i])): float(scores[i]) for i in best}
+
+    def stats(self):
+        """
+        Returns per-window document counts and number of live buckets.
+
+        Returns:
+            dict: Window name to {'docs', 'buckets'}.
+        """
+        return {name: {"docs": totals.docs, "buckets": len(totals.buckets)} for name, totals in self.totals.items()}
@@ -8,22 +8,23 @@ Author: Satej
 """
 
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-import matplotlib.pyplot as plt
 import os
+from instrumentation import increment, timed
+from stage_io import read_frame
 
 def load_data(file_path):
     """
-    Loads cleaned tweet data from a CSV file.
+    Loads cleaned tweet data from a stage file (CSV, Parquet or Feather), with the
+    low-cardinality columns as categoricals.
 
     Args:
-        file_path (str): Path to the CSV file containing cleaned tweet data.
+        file_path (str): Path to the file containing cleaned tweet data.
 
     Returns:
         pd.DataFrame: DataFrame with loaded tweet data.
     """
     try:
-        data = pd.read_csv(file_path)
+        data = read_frame(file_path)
         print(f"Loaded data from {file_path}, shape: {data.shape}")
         return data
     except Exception as e:
@@ -39,23 +40,34 @@ def extract_trending_topics(texts, top_n=10):
         top_n (int): Number of top keywords to extract.
 
     Returns:
-        dict: Dictionary of keywords and their TF-IDF scores.
+        dict: Dictionary of keywords and their TF-IDF scores, empty if the texts
+            contain no keywords (e.g. a batch whose tweets were all duplicates).
     """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
     vectorizer = TfidfVectorizer(max_features=top_n, stop_words='english')
-    tfidf_matrix = vectorizer.fit_transform(texts)
+    try:
+        tfidf_matrix = vectorizer.fit_transform(texts)
+    except ValueError:
+        # Raised for an empty vocabulary
+        return {}
     keywords = vectorizer.get_feature_names_out()
     scores = tfidf_matrix.sum(axis=0).A1  # Sum scores across all documents
     trending_topics = dict(zip(keywords, scores))
     return trending_topics
 
-def visualize_trending_topics(trending_topics, output_file):
+def visualize_trending_topics(trending_topics, output_file, show=True):
     """
     Visualizes trending topics using a bar chart and saves the visualization as an image.
 
     Args:
         trending_topics (dict): Dictionary of keywords and their scores.
         output_file (str): Path to save the bar chart image.
+        show (bool): If True, also display the chart. Pass False in headless runs,
+            where plt.show() would block.
     """
+    import matplotlib.pyplot as plt
+
     keywords = list(trending_topics.keys())
     scores = list(trending_topics.values())
 
@@ -67,22 +79,82 @@ def visualize_trending_topics(trending_topics, output_file):
     plt.gca().invert_yaxis()
     plt.tight_layout()
     plt.savefig(output_file)
-    plt.show()
+    if show:
+        plt.show()
+    plt.close()
     print(f"Trending topics visualization saved to {output_file}")
 
-def identify_and_visualize_trends(input_file, output_image):
+@timed("trending")
+def identify_and_visualize_trends(input_file, output_image, show=True):
     """
     Identifies and visualizes trending topics from cleaned tweet data.
 
     Args:
-        input_file (str): Path to the CSV file containing cleaned tweet data.
+        input_file (str or pd.DataFrame): Path to the stage file containing cleaned
+            tweet data, or the cleaned tweet data itself.
+        output_image (str): Path to save the trending topics visualization.
+        show (bool): If True, also display the chart.
+
+    Returns:
+        dict: Keywords and their TF-IDF scores.
+
+    Raises:
+        ValueError: If the input file cannot be loaded, so the pipeline records the
+            stage as failed instead of keeping an older chart.
+    """
+    data = input_file if isinstance(input_file, pd.DataFrame) else load_data(input_file)
+    if data is None:
+        raise ValueError(f"Could not load cleaned tweet data from {input_file}")
+    increment("rows_in", len(data), stage="trending")
+    trending_topics = extract_trending_topics(data["cleaned_text"].tolist())
+    print("Trending Topics Identified:", trending_topics)
+    visualize_trending_topics(trending_topics, output_image, show)
+    return trending_topics
+
+def update_and_visualize_window_trends(input_file, engine, output_image, window="1h", top_n=10):
+    """
+    Folds newly cleaned tweets into an incremental trending engine and visualizes
+    the top terms of one sliding window, without refitting on the full history.
+
+    Args:
+        input_file (str): Path to the stage file containing newly cleaned tweet data.
+        engine (SlidingWindowTrends): Incremental engine holding the window state.
         output_image (str): Path to save the trending topics visualization.
+        window (str): Name of the window to report, e.g. '15min', '1h' or '24h'.
+        top_n (int): Number of top keywords to report.
+
+    Returns:
+        dict: Keywords and their scores for the requested window.
     """
     data = load_data(input_file)
-    if data is not None:
-        trending_topics = extract_trending_topics(data["cleaned_text"].tolist())
-        print("Trending Topics Identified:", trending_topics)
+    if data is None:
+        return {}
+    engine.ingest_frame(data)
+    trending_topics = engine.top_terms(window, top_n)
+    print(f"Trending Topics Identified ({window} window):", trending_topics)
+    if trending_topics:
         visualize_trending_topics(trending_topics, output_image)
+    return trending_topics
+
+def detect_emerging_topics(input_file, detector):
+    """
+    Feeds newly cleaned tweets to a burst detector and reports emerging topics.
+
+    Args:
+        input_file (str): Path to the stage file containing newly cleaned tweet data.
+        detector (BurstDetector): Detector holding the sketch and baseline state.
+
+    Returns:
+        list: Emerging topics from every time bucket closed by this batch.
+    """
+    data = load_data(input_file)
+    if data is None:
+        return []
+    emerging = detector.ingest_frame(data)
+    for topic in emerging:
+        print(f"Emerging topic at {topic['bucket_start']}: {topic['term']} "
+              f"(count {topic['count']:.0f}, baseline {topic['baseline']:.1f}, z {topic['zscore']:.1f})")
+    return emerging
 
 if __name__ == "__main__":
     # Example usage with file paths (replace with your own)
@@ -0,0 +1,269 @@
+"""
+tweet_queries.py
+
+This script provides the analyst query layer over the tweets database. Queries use
+the secondary indexes and the FTS5 full-text index created by data_storage.py, so
+keyword, time-range, per-user and per-sentiment lookups read only the matching
+rows instead of scanning the table or loading it into pandas.
+
+Author: Satej
+"""
+
+import sqlite3
+
+import pandas as pd
+
+from data_storage import DATABASE_PATH
+from tweet_schema import apply_schema
+
+# Columns returned by the lookup queries
+RESULT_COLUMNS = "t.id, t.created_at, t.text, t.user, t.location, t.sentiment"
+
+# Default maximum number of rows returned per query
+DEFAULT_LIMIT = 1000
+
+def _time_value(value):
+    """
+    Formats a time bound the way created_at is stored ('YYYY-MM-DD HH:MM:SS').
+    """
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+    return str(timestamp)
+
+class TweetQueries:
+    """
+    Read-only query interface over the tweets table.
+    """
+    def __init__(self, db_path=None):
+        """
+        Args:
+            db_path (str, optional): Path to the database file. Defaults to DATABASE_PATH.
+        """
+        self.db_path = db_path or DATABASE_PATH
+        self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _query(self, sql, params):
+        return apply_schema(pd.read_sql_query(sql, self.conn, params=params))
+
+    @staticmethod
+    def _time_filters(start, end, conditions, params):
+        if start is not None:
+            conditions.append("t.created_at >= ?")
+            params.append(_time_value(start))
+        if end is not None:
+            conditions.append("t.created_at < ?")
+            params.append(_time_value(end))
+
+    def search(self, keywords, start=None, end=None, limit=DEFAULT_LIMIT):
+        """
+        Full-text search over tweet text, best matches first.
+
+        Args:
+            keywords (str): FTS5 query, e.g. 'climate AND policy' or '"machine learning"'.
+            start (optional): Earliest created_at to include.
+            end (optional): Created_at upper bound (exclusive).
+            limit (int): Maximum number of rows.
+
+        Returns:
+            pd.DataFrame: Matching tweets.
+        """
+        conditions = ["tweets_fts MATCH ?"]
+        params = [keywords]
+        self._time_filters(start, end, conditions, params)
+        params.append(limit)
+        sql = (f"SELECT {RESULT_COLUMNS} FROM tweets_fts "
+               f"JOIN tweets t ON t.id = tweets_fts.rowid "
+               f"WHERE {' AND '.join(conditions)} ORDER BY tweets_fts.rank LIMIT ?")
+        return self._query(sql, params)
+
+    def between(self, start, end, limit=DEFAULT_LIMIT):
+        """
+        Returns tweets created in a time range, oldest first.
+
+        Args:
+            start: Earliest created_at to include, or None for no lower bound.
+            end: Created_at upper bound (exclusive), or None for no upper bound.
+            limit (int): Maximum number of rows.
+
+        Returns:
+            pd.DataFrame: Matching tweets.
+        """
+        conditions, params = [], []
+        self._time_filters(start, end, conditions, params)
+        params.append(limit)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        sql = f"SELECT {RESULT_COLUMNS} FROM tweets t {where}ORDER BY t.created_at LIMIT ?"
+        return self._query(sql, params)
+
+    def by_user(self, user, start=None, end=None, limit=DEFAULT_LIMIT):
+        """
+        Returns a user's tweets, newest first.
+
+        Args:
+            user (str): Screen name.
+            start (optional): Earliest created_at to include.
+            end (optional): Created_at upper bound (exclusive).
+            limit (int): Maximum number of rows.
+
+        Returns:
+            pd.DataFrame: Matching tweets.
+        """
+        conditions, params = ["t.user = ?"], [user]
+        self._time_filters(start, end, conditions, params)
+        params.append(limit)
+        sql = (f"SELECT {RESULT_COLUMNS} FROM tweets t WHERE {' AND '.join(conditions)} "
+               f"ORDER BY t.created_at DESC LIMIT ?")
+        return self._query(sql, params)
+
+    def by_sentiment(self, sentiment, start=None, end=None, limit=DEFAULT_LIMIT):
+        """
+        Returns tweets with a given sentiment label, newest first.
+
+        Args:
+            sentiment (str): 'positive', 'neutral' or 'negative'.
+            start (optional): Earliest created_at to include.
+            end (optional): Created_at upper bound (exclusive).
+            limit (int): Maximum number of rows.
+
+        Returns:
+            pd.DataFrame: Matching tweets.
+        """
+        conditions, params = ["t.sentiment = ?"], [sentiment]
+        self._time_filters(start, end, conditions, params)
+        params.append(limit)
+        sql = (f"SELECT {RESULT_COLUMNS} FROM tweets t WHERE {' AND '.join(conditions)} "
+               f"ORDER BY t.created_at DESC LIMIT ?")
+        return self._query(sql, params)
+
+    def by_location(self, location, limit=DEFAULT_LIMIT):
+        """
+        Returns tweets from a given location.
+
+        Args:
+            location (str): Location string as reported by the user profile.
+            limit (int): Maximum number of rows.
+
+        Returns:
+            pd.DataFrame: Matching tweets.
+        """
+        sql = f"SELECT {RESULT_COLUMNS} FROM tweets t WHERE t.location = ? LIMIT ?"
+        return self._query(sql, [location, limit])
+
+    def sentiment_by_hour(self, start=None, end=None):
+        """
+        Returns tweet counts per hour and sentiment from the rollup table.
+
+        Args:
+            start (optional): Earliest hour to include.
+            end (optional): Hour upper bound (exclusive).
+
+        Returns:
+            pd.DataFrame: Columns hour, sentiment, tweet_count.
+        """
+        conditions, params = ["1"], []
+        if start is not None:
+            conditions.append("hour >= ?")
+            params.append(_time_value(start))
+        if end is not None:
+            conditions.append("hour < ?")
+            params.append(_time_value(end))
+        sql = (f"SELECT hour, sentiment, tweet_count FROM rollup_hourly_sentiment "
+               f"WHERE {' AND '.join(conditions)} ORDER BY hour, sentiment")
+        return self._query(sql, params)
+
+    def sentiment_totals(self):
+        """
+        Returns the number of tweets per sentiment label from the rollup table.
+
+        Returns:
+            pd.Series: Tweet counts indexed by sentiment.
+        """
+        sql = "SELECT sentiment, SUM(tweet_count) AS tweet_count FROM rollup_hourly_sentiment GROUP BY sentiment"
+        return self._query(sql, []).set_index("sentiment")["tweet_count"]
+
+    def volume_by_day(self):
+        """
+        Returns the number of tweets per day from the rollup table.
+
+        Returns:
+            pd.Series: Tweet counts indexed by day ('YYYY-MM-DD').
+        """
+        sql = ("SELECT substr(hour, 1, 10) AS day, SUM(tweet_count) AS tweet_count "
+               "FROM rollup_hourly_sentiment GROUP BY day ORDER BY day")
+        return self._query(sql, []).set_index("day")["tweet_count"]
+
+    def top_locations(self, top_n=10, start_day=None, end_day=None):
+        """
+        Returns the locations with the most tweets from the rollup table.
+
+        Args:
+            top_n (int): Number of locations.
+            start_day (str, optional): Earliest day ('YYYY-MM-DD') to include.
+            end_day (str, optional): Day upper bound (exclusive).
+
+        Returns:
+            pd.Series: Tweet counts indexed by location, highest first.
+        """
+        conditions, params = ["location != ''"], []
+        if start_day is not None:
+            conditions.append("day >= ?")
+            params.append(start_day)
+        if end_day is not None:
+            conditions.append("day < ?")
+            params.append(end_day)
+        params.append(top_n)
+        sql = (f"SELECT location, SUM(tweet_count) AS tweet_count FROM rollup_daily_location "
+               f"WHERE {' AND '.join(conditions)} GROUP BY location ORDER BY tweet_count DESC LIMIT ?")
+        return self._query(sql, params).set_index("location")["tweet_count"]
+
+    def top_keywords(self, top_n=10, start_day=None, end_day=None):
+        """
+        Returns the hashtags used in the most tweets from the rollup table.
+
+        Args:
+            top_n (int): Number of keywords.
+            start_day (str, optional): Earliest day ('YYYY-MM-DD') to include.
+            end_day (str, optional): Day upper bound (exclusive).
+
+        Returns:
+            pd.Series: Tweet counts indexed by keyword, highest first.
+        """
+        conditions, params = ["1"], []
+        if start_day is not None:
+            conditions.append("day >= ?")
+            params.append(start_day)
+        if end_day is not None:
+            conditions.append("day < ?")
+            params.append(end_day)
+        params.append(top_n)
+        sql = (f"SELECT keyword, SUM(tweet_count) AS tweet_count FROM rollup_daily_keyword "
+               f"WHERE {' AND '.join(conditions)} GROUP BY keyword ORDER BY tweet_count DESC LIMIT ?")
+        return self._query(sql, params).set_index("keyword")["tweet_count"]
+
+    def explain(self, sql, params=()):
+        """
+        Returns SQLite's query plan, to check that a query uses an index.
+
+        Args:
+            sql (str): Query to explain.
+            params (tuple): Query parameters.
+
+        Returns:
+            list: Plan detail strings.
+        """
+        return [row[3] for row in self.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+    def close(self):
+        """
+        Closes the connection.
+        """
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,139 @@
+"""
+tweet_schema.py
+
+This script defines the column types shared by all pipeline stages. The
+low-cardinality tweet columns (user, location and sentiment) are kept as pandas
+categoricals: each distinct string is stored once and the rows hold small integer
+codes. Compared with object columns of Python strings, this takes far less memory
+and makes value_counts and groupby work on the integer codes. Categoricals are
+written to Parquet and Feather as dictionary-encoded Arrow columns, so they come
+back as categoricals; CSV files are parsed straight into them. In SQLite, the same
+columns are stored as ids into lookup tables (see data_storage.py).
+
+Author: Satej
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+# Sentiment labels in code order; the categories are fixed, so codes mean the same
+# thing in every batch
+SENTIMENT_LABELS = ["negative", "neutral", "positive"]
+SENTIMENT_DTYPE = pd.CategoricalDtype(SENTIMENT_LABELS)
+
+# Categorical columns and their dtype; 'category' means the categories are the
+# distinct values of the data
+CATEGORICAL_COLUMNS = {
+    "user": "category",
+    "location": "category",
+    "sentiment": SENTIMENT_DTYPE,
+}
+
+# dtype argument for pd.read_csv, so CSV columns are never materialized as objects
+CSV_DTYPES = {column: "category" for column in CATEGORICAL_COLUMNS}
+
+def apply_schema(data):
+    """
+    Converts the categorical columns present in a DataFrame to their shared dtype.
+
+    Columns that already have it are left untouched, so this is cheap to call at
+    every stage boundary.
+
+    Args:
+        data (pd.DataFrame): Tweet data.
+
+    Returns:
+        pd.DataFrame: The same data with categorical columns (a new DataFrame if
+            any column was converted).
+    """
+    converted = {}
+    for column, dtype in CATEGORICAL_COLUMNS.items():
+        if column not in data.columns:
+            continue
+        series = data[column]
+        if dtype == "category":
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                converted[column] = series.astype("category")
+        elif series.dtype != dtype:
+            converted[column] = series.astype(dtype)
+    return data.assign(**converted) if converted else data
+
+def sentiment_from_codes(codes):
+    """
+    Builds a sentiment column from label codes without creating label strings.
+
+    Args:
+        codes (np.ndarray): Index into SENTIMENT_LABELS per row, -1 for missing.
+
+    Returns:
+        pd.Categorical: Sentiment labels.
+    """
+    return pd.Categorical.from_codes(codes, dtype=SENTIMENT_DTYPE)
+
+def benchmark_schema(n_rows=10_000_000, n_users=100_000, n_locations=500, seed=0):
+    """
+    Compares memory use and groupby time of object, string and categorical tweet
+    columns.
+
+    All frames hold the same values. The object frame shares one string object per
+    distinct value (data read from a file would not), so its real footprint is
+    smaller than the deep memory reported, but its per-row pointers and hashing
+    costs are the same.
+
+    Args:
+        n_rows (int): Number of rows.
+        n_users (int): Number of distinct users.
+        n_locations (int): Number of distinct locations.
+        seed (int): Random seed.
+
+    Returns:
+        dict: Deep memory in MB and seconds per operation, per layout.
+    """
+    rng = np.random.default_rng(seed)
+    users = np.array([f"user_{i}" for i in range(n_users)], dtype=object)
+    locations = np.array([f"City {i}, Country {i % 50}" for i in range(n_locations)], dtype=object)
+    codes = {
+        "user": rng.integers(0, n_users, n_rows),
+        "location": rng.zipf(1.5, n_rows) % n_locations,
+        "sentiment": rng.integers(0, len(SENTIMENT_LABELS), n_rows),
+    }
+    categorical = pd.DataFrame({
+        "user": pd.Categorical.from_codes(codes["user"], users),
+        "location": pd.Categorical.from_codes(codes["location"], locations),
+        "sentiment": sentiment_from_codes(codes["sentiment"]),
+        "compound": rng.uniform(-1, 1, n_rows),
+    })
+    plain = pd.DataFrame({
+        "user": pd.Series(users[codes["user"]], dtype=object),
+        "location": pd.Series(locations[codes["location"]], dtype=object),
+        "sentiment": pd.Series(np.array(SENTIMENT_LABELS, dtype=object)[codes["sentiment"]], dtype=object),
+        "compound": categorical["compound"].to_numpy(),
+    })
+    # The string dtype pandas infers for text columns (Arrow-backed when available)
+    strings = plain.astype({column: "str" for column in CATEGORICAL_COLUMNS})
+    del codes
+
+    operations = {
+        "sentiment_counts": lambda data: data["sentiment"].value_counts(),
+        "location_sentiment_counts": lambda data: data.groupby(["location", "sentiment"], observed=True).size(),
+        "user_mean_compound": lambda data: data.groupby("user", observed=True)["compound"].mean(),
+    }
+    layouts = {"object": plain, "string": strings, "categorical": categorical}
+    report = {"rows": n_rows}
+    for layout, data in layouts.items():
+        report[f"{layout}_memory_mb"] = data.memory_usage(deep=True).sum() / 1e6
+        for name, operation in operations.items():
+            start = time.perf_counter()
+            operation(data)
+            report[f"{layout}_{name}_seconds"] = time.perf_counter() - start
+
+    print("Memory: " + ", ".join(f"{layout} {report[f'{layout}_memory_mb']:.0f} MB" for layout in layouts))
+    for name in operations:
+        print(f"{name}: " + ", ".join(f"{layout} {report[f'{layout}_{name}_seconds']:.3f}s" for layout in layouts))
+    return report
+
+if __name__ == "__main__":
+    # Example: memory and groupby comparison on 10M rows
+    benchmark_schema()
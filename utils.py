@@ -9,37 +9,243 @@ Author: Satej
 """
 
 import os
+import sys
+import atexit
+import queue
+import threading
+import time
 import logging
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 
-# Configure logging
+# Logging configuration, applied on first use
 LOG_FILE = "./logs/project_log.log"
-os.makedirs("./logs/", exist_ok=True)
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
+_logging_configured = False
 
-def log_message(level, message):
+def configure_logging():
+    """
+    Creates the log directory and sets up the project log file, once per process.
+    """
+    global _logging_configured
+    if _logging_configured:
+        return
+    os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+    logging.basicConfig(
+        filename=LOG_FILE,
+        level=logging.INFO,
+        format=LOG_FORMAT,
+        datefmt=LOG_DATE_FORMAT
+    )
+    _logging_configured = True
+
+# Log levels accepted by log_message
+LOG_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+}
+
+# Whether log messages are also printed to the console
+CONSOLE_ECHO = True
+CONSOLE_FORMAT = "%(levelname)s: %(message)s"
+
+# Maximum number of distinct messages tracked by the rate limiter
+MAX_RATE_LIMIT_KEYS = 10000
+
+_log_queue = None
+_queue_listener = None
+_queue_handler = None
+_file_handlers = []
+
+def log_message(level, message, *args):
     """
     Logs a message to the project log file.
 
+    Messages below the configured log level return before any formatting. The
+    message may use %-style placeholders filled from args, or be a callable that
+    builds the message; either way the work is only done if the message is logged.
+    In asynchronous mode (see start_async_logging) the caller only enqueues the
+    message and args; the log record is built and formatted on the logging thread,
+    so args must not be modified after the call.
+
     Args:
-        level (str): The severity level of the log ('info', 'warning', 'error').
-        message (str): The message to log.
-    """
-    if level.lower() == "info":
-        logging.info(message)
-    elif level.lower() == "warning":
-        logging.warning(message)
-    elif level.lower() == "error":
-        logging.error(message)
-    else:
-        logging.debug(message)
-    print(f"{level.upper()}: {message}")
+        level (str): The severity level of the log ('debug', 'info', 'warning', 'error').
+        message (str or function): The message to log, or a function returning it.
+        *args: Values for %-style placeholders in the message.
+    """
+    if not _logging_configured:
+        configure_logging()
+    levelno = LOG_LEVELS.get(level.lower(), logging.DEBUG)
+    logger = logging.getLogger()
+    if not logger.isEnabledFor(levelno):
+        return
+    if callable(message):
+        message = message()
+    if _log_queue is not None:
+        _log_queue.put((levelno, message, args, time.time()))
+        return
+    logger.log(levelno, message, *args)
+    if CONSOLE_ECHO:
+        print(f"{level.upper()}: {message % args if args else message}")
+
+def set_console_echo(enabled):
+    """
+    Turns printing of log messages to the console on or off.
+
+    Args:
+        enabled (bool): True to print messages, False to only write the log file.
+    """
+    global CONSOLE_ECHO
+    CONSOLE_ECHO = enabled
+
+class RateLimitFilter(logging.Filter):
+    """
+    Drops repeats of the same message (same level and formatted text) within an
+    interval. Messages that only share a template, such as errors for different
+    files, are not treated as repeats.
+    The next message let through reports how many repeats were dropped.
+    """
+    def __init__(self, interval_seconds):
+        """
+        Args:
+            interval_seconds (float): Minimum time between two identical messages.
+        """
+        super().__init__()
+        self.interval_seconds = interval_seconds
+        self._last_seen = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.levelno, record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_seen.get(key)
+            if last is not None and now - last < self.interval_seconds:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            if len(self._last_seen) >= MAX_RATE_LIMIT_KEYS:
+                self._last_seen.clear()
+            self._last_seen[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.msg = f"{record.msg} (suppressed {suppressed} identical messages)"
+        return True
+
+class _LogListener(QueueListener):
+    """
+    Queue listener that builds log records for messages enqueued by log_message
+    and applies the optional rate limit before writing.
+    """
+    def __init__(self, log_queue, *handlers, rate_limit_filter=None):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.rate_limit_filter = rate_limit_filter
+
+    def prepare(self, record):
+        if isinstance(record, tuple):
+            levelno, message, args, created = record
+            record = logging.LogRecord("root", levelno, "", 0, message, args or None, None)
+            record.created = created
+            record.msecs = (created - int(created)) * 1000
+        return record
+
+    def handle(self, record):
+        record = self.prepare(record)
+        if self.rate_limit_filter is not None and not self.rate_limit_filter.filter(record):
+            return
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+def start_async_logging(console_echo=None, rate_limit_seconds=None):
+    """
+    Moves log formatting and file (and console) writes onto a background thread.
+
+    log_message then only enqueues the message; records logged through the logging
+    module directly go through a QueueHandler on the root logger. Call
+    stop_async_logging to flush; it is also called at interpreter exit.
+
+    Args:
+        console_echo (bool, optional): Echo messages to the console from the
+            logging thread. Defaults to CONSOLE_ECHO.
+        rate_limit_seconds (float, optional): If set, drop repeats of the same
+            message within this many seconds.
+    """
+    global _log_queue, _queue_listener, _queue_handler, _file_handlers
+    if _queue_listener is not None:
+        return
+    configure_logging()
+    root = logging.getLogger()
+    _file_handlers = root.handlers[:]
+    handlers = list(_file_handlers)
+    if CONSOLE_ECHO if console_echo is None else console_echo:
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        handlers.append(console)
+
+    log_queue = queue.SimpleQueue()
+    rate_limit_filter = RateLimitFilter(rate_limit_seconds) if rate_limit_seconds else None
+    _queue_handler = QueueHandler(log_queue)
+    for handler in _file_handlers:
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    _queue_listener = _LogListener(log_queue, *handlers, rate_limit_filter=rate_limit_filter)
+    _queue_listener.start()
+    _log_queue = log_queue
+    atexit.register(stop_async_logging)
+
+def stop_async_logging():
+    """
+    Writes all queued log records and returns to synchronous logging.
+    """
+    global _log_queue, _queue_listener, _queue_handler
+    if _queue_listener is None:
+        return
+    _log_queue = None
+    _queue_listener.stop()
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    for handler in _queue_listener.handlers:
+        if handler not in _file_handlers:
+            handler.close()
+    for handler in _file_handlers:
+        root.addHandler(handler)
+    _queue_listener = None
+    _queue_handler = None
+
+def benchmark_logging(n_messages=100000):
+    """
+    Compares the caller-side cost of log_message in synchronous and asynchronous mode.
+
+    Args:
+        n_messages (int): Number of messages logged per mode.
+
+    Returns:
+        dict: Microseconds per call for each mode.
+    """
+    echo = CONSOLE_ECHO
+    set_console_echo(False)
+    results = {}
+    try:
+        start = time.perf_counter()
+        for i in range(n_messages):
+            log_message("info", "Benchmark message %d", i)
+        results["sync_us"] = (time.perf_counter() - start) / n_messages * 1e6
+
+        start_async_logging(console_echo=False)
+        start = time.perf_counter()
+        for i in range(n_messages):
+            log_message("info", "Benchmark message %d", i)
+        results["async_us"] = (time.perf_counter() - start) / n_messages * 1e6
+        stop_async_logging()
+    finally:
+        set_console_echo(echo)
+    print(f"log_message cost per call: {results}")
+    return results
 
 def validate_file_path(file_path):
     """
@@ -52,10 +258,10 @@ def validate_file_path(file_path):
         bool: True if the file exists, False otherwise.
     """
     if os.path.exists(file_path):
-        log_message("info", f"File validated: {file_path}")
+        log_message("info", "File validated: %s", file_path)
         return True
     else:
-        log_message("error", f"File not found: {file_path}")
+        log_message("error", "File not found: %s", file_path)
         return False
 
 def create_directory(directory_path):
@@ -71,33 +277,59 @@ def create_directory(directory_path):
     except Exception as e:
         log_message("error", f"Error creating directory {directory_path}: {e}")
 
-def get_latest_file(directory, extension=".csv"):
+def list_files(directory, extension=".csv", prefix="", newer_than=None):
     """
-    Retrieves the latest file in a directory based on modification time.
+    Lists the files in a directory, oldest first by modification time.
+
+    Hidden files (such as the '.tmp' files of batches still being written) are
+    skipped.
 
     Args:
         directory (str): Directory to search for files.
-        extension (str): File extension to filter by (default is '.csv').
+        extension (str or tuple): File extension(s) to filter by (default is '.csv').
+        prefix (str): Only include file names starting with this prefix.
+        newer_than (float, optional): Only include files modified after this Unix
+            timestamp.
 
     Returns:
-        str: Path to the latest file, or None if no files are found.
+        list: Paths of the matching files, or an empty list if there are none.
     """
     try:
         files = [
             os.path.join(directory, f)
             for f in os.listdir(directory)
-            if f.endswith(extension)
+            if f.endswith(extension) and f.startswith(prefix) and not f.startswith(".")
         ]
-        if files:
-            latest_file = max(files, key=os.path.getmtime)
-            log_message("info", f"Latest file retrieved: {latest_file}")
-            return latest_file
-        else:
-            log_message("warning", f"No files with extension '{extension}' found in {directory}")
-            return None
     except Exception as e:
-        log_message("error", f"Error retrieving latest file: {e}")
-        return None
+        log_message("error", f"Error listing files in {directory}: {e}")
+        return []
+    modified = {path: os.path.getmtime(path) for path in files}
+    if newer_than is not None:
+        files = [path for path in files if modified[path] > newer_than]
+    # Ties (files written within the clock resolution) fall back to the name order
+    return sorted(files, key=lambda path: (modified[path], path))
+
+def get_latest_file(directory, extension=".csv"):
+    """
+    Retrieves the latest file in a directory based on modification time.
+
+    Only one file is returned; use list_files (or the batch manifest in
+    batch_manifest.py) to process every new file.
+
+    Args:
+        directory (str): Directory to search for files.
+        extension (str or tuple): File extension(s) to filter by (default is '.csv').
+
+    Returns:
+        str: Path to the latest file, or None if no files are found.
+    """
+    files = list_files(directory, extension)
+    if files:
+        latest_file = files[-1]
+        log_message("info", "Latest file retrieved: %s", latest_file)
+        return latest_file
+    log_message("warning", f"No files with extension '{extension}' found in {directory}")
+    return None
 
 def handle_exception(func):
     """
@@ -133,3 +365,6 @@ if __name__ == "__main__":
     latest_csv = get_latest_file("./raw_tweets/", ".csv")
     if latest_csv:
         print(f"Latest file: {latest_csv}")
+
+    # Test listing every raw batch
+    print(f"Raw batches: {list_files('./raw_tweets/', '.csv', prefix='tweets_')}")
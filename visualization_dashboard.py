@@ -8,9 +8,10 @@ This Jupyter Notebook creates additional visualizations for the social media ana
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-# Load sentiment analysis results
+from stage_io import read_frame
+# Load sentiment analysis results (CSV, Parquet or Feather)
 sentiment_file = "./processed_tweets/sentiment_results.csv"
-data = pd.read_csv(sentiment_file)
+data = read_frame(sentiment_file)
 
 # Quick overview of the data
 print("Data Overview:")
@@ -44,7 +45,8 @@ plt.savefig("./visualizations/tweet_volume.png")
 plt.show()
 
 # Geographic distribution (top 10 locations)
-top_locations = data["location"].value_counts().head(10)
+top_locations = data["location"].value_counts()
+top_locations = top_locations[top_locations > 0].head(10)
 
 plt.figure(figsize=(10, 6))
 sns.barplot(y=top_locations.index, x=top_locations.values, palette="magma")